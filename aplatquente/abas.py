@@ -0,0 +1,110 @@
+# aplatquente/abas.py
+from __future__ import annotations
+
+# =============================================================================
+# Várias abas do APLAT num mesmo navegador logado (--abas)
+# - Cada aba (window handle) tem a sua thread, a sua SessaoPesquisa e o seu
+#   modal de etapa; o navegador, o SSO e o processo do driver são um só
+# - Todo comando WebDriver passa por uma vez (lock) e troca a janela ativa só
+#   quando a aba da thread não é a atual
+# - A vez fica livre nas pausas das esperas (WebDriverWait da pesquisa, fatias
+#   de aguardar_gravacao/aguardar_app_estavel): enquanto uma aba espera o
+#   servidor, as outras preenchem
+# =============================================================================
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from selenium.webdriver.remote.command import Command
+
+from aplatquente.infra import Driver, instalar_observador_messagebox, instalar_rastreador_rede
+from aplatquente.sessao import ler_storage, preparar_aba_logada
+
+
+class AbasCompartilhadas:
+    """
+    Intercepta driver.execute (como rastreio.contar_comandos): a thread vinculada
+    a uma aba tem os comandos executados nela. Threads sem aba (ex.: quem encerra
+    o driver) usam a janela que estiver ativa.
+    """
+
+    def __init__(self, driver: Driver):
+        self.driver = driver
+        self._vez = threading.Lock()
+        self._local = threading.local()
+        self._atual: Optional[str] = driver.current_window_handle
+        self.trocas = 0
+        self._principal = self._atual
+        self._extras: List[str] = []
+        self._execute = driver.execute
+        driver.execute = self._execute_na_aba
+        driver._aplat_abas = self
+
+    def _execute_na_aba(self, driver_command, params=None):
+        aba = getattr(self._local, "handle", None)
+        with self._vez:
+            if aba is not None and aba != self._atual:
+                self._execute(Command.SWITCH_TO_WINDOW, {"handle": aba})
+                self._atual = aba
+                self.trocas += 1
+            resposta = self._execute(driver_command, params)
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                self._atual = (params or {}).get("handle", self._atual)
+            return resposta
+
+    def vincular(self, handle: str) -> None:
+        """Os comandos desta thread passam a ir para a aba `handle`."""
+        self._local.handle = handle
+
+    def abrir(self, quantidade: int, url: str, timeout: float, prefixo: str = "") -> List[str]:
+        """
+        Abre mais `quantidade` abas já logadas (storage copiado da aba atual).
+        Retorna os handles de todas as abas prontas, começando pela atual.
+        """
+        principal = self._atual
+        self.vincular(principal)
+        storage: Dict[str, Any] = ler_storage(self.driver)
+        prontas = [principal]
+        for i in range(2, quantidade + 2):
+            try:
+                handle = self.driver.execute(Command.NEW_WINDOW, {"type": "tab"})["value"]["handle"]
+            except Exception as e:
+                print(f"{prefixo}[WARN] Não foi possível abrir a aba {i}: {e}")
+                break
+            self._extras.append(handle)
+            self.vincular(handle)
+            if not preparar_aba_logada(self.driver, url, timeout, storage):
+                print(f"{prefixo}[WARN] Aba {i} não chegou à tela principal; seguindo sem ela.")
+                try:
+                    self.driver.execute(Command.CLOSE)
+                except Exception:
+                    pass
+                self._extras.remove(handle)
+                self._atual = None
+                continue
+            instalar_observador_messagebox(self.driver)
+            instalar_rastreador_rede(self.driver)
+            prontas.append(handle)
+        self.vincular(principal)
+        print(f"{prefixo}[INFO] {len(prontas)} aba(s) do APLAT neste navegador.")
+        return prontas
+
+    def fechar(self) -> None:
+        """
+        Fecha as abas abertas por abrir() e volta para a aba principal: com --attach
+        o navegador é do usuário e encerrar_driver não o fecha.
+        """
+        with self._vez:
+            for handle in self._extras:
+                try:
+                    self._execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+                    self._execute(Command.CLOSE)
+                except Exception as e:
+                    print(f"[WARN] Não foi possível fechar a aba {handle}: {e}")
+            self._extras = []
+            try:
+                self._execute(Command.SWITCH_TO_WINDOW, {"handle": self._principal})
+                self._atual = self._principal
+            except Exception as e:
+                print(f"[WARN] Não foi possível voltar para a aba principal: {e}")
+                self._atual = None
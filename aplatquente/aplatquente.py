@@ -1,43 +1,153 @@
 # aplatquente/aplatquente.py
 import sys
 import argparse
+import queue
+import threading
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from aplatquente.infra import (
-    create_edge_driver,
+    BROWSERS_SUPORTADOS,
+    create_driver,
+    encerrar_driver,
     attempt_auto_login,
     prompt_manual_login,
     perform_search,
+    SessaoPesquisa,
+    e_trabalho_quente,
+    ler_tipo_trabalho,
     clicar_botao_confirmar_rodape,
     fechar_modal_etapa,
+    sessao_viva,
+    instalar_observador_messagebox,
+    instalar_rastreador_rede,
 )
 
+from aplatquente.sessao import (
+    SESSAO_PATH_PADRAO,
+    restaurar_sessao,
+    salvar_sessao,
+)
+
+from aplatquente import rastreio
+
+from aplatquente.diario import DIARIO_PATH_PADRAO, Diario, abas_pendentes, abrir_diario
+
+from aplatquente.abas import AbasCompartilhadas
+
+from aplatquente.catalogo_epi import CATALOGO_EPI_PATH_PADRAO, abrir_catalogo
+from aplatquente.epi import usar_catalogo
+
 from aplatquente.plano import (
+    abas_planejadas,
     gerar_plano_trabalho_quente,
+    houve_alteracao,
     imprimir_plano,
     aplicar_plano,
 )
 
 
-def parse_args():
+def parse_args(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description="Automação APLAT - Trabalho a Quente")
 
-    parser.add_argument("--valor", "-v", nargs="+", required=True, help="Número(s) da etapa a processar")
+    parser.add_argument("--valor", "-v", nargs="+", help="Número(s) da etapa a processar")
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Processar todas as etapas de Trabalho a Quente da data (lidas do grid de resultados, com paginação)",
+    )
+    parser.add_argument(
+        "--abas",
+        type=int,
+        default=1,
+        help="Abas do APLAT por navegador (mesmo login): enquanto uma espera pesquisa/gravação, as outras preenchem",
+    )
+    parser.add_argument(
+        "--qualquer-tipo",
+        action="store_true",
+        help="Não pular etapas cujo Tipo Trabalho não é Trabalho a Quente (conferido no grid ou no modal)",
+    )
     parser.add_argument("--data", "-d", required=True, help="Data YYYY-MM-DD. Ex: 2026-01-03")
 
     parser.add_argument("--use-keyring", action="store_true", help="Usar keyring (requer --user)")
     parser.add_argument("--user", help="Usuário do login (obrigatório se usar --use-keyring)")
     parser.add_argument("--keyring-service", default="aplat.petrobras", help="Serviço do keyring")
 
+    parser.add_argument(
+        "--session-file",
+        default=SESSAO_PATH_PADRAO,
+        help="Arquivo (criptografado) da sessão autenticada salva",
+    )
+    parser.add_argument("--no-session", action="store_true", help="Não restaurar/salvar a sessão autenticada")
+
+    parser.add_argument("--browser", choices=BROWSERS_SUPORTADOS, default="edge", help="Navegador a usar")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Executa sem janela (tamanho fixo); exige login automático ou sessão salva",
+    )
+    parser.add_argument(
+        "--attach",
+        metavar="HOST:PORTA",
+        help="Conectar num Edge/Chrome já aberto com --remote-debugging-port (ex.: 127.0.0.1:9222) em vez de abrir outro",
+    )
+
     parser.add_argument("--timeout", type=float, default=30.0, help="Timeout padrão (s)")
     parser.add_argument("--search-timeout", type=float, default=30.0, help="Timeout da busca (s)")
+    parser.add_argument(
+        "--pesquisa-por-etapa",
+        action="store_true",
+        help="Pesquisar cada etapa pelo número (padrão: pesquisar a data uma vez e abrir as etapas do grid)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="Número de navegadores em paralelo (cada um com sua sessão/login)",
+    )
+
+    parser.add_argument(
+        "--diario",
+        default=DIARIO_PATH_PADRAO,
+        help="Diário SQLite de cada etapa/aba (aberta, planejada, abas, confirmada); '' desliga",
+    )
+    parser.add_argument(
+        "--catalogo-epi",
+        default=CATALOGO_EPI_PATH_PADRAO,
+        help="Cache do catálogo de EPIs do modal de associação (validade de 7 dias); '' desliga",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Retomar pelo diário: pula etapas concluídas e, nas demais, as abas já confirmadas",
+    )
+
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Aplicar só o que difere do plano (lê a seleção atual de cada aba); sem diferença, não confirma",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="ARQUIVO.json",
+        help="Gravar os tempos de cada passo (formato Chrome trace) e imprimir p50/p95 no fim",
+    )
+
+    parser.add_argument(
+        "--contar-comandos",
+        action="store_true",
+        help="Contar os comandos WebDriver por tipo e por função (relatório por etapa)",
+    )
 
     parser.add_argument(
         "--url",
         default="https://aplat.petrobras.com.br/#/permissaotrabalho/P-18/planejamento/programacaodiaria",
         help="URL do APLAT",
     )
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def _convert_data_yyyy_mm_dd_to_dd_mm_yyyy(data_str: str) -> str:
@@ -48,18 +158,44 @@ def _convert_data_yyyy_mm_dd_to_dd_mm_yyyy(data_str: str) -> str:
         return data_str
 
 
-def main():
-    args = parse_args()
-
-    if args.use_keyring and not args.user:
-        print("[ERROR] Você usou --use-keyring, então também precisa informar --user.")
-        return 2
+# input() do login manual não pode ser disputado por vários workers ao mesmo tempo
+_LOGIN_MANUAL_LOCK = threading.Lock()
 
-    driver = create_edge_driver()
 
+def _abrir_sessao(args, prefixo: str = ""):
+    """
+    Cria o driver e faz login: sessão salva -> keyring -> manual.
+    Em caso de erro encerra o driver e propaga.
+    """
+    driver = create_driver(args.browser, headless=args.headless, debugger_address=args.attach)
+    if args.contar_comandos:
+        rastreio.contar_comandos(driver)
     try:
-        data_ui = _convert_data_yyyy_mm_dd_to_dd_mm_yyyy(args.data)
+        with rastreio.span("login"):
+            _login(driver, args, prefixo)
+        instalar_observador_messagebox(driver)
+        instalar_rastreador_rede(driver)
+        return driver
+    except Exception:
+        encerrar_driver(driver)
+        raise
 
+
+def _login(driver, args, prefixo: str = "") -> None:
+    """Sessão salva -> keyring -> manual (salva a sessão nova)."""
+    restaurada = False
+    # navegador anexado já carrega a própria sessão: não sobrescreve cookies
+    if not args.no_session and not args.attach:
+        restaurada = restaurar_sessao(
+            driver,
+            args.url,
+            args.timeout,
+            caminho=args.session_file,
+            keyring_service=args.keyring_service,
+            user=args.user,
+        )
+
+    if not restaurada:
         logged_in = attempt_auto_login(
             driver,
             args.url,
@@ -70,56 +206,534 @@ def main():
         )
 
         if not logged_in:
-            prompt_manual_login(driver, args.timeout)
+            with _LOGIN_MANUAL_LOCK:
+                if prefixo:
+                    print(f"{prefixo} Aguardando login manual neste navegador.")
+                prompt_manual_login(driver, args.timeout)
 
-        for etapa in args.valor:
-            # 1) Abrir etapa
-            try:
-                perform_search(driver, data_ui, etapa, args.timeout, args.search_timeout, detail_wait=0.3)
-                print(f"[INFO] Etapa {etapa} aberta com sucesso.")
-            except Exception as e:
-                print(f"[ERROR] Falha ao buscar/abrir etapa {etapa}: {e}")
-                continue
+        if not args.no_session and not args.attach:
+            salvar_sessao(driver, args.session_file, keyring_service=args.keyring_service, user=args.user)
 
-            # 2) Gerar plano
-            try:
-                plano = gerar_plano_trabalho_quente(driver, args.timeout)
-                imprimir_plano(plano)
-            except Exception as e:
-                print(f"[ERROR] Falha ao gerar plano para {etapa}: {e}")
-                # tenta fechar o modal para não travar o loop
-                try:
-                    fechar_modal_etapa(driver, args.timeout)
-                except Exception:
-                    pass
-                continue
-
-            # 3) Aplicar plano (preenchimentos + confirmar por aba, se você implementar assim)
-            try:
-                resultado = aplicar_plano(driver, plano, args.timeout)  # <-- ORDEM CORRETA
-                print(f"[INFO] Preenchimento concluído: {resultado}")
-            except Exception as e:
-                print(f"[WARN] Preenchimento com erro em {etapa}: {e}")
-                # continua mesmo assim para tentar fechar/seguir
 
-            # 4) Confirmação final + fechar (mesmo que o aplicar_plano já confirme por aba)
-            try:
-                clicar_botao_confirmar_rodape(driver, args.timeout)
-            except Exception as e:
-                print(f"[WARN] Não foi possível confirmar no final da etapa {etapa}: {e}")
+def _nova_pesquisa(driver, data_ui: str, args):
+    """SessaoPesquisa da data (uma por navegador), ou None com --pesquisa-por-etapa."""
+    if args.pesquisa_por_etapa:
+        return None
+    return SessaoPesquisa(driver, data_ui, args.timeout, args.search_timeout)
+
+
+@rastreio.rastreado("etapa", arg="etapa")
+def processar_etapa(
+    driver,
+    etapa: str,
+    data_ui: str,
+    args,
+    pesquisa=None,
+    conferir_tipo: bool = True,
+    diario: Optional[Diario] = None,
+) -> Dict[str, Any]:
+    """
+    Fluxo completo de uma etapa: abrir -> plano -> aplicar -> confirmar -> fechar.
+    pesquisa: SessaoPesquisa da data (abre a etapa do grid já carregado).
+    conferir_tipo: pula a etapa se o Tipo Trabalho não é Trabalho a Quente; lido da
+        linha do grid antes de abrir (com pesquisa) ou, sem essa informação, do modal
+        logo ao abrir, antes de qualquer coleta ou preenchimento.
+    diario: registra cada transição; com --resume pula o que já foi concluído.
+    Retorna um resumo {"etapa", "status", "resultado", "erro"}; status: ok | aviso | erro | pulada.
+    Com --contar-comandos inclui "comandos" (round trips WebDriver da etapa).
+    """
+    contador = rastreio.contador_do_driver(driver)
+    if contador is None:
+        return _processar_etapa(driver, etapa, data_ui, args, pesquisa, conferir_tipo, diario)
+
+    # só os comandos desta thread: com --abas as outras abas usam o mesmo driver
+    marco = contador.marco(desta_thread=True)
+    res = _processar_etapa(driver, etapa, data_ui, args, pesquisa, conferir_tipo, diario)
+    dados = contador.desde(marco, desta_thread=True)
+    res["comandos"] = int(sum(n for n, _ in dados.values()))
+    rastreio.imprimir_relatorio_comandos(dados, f"etapa {etapa}")
+    return res
 
+
+def _processar_etapa(
+    driver, etapa: str, data_ui: str, args, pesquisa, conferir_tipo: bool, diario: Optional[Diario]
+) -> Dict[str, Any]:
+    res: Dict[str, Any] = {"etapa": etapa, "status": "ok", "resultado": None, "erro": ""}
+
+    def registrar(evento: str, **kw) -> None:
+        if diario is not None:
+            diario.registrar(data_ui, etapa, evento, **kw)
+
+    # 0) Retomada: etapa já concluída numa execução anterior nem é aberta
+    retomar = diario is not None and args.resume
+    pular_abas: set = set()
+    plano_salvo = None
+    if retomar:
+        concluida = diario.etapa_concluida(data_ui, etapa)
+        if concluida:
+            print(f"[INFO] Etapa {etapa} já {concluida} no diário; pulando (--resume).")
+            res.update(status="pulada", erro=f"diário: {concluida}")
+            return res
+        pular_abas = diario.abas_concluidas(data_ui, etapa)
+        plano_salvo = diario.plano(data_ui, etapa)
+
+    def pular_por_tipo(tipo: str, onde: str) -> Dict[str, Any]:
+        print(f"[INFO] Etapa {etapa} ignorada ({onde}): Tipo Trabalho = {tipo!r}.")
+        res.update(status="pulada", erro=f"tipo: {tipo}")
+        registrar("pulada", detalhe=res["erro"])
+        return res
+
+    # 1) Abrir etapa (tipo conhecido no grid decide antes de abrir o modal)
+    try:
+        if conferir_tipo and pesquisa is not None:
+            tipo = pesquisa.tipo_no_grid(etapa)
+            if tipo:
+                if not e_trabalho_quente(tipo):
+                    return pular_por_tipo(tipo, "grid")
+                conferir_tipo = False
+        if pesquisa is not None:
+            pesquisa.abrir_etapa(etapa, detail_wait=0.3)
+        else:
+            perform_search(driver, data_ui, etapa, args.timeout, args.search_timeout, detail_wait=0.3)
+        print(f"[INFO] Etapa {etapa} aberta com sucesso.")
+        registrar("aberta")
+    except Exception as e:
+        print(f"[ERROR] Falha ao buscar/abrir etapa {etapa}: {e}")
+        res.update(status="erro", erro=f"busca: {e}")
+        registrar("erro", ok=False, detalhe=res["erro"])
+        return res
+
+    if conferir_tipo:
+        tipo = ler_tipo_trabalho(driver)
+        if tipo and not e_trabalho_quente(tipo):
+            pular_por_tipo(tipo, "modal")
             try:
                 fechar_modal_etapa(driver, args.timeout)
-            except Exception as e:
-                print(f"[WARN] Não foi possível fechar o modal da etapa {etapa}: {e}")
+            except Exception:
+                pass
+            return res
 
-        input("Pressione ENTER para encerrar...")  # útil enquanto você está testando
-
-    finally:
+    # 2) Gerar plano (na retomada, o plano gravado evita recoletar a tela)
+    try:
+        if plano_salvo is not None:
+            plano = plano_salvo
+            print(f"[INFO] Etapa {etapa}: plano do diário reaproveitado; abas já concluídas: {sorted(pular_abas) or '-'}.")
+        else:
+            plano = gerar_plano_trabalho_quente(driver, args.timeout)
+            registrar("planejada", detalhe=plano)
+        imprimir_plano(plano)
+    except Exception as e:
+        print(f"[ERROR] Falha ao gerar plano para {etapa}: {e}")
+        res.update(status="erro", erro=f"plano: {e}")
+        registrar("erro", ok=False, detalhe=res["erro"])
+        # tenta fechar o modal para não travar o loop
         try:
-            driver.quit()
+            fechar_modal_etapa(driver, args.timeout)
         except Exception:
             pass
+        return res
+
+    # 3) Aplicar plano (preenchimentos + confirmar por aba, se você implementar assim)
+    try:
+        resultado = aplicar_plano(  # <-- ORDEM CORRETA
+            driver,
+            plano,
+            args.timeout,
+            pular=pular_abas,
+            ao_concluir_aba=(lambda aba, r: diario.registrar_aba(data_ui, etapa, aba, r)) if diario is not None else None,
+            diff=args.diff,
+        )
+        res["resultado"] = resultado
+        if resultado.get("warnings"):
+            res["status"] = "aviso"
+        print(f"[INFO] Preenchimento concluído: {resultado}")
+    except Exception as e:
+        print(f"[WARN] Preenchimento com erro em {etapa}: {e}")
+        res.update(status="aviso", erro=f"preenchimento: {e}")
+        # continua mesmo assim para tentar fechar/seguir
+
+    # etapa concluída = toda aba planejada concluída (fail == 0, total > 0); o
+    # status sozinho não basta: aba com fail ou que voltou None não vira aviso
+    pendentes = abas_pendentes(res["resultado"], abas_planejadas(plano))
+    if pendentes:
+        print(f"[WARN] Etapa {etapa}: aba(s) não concluída(s): {', '.join(pendentes)}.")
+        if res["status"] == "ok":
+            res.update(status="aviso", erro=f"abas pendentes: {', '.join(pendentes)}")
+
+    # 4) Confirmação final + fechar (mesmo que o aplicar_plano já confirme por aba)
+    try:
+        if args.diff and res["status"] == "ok" and not houve_alteracao(res["resultado"] or {}, abas_planejadas(plano)):
+            print(f"[INFO] Etapa {etapa} já conforme o plano; Confirmar do rodapé dispensado.")
+        else:
+            clicar_botao_confirmar_rodape(driver, args.timeout)
+        # ok=1 só com todas as abas concluídas: etapa com aba pendente volta no --resume
+        # (só as abas pendentes)
+        registrar(
+            "confirmada",
+            ok=not pendentes and res["status"] == "ok",
+            detalhe={"status": res["status"], "erro": res["erro"], "pendentes": pendentes},
+        )
+    except Exception as e:
+        print(f"[WARN] Não foi possível confirmar no final da etapa {etapa}: {e}")
+        res.update(status="aviso", erro=res["erro"] or f"confirmar: {e}")
+        registrar("erro", ok=False, detalhe=res["erro"])
+
+    try:
+        fechar_modal_etapa(driver, args.timeout)
+    except Exception as e:
+        print(f"[WARN] Não foi possível fechar o modal da etapa {etapa}: {e}")
+
+    return res
+
+
+def _varrer_data(pesquisa, driver, data_ui: str, args):
+    """Etapas de Trabalho a Quente da data: gera (numero, conferir_tipo) a partir do grid."""
+    sessao = pesquisa or SessaoPesquisa(driver, data_ui, args.timeout, args.search_timeout)
+    for linha in sessao.varrer(apenas_quente=not args.qualquer_tipo):
+        # sem coluna de tipo no grid: confere no modal antes de preencher
+        yield linha["numero"], not linha.get("tipo") and not args.qualquer_tipo
+
+
+def _alimentar_fila(
+    pesquisa,
+    driver,
+    data_ui: str,
+    args,
+    fila: "queue.Queue[Tuple[str, bool]]",
+    alimentada: threading.Event,
+    lock: threading.Lock,
+    etapas_varridas: List[str],
+    prefixo: str,
+) -> None:
+    """Varre o grid da data e põe cada etapa na fila assim que aparece (streaming)."""
+    try:
+        for etapa, conferir in _varrer_data(pesquisa, driver, data_ui, args):
+            with lock:
+                etapas_varridas.append(etapa)
+            fila.put((etapa, conferir))
+    except Exception as e:
+        print(f"{prefixo}[ERROR] Falha na varredura da data: {e}")
+    finally:
+        alimentada.set()
+
+
+def _consumir_fila(
+    driver,
+    pesquisa,
+    args,
+    data_ui: str,
+    fila: "queue.Queue[Tuple[str, bool]]",
+    alimentada: threading.Event,
+    resultados: List[Dict[str, Any]],
+    lock: threading.Lock,
+    diario: Optional[Diario],
+    prefixo: str,
+    origem: Dict[str, Any],
+) -> None:
+    """Processa etapas da fila até esvaziar; origem ({"worker": n[, "aba": k]}) vai para cada resultado."""
+    while True:
+        try:
+            etapa, conferir = fila.get(timeout=0.5)
+        except queue.Empty:
+            if alimentada.is_set() and fila.empty():
+                return
+            continue
+
+        print(f"{prefixo}[INFO] Processando etapa {etapa}...")
+        try:
+            res = processar_etapa(driver, etapa, data_ui, args, pesquisa, conferir_tipo=conferir, diario=diario)
+        except Exception as e:
+            res = {"etapa": etapa, "status": "erro", "resultado": None, "erro": f"worker {origem.get('worker')}: {e}"}
+
+        # processar_etapa captura tudo e devolve status "erro": só a sessão diz se
+        # o navegador morreu. Morto, devolve a etapa à fila para os demais e sai.
+        if res["status"] == "erro" and not sessao_viva(driver):
+            print(f"{prefixo}[ERROR] Sessão do navegador perdida na etapa {etapa}; devolvendo-a à fila e encerrando.")
+            fila.put((etapa, conferir))
+            return
+
+        res.update(origem)
+        with lock:
+            resultados.append(res)
+
+
+def _processar_em_abas(
+    driver,
+    n: int,
+    args,
+    data_ui: str,
+    fila: "queue.Queue[Tuple[str, bool]]",
+    alimentada: threading.Event,
+    resultados: List[Dict[str, Any]],
+    lock: threading.Lock,
+    etapas_varridas: Optional[List[str]],
+    diario: Optional[Diario],
+) -> None:
+    """
+    --abas N: N abas do APLAT neste navegador, uma thread por aba consumindo a
+    mesma fila. A aba 1 faz a varredura (--sweep) enquanto as outras já processam.
+    """
+    prefixo = f"[W{n}]"
+    abas = AbasCompartilhadas(driver)
+
+    def rodar(k: int, handle: str) -> None:
+        abas.vincular(handle)
+        rotulo = f"[W{n}][A{k}]"
+        try:
+            pesquisa = _nova_pesquisa(driver, data_ui, args)
+            if k == 1 and etapas_varridas is not None:
+                _alimentar_fila(pesquisa, driver, data_ui, args, fila, alimentada, lock, etapas_varridas, rotulo)
+            _consumir_fila(driver, pesquisa, args, data_ui, fila, alimentada, resultados, lock, diario, rotulo, {"worker": n, "aba": k})
+        except Exception as e:
+            print(f"{rotulo}[ERROR] Aba encerrada: {e}")
+        finally:
+            # a aba que varre libera as outras mesmo se cair antes/durante a varredura
+            if k == 1 and etapas_varridas is not None:
+                alimentada.set()
+
+    try:
+        handles = abas.abrir(args.abas - 1, args.url, args.timeout, prefixo)
+        threads = [
+            threading.Thread(target=rodar, args=(k, h), name=f"aplat-w{n}-a{k}", daemon=True)
+            for k, h in enumerate(handles, start=1)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"{prefixo}[INFO] Trocas de aba no driver: {abas.trocas}.")
+    finally:
+        abas.fechar()
+
+
+def _worker(
+    n: int,
+    args,
+    data_ui: str,
+    fila: "queue.Queue[Tuple[str, bool]]",
+    alimentada: threading.Event,
+    resultados: List[Dict[str, Any]],
+    lock: threading.Lock,
+    etapas_varridas: Optional[List[str]] = None,
+    diario: Optional[Diario] = None,
+) -> None:
+    """
+    Worker do pool: abre o próprio navegador e consome etapas da fila até esvaziar.
+    Falha no login/driver encerra só este worker; as etapas restantes ficam para os outros.
+    Com etapas_varridas (--sweep), este worker primeiro varre o grid da data e
+    alimenta a fila enquanto os demais já vão processando.
+    Com --abas > 1, o navegador do worker roda várias abas intercaladas.
+    """
+    prefixo = f"[W{n}]"
+    try:
+        driver = _abrir_sessao(args, prefixo)
+    except Exception as e:
+        print(f"{prefixo}[ERROR] Não foi possível iniciar/logar o navegador: {e}")
+        if etapas_varridas is not None:
+            alimentada.set()
+        return
+
+    try:
+        if args.abas > 1:
+            _processar_em_abas(driver, n, args, data_ui, fila, alimentada, resultados, lock, etapas_varridas, diario)
+            return
+
+        pesquisa = _nova_pesquisa(driver, data_ui, args)
+        if etapas_varridas is not None:
+            _alimentar_fila(pesquisa, driver, data_ui, args, fila, alimentada, lock, etapas_varridas, prefixo)
+        _consumir_fila(driver, pesquisa, args, data_ui, fila, alimentada, resultados, lock, diario, prefixo, {"worker": n})
+    except Exception as e:
+        print(f"{prefixo}[ERROR] Worker encerrado: {e}")
+    finally:
+        # como em _alimentar_fila: falha antes/durante a varredura não deixa os
+        # outros workers esperando uma fila que nunca termina
+        if etapas_varridas is not None:
+            alimentada.set()
+        _relatorio_final_comandos(driver, f"total W{n}")
+        encerrar_driver(driver)
+
+
+def processar_em_paralelo(
+    args,
+    data_ui: str,
+    etapas: List[str],
+    workers: int,
+    varrer: bool = False,
+    diario: Optional[Diario] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Distribui as etapas entre N navegadores independentes (fila de trabalho),
+    cada um com --abas abas.
+    varrer: a lista vem da varredura do grid (feita pelo worker 1, em streaming).
+    """
+    fila: "queue.Queue[Tuple[str, bool]]" = queue.Queue()
+    alimentada = threading.Event()
+    if not varrer:
+        for etapa in etapas:
+            fila.put((etapa, not args.qualquer_tipo))
+        alimentada.set()
+
+    resultados: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(n, args, data_ui, fila, alimentada, resultados, lock, etapas if varrer and n == 1 else None, diario),
+            name=f"aplat-w{n}",
+            daemon=True,
+        )
+        for n in range(1, workers + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # etapas que sobraram na fila (todos os workers caíram)
+    while True:
+        try:
+            etapa, _ = fila.get_nowait()
+        except queue.Empty:
+            break
+        resultados.append({"etapa": etapa, "status": "erro", "resultado": None, "erro": "não processada (nenhum worker disponível)"})
+
+    ordem = {e: i for i, e in enumerate(etapas)}
+    resultados.sort(key=lambda r: ordem.get(r["etapa"], len(ordem)))
+    return resultados
+
+
+def imprimir_resumo(resultados: List[Dict[str, Any]]) -> None:
+    print("\n====== RESUMO DAS ETAPAS ======")
+    for r in resultados:
+        worker = f" [W{r['worker']}]" if r.get("worker") else ""
+        if r.get("aba"):
+            worker = f"{worker[:-1]}/A{r['aba']}]"
+        erro = f" :: {r['erro']}" if r.get("erro") else ""
+        cmds = f" ({r['comandos']} cmds)" if r.get("comandos") else ""
+        print(f"  - {r['etapa']:<16} {r['status'].upper():<6}{worker}{cmds}{erro}")
+    contagem: Dict[str, int] = {}
+    for r in resultados:
+        contagem[r["status"]] = contagem.get(r["status"], 0) + 1
+    print("Totais: " + ", ".join(f"{k}={v}" for k, v in sorted(contagem.items())))
+    print("===============================\n")
+
+
+def _relatorio_final_comandos(driver, titulo: str) -> None:
+    contador = rastreio.contador_do_driver(driver)
+    if contador is not None:
+        rastreio.imprimir_relatorio_comandos(contador.marco(), titulo)
+
+
+def _finalizar_rastreio(args) -> None:
+    """Com --trace: grava o arquivo de spans e imprime a tabela p50/p95."""
+    if not args.trace:
+        return
+    try:
+        n = rastreio.exportar_chrome_trace(args.trace)
+        print(f"[INFO] {n} span(s) gravados em {args.trace} (abrir em chrome://tracing ou ui.perfetto.dev).")
+    except OSError as e:
+        print(f"[WARN] Não foi possível gravar o trace em {args.trace}: {e}")
+    rastreio.imprimir_tabela_tempos()
+
+
+def main():
+    # subcomando sem navegador: python -m aplatquente.aplatquente plan etapas.csv
+    if len(sys.argv) > 1 and sys.argv[1] == "plan":
+        from aplatquente.plano_lote import main as main_plan
+        return main_plan(sys.argv[2:])
+
+    # APLAT simulado local / benchmark: python -m aplatquente.aplatquente mock bench
+    if len(sys.argv) > 1 and sys.argv[1] == "mock":
+        from aplatquente.mock_aplat import main as main_mock
+        return main_mock(sys.argv[2:])
+
+    args = parse_args()
+
+    if not args.valor and not args.sweep:
+        print("[ERROR] Informe --valor com as etapas ou use --sweep para processar a data inteira.")
+        return 2
+
+    if args.valor and args.sweep:
+        print("[ERROR] Use --valor ou --sweep, não os dois.")
+        return 2
+
+    if args.use_keyring and not args.user:
+        print("[ERROR] Você usou --use-keyring, então também precisa informar --user.")
+        return 2
+
+    if args.workers < 1:
+        print("[ERROR] --workers deve ser >= 1.")
+        return 2
+
+    if args.abas < 1:
+        print("[ERROR] --abas deve ser >= 1.")
+        return 2
+
+    if args.attach and args.browser == "firefox":
+        print("[ERROR] --attach só é suportado com --browser edge ou chrome.")
+        return 2
+
+    if args.headless and not args.use_keyring:
+        print("[WARN] --headless sem --use-keyring: só funciona se houver sessão salva válida (não há janela para login manual).")
+
+    if args.attach and args.workers > 1:
+        print("[ERROR] --attach usa um único navegador compartilhado; não combine com --workers > 1.")
+        return 2
+
+    diario = abrir_diario(args.diario)
+    if args.resume and diario is None:
+        print("[ERROR] --resume precisa do diário (--diario).")
+        return 2
+    if diario is not None:
+        print(f"[INFO] Diário de execução: {diario.caminho}{' (retomando)' if args.resume else ''}.")
+
+    usar_catalogo(abrir_catalogo(args.catalogo_epi))
+
+    if args.trace:
+        rastreio.ativar()
+
+    data_ui = _convert_data_yyyy_mm_dd_to_dd_mm_yyyy(args.data)
+
+    # na varredura o número de etapas só é conhecido depois: usa todos os workers
+    workers = args.workers if args.sweep else min(args.workers, len(args.valor))
+    if workers > 1 or args.abas > 1:
+        etapas: List[str] = [] if args.sweep else list(args.valor)
+        resultados = processar_em_paralelo(args, data_ui, etapas, workers, varrer=args.sweep, diario=diario)
+        if diario is not None:
+            diario.fechar()
+        imprimir_resumo(resultados)
+        _finalizar_rastreio(args)
+        return 0 if all(r["status"] != "erro" for r in resultados) else 1
+
+    driver = _abrir_sessao(args)
+
+    try:
+        pesquisa = _nova_pesquisa(driver, data_ui, args)
+        if args.sweep:
+            # um navegador só: lista a data inteira primeiro (paginar e abrir etapas
+            # ao mesmo tempo no mesmo grid perderia a página corrente)
+            fila = list(_varrer_data(pesquisa, driver, data_ui, args))
+            print(f"[INFO] {len(fila)} etapa(s) de Trabalho a Quente a processar.")
+        else:
+            fila = [(etapa, not args.qualquer_tipo) for etapa in args.valor]
+
+        resultados = [
+            processar_etapa(driver, etapa, data_ui, args, pesquisa, conferir_tipo=conferir, diario=diario)
+            for etapa, conferir in fila
+        ]
+        if pesquisa is not None:
+            print(f"[INFO] Pesquisas de data no servidor: {pesquisa.pesquisas} para {len(fila)} etapa(s).")
+        imprimir_resumo(resultados)
+        _relatorio_final_comandos(driver, "total da execução")
+        _finalizar_rastreio(args)
+
+        input("Pressione ENTER para encerrar...")  # útil enquanto você está testando
+
+    finally:
+        encerrar_driver(driver)
+        if diario is not None:
+            diario.fechar()
 
     return 0
 
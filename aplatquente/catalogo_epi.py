@@ -0,0 +1,123 @@
+# aplatquente/catalogo_epi.py
+from __future__ import annotations
+
+# =============================================================================
+# Catálogo de EPIs do modal de associação (cache local com validade)
+# - Cada categoria (Vestimentas, Óculos, Luvas, ...) tem o seu catálogo no modal
+#   aberto pelo botão "+"; a leitura acontece de graça quando o modal já está
+#   aberto para associar, e fica gravada por categoria com a hora da leitura
+# - Com o cache válido, o plano é roteado antes de abrir qualquer modal: item
+#   listado na categoria errada vai para a categoria certa; item que não existe
+#   no catálogo abre o modal da própria categoria uma vez (relê o catálogo, o EPI
+#   pode ser novo no APLAT) e só falha sem modal depois dessa releitura
+# =============================================================================
+
+import json
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+CATALOGO_EPI_PATH_PADRAO = os.path.join(os.path.expanduser("~"), ".aplatquente", "catalogo_epi.json")
+
+# Catálogo mais velho que isso é relido do modal (EPIs novos entram no APLAT raramente)
+CATALOGO_EPI_MAX_IDADE_S = 7 * 24 * 3600
+
+
+def _norm(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s or "")
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.upper().split())
+
+
+class CatalogoEpi:
+    """
+    código -> descrição -> categoria, por categoria:
+    {"categorias": {nome: {"lido_em": ts, "itens": [{"codigo", "descricao"}]}}}.
+    O código é o texto normalizado da linha do modal (o APLAT não mostra outro).
+    Compartilhado entre os workers (lock); gravação atômica como a da sessão.
+    """
+
+    def __init__(self, caminho: str = CATALOGO_EPI_PATH_PADRAO, max_idade_s: float = CATALOGO_EPI_MAX_IDADE_S):
+        self.caminho = caminho
+        self.max_idade_s = max_idade_s
+        self._lock = threading.Lock()
+        self._categorias: Dict[str, Dict] = {}
+        # categorias relidas do modal nesta execução (cache sabidamente atual)
+        self._relidas: set = set()
+        self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as fh:
+                dados = json.load(fh)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Catálogo de EPI ilegível em {self.caminho}: {e}")
+            return
+        categorias = dados.get("categorias") if isinstance(dados, dict) else None
+        if isinstance(categorias, dict):
+            self._categorias = {_norm(k): v for k, v in categorias.items() if isinstance(v, dict)}
+
+    def _salvar(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+            tmp = f"{self.caminho}.{os.getpid()}.{threading.get_ident()}.tmp"  # workers podem salvar juntos
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"categorias": self._categorias}, fh, ensure_ascii=False)
+            os.replace(tmp, self.caminho)
+        except OSError as e:
+            print(f"[WARN] Falha ao gravar o catálogo de EPI em {self.caminho}: {e}")
+
+    # ------------------------------------------------------------------ escrita
+    def atualizar(self, categoria: str, descricoes: Iterable[str]) -> None:
+        """Grava o catálogo lido do modal da categoria (substitui o anterior)."""
+        itens = []
+        vistos = set()
+        for d in descricoes:
+            codigo = _norm(d)
+            if codigo and codigo not in vistos:
+                vistos.add(codigo)
+                itens.append({"codigo": codigo, "descricao": " ".join((d or "").split())})
+        with self._lock:
+            self._categorias[_norm(categoria)] = {"lido_em": time.time(), "itens": itens}
+            self._relidas.add(_norm(categoria))
+            self._salvar()
+
+    # ------------------------------------------------------------------ leitura
+    def valida(self, categoria: str) -> bool:
+        """A categoria foi lida do modal há menos de max_idade_s?"""
+        with self._lock:
+            c = self._categorias.get(_norm(categoria))
+        return bool(c) and time.time() - float(c.get("lido_em") or 0) < self.max_idade_s
+
+    def relida(self, categoria: str) -> bool:
+        """A categoria foi lida do modal nesta execução (não só carregada do arquivo)?"""
+        with self._lock:
+            return _norm(categoria) in self._relidas
+
+    def codigos(self, categoria: str) -> List[str]:
+        with self._lock:
+            c = self._categorias.get(_norm(categoria)) or {}
+            return [it["codigo"] for it in c.get("itens") or []]
+
+    def categoria_de(self, item: str) -> Optional[str]:
+        """Categoria (normalizada, só catálogos válidos) que tem o item; exato antes de prefixo/contém."""
+        itn = _norm(item)
+        if not itn:
+            return None
+        validas = [cat for cat in list(self._categorias) if self.valida(cat)]
+        for teste in (str.__eq__, str.startswith, lambda cod, i: i in cod):
+            for cat in validas:
+                if any(teste(cod, itn) for cod in self.codigos(cat)):
+                    return cat
+        return None
+
+
+def abrir_catalogo(caminho: Optional[str]) -> Optional[CatalogoEpi]:
+    """Abre o catálogo; caminho vazio => None (sempre lê o modal)."""
+    if not caminho:
+        return None
+    return CatalogoEpi(caminho)
@@ -104,6 +104,29 @@ SEARCH_RESULT_XPATHS = [
 ]
 
 
+# Todas as linhas do grid de resultados (varredura do dia), em ordem de preferência
+SEARCH_RESULT_ROWS_XPATHS = [
+    "//app-grid//table/tbody/tr",
+    "//table//tbody//tr",
+    "//ul[contains(@class,'list-group')]//li[contains(@class,'listagem')]",
+]
+
+
+def xpaths_resultado_por_numero(xpath_literal: str) -> list[str]:
+    """
+    Retorna os XPaths (em ordem de preferência) da linha do grid de resultados
+    de uma etapa específica, pelo número (ex.: "'18/164/2024'").
+    Primeiro célula com texto exato; depois card/linha que contém o número.
+    """
+    return [
+        f"//app-grid//table/tbody/tr[.//td[normalize-space()={xpath_literal}]]",
+        f"//table//tbody//tr[.//td[normalize-space()={xpath_literal}]]",
+        f"//app-etapa-row[.//*[normalize-space()={xpath_literal}]]",
+        "//ul[contains(@class,'list-group')]"
+        f"//li[contains(@class,'listagem')][.//*[normalize-space()={xpath_literal}]]",
+    ]
+
+
 # =============================================================================
 # MODAIS (genéricos e mensagens)
 # =============================================================================
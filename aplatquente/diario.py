@@ -0,0 +1,145 @@
+# aplatquente/diario.py
+from __future__ import annotations
+
+# =============================================================================
+# Diário de execução (SQLite em WAL) para retomar depois de uma queda
+# - Cada transição de etapa/aba vira uma linha: aberta, planejada, aba (resultado
+#   de cada preenchimento), confirmada, pulada, erro
+# - Gravado na hora (autocommit): se o Edge/SSO cair na etapa 25 de 40, o que
+#   já foi confirmado está no disco
+# - --resume: etapas concluídas nem são abertas; nas demais, abas já confirmadas
+#   sem falha são puladas e o plano gravado é reaproveitado
+# =============================================================================
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+DIARIO_PATH_PADRAO = os.path.join(os.path.expanduser("~"), ".aplatquente", "diario.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts      REAL    NOT NULL,
+    data    TEXT    NOT NULL,
+    etapa   TEXT    NOT NULL,
+    aba     TEXT    NOT NULL DEFAULT '',
+    evento  TEXT    NOT NULL,
+    ok      INTEGER NOT NULL DEFAULT 1,
+    detalhe TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_eventos_etapa ON eventos (data, etapa, evento);
+"""
+
+
+def aba_concluida(resultado: Any) -> bool:
+    """
+    Resultado de preenchimento que conta como aba confirmada sem falha: sem erro,
+    fail == 0 e ao menos uma linha preenchida (total == 0 é aba que não renderizou).
+    Aba retomada ({"retomada": True}) já foi concluída numa execução anterior.
+    """
+    if not isinstance(resultado, dict):
+        return False
+    if resultado.get("retomada"):
+        return True
+    return not resultado.get("erro") and int(resultado.get("fail") or 0) == 0 and int(resultado.get("total") or 0) > 0
+
+
+def abas_pendentes(resultado: Optional[Dict[str, Any]], planejadas: Iterable[str]) -> List[str]:
+    """Abas planejadas cujo resultado (de aplicar_plano) não conta como concluído."""
+    resultado = resultado or {}
+    return [aba for aba in planejadas if not aba_concluida(resultado.get(aba))]
+
+
+class Diario:
+    """Diário compartilhado entre os workers (uma conexão, serializada por lock)."""
+
+    def __init__(self, caminho: str = DIARIO_PATH_PADRAO):
+        self.caminho = caminho
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(caminho, timeout=30.0, isolation_level=None, check_same_thread=False)
+        # WAL: escrita é um append no -wal; leitores (outro processo com --resume) não bloqueiam.
+        # synchronous=NORMAL em WAL sobrevive a queda do processo/navegador (só perde o
+        # último commit numa queda de energia).
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.executescript(_SCHEMA)
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._con.close()
+
+    # ------------------------------------------------------------------ escrita
+    def registrar(
+        self,
+        data: str,
+        etapa: str,
+        evento: str,
+        aba: str = "",
+        ok: bool = True,
+        detalhe: Any = None,
+    ) -> None:
+        """Grava uma transição. Nunca levanta: o diário não pode derrubar o preenchimento."""
+        texto = None if detalhe is None else json.dumps(detalhe, ensure_ascii=False, default=str)
+        try:
+            with self._lock:
+                self._con.execute(
+                    "INSERT INTO eventos (ts, data, etapa, aba, evento, ok, detalhe) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (time.time(), data, etapa, aba, evento, int(bool(ok)), texto),
+                )
+        except sqlite3.Error as e:
+            print(f"[WARN] Diário: não foi possível gravar {evento} de {etapa}: {e}")
+
+    def registrar_aba(self, data: str, etapa: str, aba: str, resultado: Any) -> None:
+        self.registrar(data, etapa, "aba", aba=aba, ok=aba_concluida(resultado), detalhe=resultado)
+
+    # ------------------------------------------------------------------ leitura
+    def etapa_concluida(self, data: str, etapa: str) -> Optional[str]:
+        """'confirmada' / 'pulada' se a etapa já terminou em alguma execução; senão None."""
+        with self._lock:
+            row = self._con.execute(
+                "SELECT evento FROM eventos WHERE data = ? AND etapa = ? "
+                "AND ((evento = 'confirmada' AND ok = 1) OR evento = 'pulada') ORDER BY id DESC LIMIT 1",
+                (data, etapa),
+            ).fetchone()
+        return row[0] if row else None
+
+    def abas_concluidas(self, data: str, etapa: str) -> Set[str]:
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT DISTINCT aba FROM eventos WHERE data = ? AND etapa = ? AND evento = 'aba' AND ok = 1",
+                (data, etapa),
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def plano(self, data: str, etapa: str) -> Optional[Dict[str, Any]]:
+        """Último plano gravado da etapa (para retomar sem recoletar)."""
+        with self._lock:
+            row = self._con.execute(
+                "SELECT detalhe FROM eventos WHERE data = ? AND etapa = ? AND evento = 'planejada' "
+                "ORDER BY id DESC LIMIT 1",
+                (data, etapa),
+            ).fetchone()
+        if not row or not row[0]:
+            return None
+        try:
+            plano = json.loads(row[0])
+        except ValueError:
+            return None
+        return plano if isinstance(plano, dict) else None
+
+
+def abrir_diario(caminho: Optional[str]) -> Optional[Diario]:
+    """Abre o diário; caminho vazio ou erro => None (segue sem diário)."""
+    if not caminho:
+        return None
+    try:
+        return Diario(caminho)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[WARN] Diário indisponível em {caminho}: {e}")
+        return None
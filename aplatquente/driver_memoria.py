@@ -0,0 +1,819 @@
+# aplatquente/driver_memoria.py
+from __future__ import annotations
+
+# =============================================================================
+# Driver em memória (sem navegador) para testes e micro-benchmarks do preenchimento
+# - DOM em lxml; XPath avaliado pelo libxml2 (o mesmo XPath 1.0 do navegador)
+# - É um RemoteWebDriver de verdade com um executor local: WebElement,
+#   WebDriverWait, EC, ActionChains e rastreio.contar_comandos funcionam sem mudança
+# - Suporta o subconjunto usado por infra/plano/preenchimento/epi: find_element(s),
+#   text, get_attribute, is_selected/enabled/displayed, click, double click e os
+#   execute_script conhecidos (emulados em Python); script desconhecido => JavascriptException
+# - as emulações espelham o contrato (argumentos/retorno) dos _JS_* de cada módulo,
+#   NÃO o corpo do JS: tests/ cobre resultados e round trips dos caminhos de
+#   preenchimento; o JS injetado em si só é exercitado pelo `mock bench` (navegador real)
+# - latencia_ms simula o round trip de cada comando
+# - ao_clicar(xpath, fn) faz o papel do app (trocar aba, gravar, abrir modal...)
+# =============================================================================
+
+import re
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    InvalidSelectorException,
+    JavascriptException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+_CHAVE_ELEMENTO = "element-6066-11e4-a52e-4f735466cecf"
+
+# comandos de sessão não pagam a latência simulada
+_SEM_LATENCIA = frozenset({Command.NEW_SESSION, Command.QUIT, Command.CLOSE})
+
+
+def _lxml_html():
+    try:
+        import lxml.html  # type: ignore
+    except Exception as e:
+        raise RuntimeError(f"DriverMemoria requer lxml (pip install lxml): {e}")
+    return lxml.html
+
+
+# =============================================================================
+# Helpers de DOM
+# =============================================================================
+
+def _classes(el) -> str:
+    return el.get("class") or ""
+
+
+def _visivel(el) -> bool:
+    """Aproximação do isDisplayed: hidden, display:none, classe 'hidden' ou input hidden."""
+    if el.tag == "input" and (el.get("type") or "").lower() == "hidden":
+        return False
+    no = el
+    while no is not None:
+        if no.get("hidden") is not None:
+            return False
+        estilo = (no.get("style") or "").replace(" ", "").lower()
+        if "display:none" in estilo or "visibility:hidden" in estilo:
+            return False
+        if "hidden" in _classes(no).split():
+            return False
+        no = no.getparent()
+    return True
+
+
+def _texto_conteudo(el) -> str:
+    """textContent (inclui descendentes ocultos, ignora comentários)."""
+    partes: List[str] = []
+
+    def walk(no) -> None:
+        if isinstance(no.tag, str):
+            if no.text:
+                partes.append(no.text)
+            for filho in no:
+                walk(filho)
+                if filho.tail:
+                    partes.append(filho.tail)
+
+    walk(el)
+    return "".join(partes)
+
+
+def _texto_visivel(el) -> str:
+    """innerText aproximado: só descendentes visíveis, sem script/style, espaços colapsados."""
+    if not _visivel(el):
+        return ""
+    partes: List[str] = []
+
+    def walk(no) -> None:
+        if not isinstance(no.tag, str) or no.tag in ("script", "style"):
+            return
+        if no is not el and not _visivel(no):
+            return
+        if no.text:
+            partes.append(no.text)
+        for filho in no:
+            walk(filho)
+            if filho.tail:
+                partes.append(filho.tail)
+
+    walk(el)
+    return " ".join(" ".join(partes).split())
+
+
+def _css_para_xpath(css: str) -> str:
+    """
+    Só os seletores que o Selenium gera para By.ID/NAME/CLASS_NAME
+    ([id="x"], [name="x"], .x) mais tag e #id simples.
+    """
+    css = css.strip()
+    m = re.fullmatch(r'([a-zA-Z][\w-]*|\*)?\[([\w-]+)="((?:[^"\\]|\\.)*)"\]', css)
+    if m:
+        valor = re.sub(r"\\(.)", r"\1", m.group(3))
+        return f"//{m.group(1) or '*'}[@{m.group(2)}={_literal(valor)}]"
+    m = re.fullmatch(r"([a-zA-Z][\w-]*)?\.([\w-]+)", css)
+    if m:
+        return f"//{m.group(1) or '*'}[contains(concat(' ', normalize-space(@class), ' '), ' {m.group(2)} ')]"
+    m = re.fullmatch(r"([a-zA-Z][\w-]*)?#([\w-]+)", css)
+    if m:
+        return f"//{m.group(1) or '*'}[@id={_literal(m.group(2))}]"
+    if re.fullmatch(r"[a-zA-Z][\w-]*", css):
+        return f"//{css.lower()}"
+    raise InvalidSelectorException(f"DriverMemoria: seletor CSS não suportado: {css}")
+
+
+def _literal(texto: str) -> str:
+    if "'" not in texto:
+        return f"'{texto}'"
+    if '"' not in texto:
+        return f'"{texto}"'
+    partes = texto.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in partes) + ")"
+
+
+# =============================================================================
+# Executor (o "navegador")
+# =============================================================================
+
+class _ExecutorMemoria:
+    """Responde aos comandos WebDriver sobre um documento lxml."""
+
+    def __init__(self, latencia_ms: float = 0.0):
+        self.latencia_ms = latencia_ms
+        self.comandos: Counter = Counter()
+        self.url = "about:blank"
+        self.doc = None
+        self._por_id: Dict[str, Any] = {}
+        self._ids: Dict[Any, str] = {}
+        self._seq = 0
+        self._ganchos: List[Tuple[str, str, Callable]] = []
+        self._scripts: Dict[str, Callable] = {}
+        self.gravacoes: List[Dict[str, Any]] = []
+        self._janela = {"msgbox": False, "rede": False}
+
+    # ------------------------------------------------------------------ DOM
+    def carregar(self, html: str, url: str = "about:blank") -> None:
+        lh = _lxml_html()
+        self.doc = lh.document_fromstring(html)
+        self.url = url
+        self._por_id.clear()
+        self._ids.clear()
+        self._janela = {"msgbox": False, "rede": False}
+
+    def ref(self, el) -> Dict[str, str]:
+        eid = self._ids.get(el)
+        if eid is None:
+            self._seq += 1
+            eid = f"mem-{self._seq}"
+            self._ids[el] = eid
+            self._por_id[eid] = el
+        return {_CHAVE_ELEMENTO: eid}
+
+    def elemento(self, eid: str):
+        el = self._por_id.get(eid)
+        if el is None:
+            raise NoSuchElementException(f"DriverMemoria: elemento desconhecido {eid}")
+        if self.doc is None or el.getroottree().getroot() is not self.doc:
+            raise StaleElementReferenceException(f"DriverMemoria: elemento {eid} não está mais no documento")
+        return el
+
+    def por_id_dom(self, id_dom: str):
+        achados = self.doc.xpath(f"//*[@id={_literal(id_dom)}]") if self.doc is not None and id_dom else []
+        return achados[0] if achados else None
+
+    def xpath(self, expr: str, contexto=None) -> list:
+        if self.doc is None:
+            return []
+        base = contexto if contexto is not None else self.doc
+        try:
+            res = base.xpath(expr)
+        except Exception as e:
+            raise InvalidSelectorException(f"DriverMemoria: XPath inválido {expr!r}: {e}")
+        if not isinstance(res, list):
+            return []
+        return [r for r in res if hasattr(r, "tag") and isinstance(r.tag, str)]
+
+    def _buscar(self, using: str, valor: str, contexto=None) -> list:
+        if using == "xpath":
+            return self.xpath(valor, contexto)
+        if using == "css selector":
+            xp = _css_para_xpath(valor)
+            return self.xpath(("." + xp) if contexto is not None else xp, contexto)
+        if using == "tag name":
+            return self.xpath((".//" if contexto is not None else "//") + valor.lower(), contexto)
+        if using in ("link text", "partial link text"):
+            achados = self.xpath(".//a" if contexto is not None else "//a", contexto)
+            if using == "link text":
+                return [a for a in achados if _texto_visivel(a) == valor.strip()]
+            return [a for a in achados if valor in _texto_visivel(a)]
+        raise InvalidSelectorException(f"DriverMemoria: estratégia não suportada: {using}")
+
+    # ------------------------------------------------------------- cliques
+    def ao_clicar(self, xpath: str, fn: Callable, evento: str = "click") -> None:
+        self._ganchos.append((evento, xpath, fn))
+
+    def _disparar(self, el, evento: str) -> None:
+        caminho = [el] + list(el.iterancestors())
+        for ev, xp, fn in list(self._ganchos):
+            if ev != evento or el.getroottree().getroot() is not self.doc:
+                continue
+            alvos = set(self.xpath(xp))
+            if any(no in alvos for no in caminho):
+                fn(self.driver, el)
+
+    def ativar(self, el) -> None:
+        """Ação padrão do clique (label -> input, radio, checkbox, option)."""
+        alvo = el
+        if el.tag == "label":
+            fid = (el.get("for") or "").strip()
+            alvo = self.por_id_dom(fid) if fid else next(iter(el.xpath(".//input")), None)
+            if alvo is None:
+                return
+        if alvo.get("disabled") is not None:
+            return
+        tipo = (alvo.get("type") or "").lower()
+        if alvo.tag == "input" and tipo == "radio":
+            if alvo.get("checked") is None:
+                self._marcar_radio(alvo)
+                self._disparar(alvo, "change")
+        elif alvo.tag == "input" and tipo == "checkbox":
+            if alvo.get("checked") is None:
+                alvo.set("checked", "")
+            else:
+                del alvo.attrib["checked"]
+            self._disparar(alvo, "change")
+        elif alvo.tag == "option":
+            for irmao in alvo.getparent().xpath("./option"):
+                irmao.attrib.pop("selected", None)
+            alvo.set("selected", "")
+        if alvo is not el:
+            self._disparar(alvo, "click")
+
+    def _marcar_radio(self, radio) -> None:
+        """Marca e desmarca o grupo: mesmo name ou, sem name (APLAT), a linha questao_*."""
+        nome = radio.get("name")
+        if nome:
+            grupo = self.xpath(f"//input[@type='radio' and @name={_literal(nome)}]")
+        else:
+            linha = next(iter(radio.xpath("ancestor::*[starts-with(@id,'questao_')][1]")), None)
+            base = linha if linha is not None else radio.getparent()
+            grupo = base.xpath(".//input[@type='radio' and not(@name)]")
+        for r in grupo:
+            r.attrib.pop("checked", None)
+        radio.set("checked", "")
+
+    def clicar(self, el, js: bool = False) -> None:
+        if not js and not _visivel(el):
+            raise ElementNotInteractableException("DriverMemoria: elemento não visível")
+        self._disparar(el, "click")
+        if el.getroottree().getroot() is self.doc:
+            self.ativar(el)
+        self._padrao_app(el)
+
+    def _padrao_app(self, el) -> None:
+        """Comportamento embutido do app: Ok da messagebox fecha a caixa."""
+        if el.tag != "button" or not re.fullmatch(r"(?i)ok", _texto_conteudo(el).strip()):
+            return
+        caixa = next(iter(el.xpath("ancestor::app-messagebox[1]")), None)
+        if caixa is not None and caixa.getparent() is not None:
+            caixa.getparent().remove(caixa)
+
+    def _acoes(self, params: Dict[str, Any]) -> None:
+        """W3C actions: pointerMove com origem elemento + down/up = clique; 2 seguidos = dblclick."""
+        for fonte in params.get("actions") or []:
+            if fonte.get("type") != "pointer":
+                continue
+            alvo = None
+            cliques = 0
+            pressionado = False
+            for a in fonte.get("actions") or []:
+                tipo = a.get("type")
+                if tipo == "pointerMove":
+                    origem = a.get("origin")
+                    if isinstance(origem, dict) and _CHAVE_ELEMENTO in origem:
+                        alvo = self.elemento(origem[_CHAVE_ELEMENTO])
+                        if not _visivel(alvo):
+                            raise ElementNotInteractableException("DriverMemoria: elemento não visível")
+                    cliques = 0
+                elif tipo == "pointerDown":
+                    pressionado = True
+                elif tipo == "pointerUp" and pressionado and alvo is not None:
+                    pressionado = False
+                    self.clicar(alvo)
+                    cliques += 1
+                    if cliques == 2 and alvo.getroottree().getroot() is self.doc:
+                        self._disparar(alvo, "dblclick")
+
+    # --------------------------------------------------------- atributos
+    def atributo(self, el, nome: str) -> Optional[str]:
+        """Semântica do atom getAttribute do Selenium (propriedade antes de atributo)."""
+        if nome in ("checked", "selected", "disabled", "readonly", "multiple"):
+            return "true" if el.get(nome) is not None else None
+        if nome == "textContent":
+            return _texto_conteudo(el)
+        if nome == "innerText":
+            return _texto_visivel(el)
+        if nome == "value" and el.get("value") is None:
+            if el.tag == "input" and (el.get("type") or "").lower() in ("radio", "checkbox"):
+                return "on"
+            if el.tag == "textarea":
+                return _texto_conteudo(el)
+        if nome == "type" and el.tag == "input" and el.get("type") is None:
+            return "text"
+        return el.get("class" if nome == "className" else nome)
+
+    # ------------------------------------------------------------ scripts
+    def emular_script(self, script: str, fn: Callable) -> None:
+        self._scripts[script] = fn
+
+    def _script(self, script: str, args: list, assincrono: bool) -> Any:
+        args = [self._desembrulhar(a) for a in args]
+        fn = self._scripts.get(script) or _emulacao_embutida(script)
+        if fn is None:
+            raise JavascriptException(f"DriverMemoria: script não emulado: {' '.join(script.split())[:80]}")
+        if assincrono:
+            args = args[:-1] if len(args) and callable(args[-1]) else args
+        return self._embrulhar(fn(self, *args))
+
+    def _desembrulhar(self, v):
+        if isinstance(v, dict):
+            if _CHAVE_ELEMENTO in v:
+                return self.elemento(v[_CHAVE_ELEMENTO])
+            return {k: self._desembrulhar(x) for k, x in v.items()}
+        if isinstance(v, list):
+            return [self._desembrulhar(x) for x in v]
+        return v
+
+    def _embrulhar(self, v):
+        if hasattr(v, "tag") and hasattr(v, "getparent"):
+            return self.ref(v)
+        if isinstance(v, dict):
+            return {k: self._embrulhar(x) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [self._embrulhar(x) for x in v]
+        return v
+
+    # ----------------------------------------------------------- executor
+    def execute(self, comando: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        params = dict(params or {})
+        self.comandos[comando] += 1
+        if self.latencia_ms and comando not in _SEM_LATENCIA:
+            time.sleep(self.latencia_ms / 1000.0)
+        return {"value": self._executar(comando, params)}
+
+    def _executar(self, comando: str, p: Dict[str, Any]) -> Any:
+        if comando == Command.NEW_SESSION:
+            return {"sessionId": "memoria", "capabilities": {"browserName": "memoria"}}
+        if comando in (Command.QUIT, Command.CLOSE, Command.SET_TIMEOUTS, Command.W3C_CLEAR_ACTIONS):
+            return None
+        if comando == Command.GET:
+            self.url = p.get("url") or self.url
+            return None
+        if comando == Command.GET_CURRENT_URL:
+            return self.url
+        if comando == Command.GET_TITLE:
+            return _texto_conteudo(self.doc.find(".//title")) if self.doc is not None and self.doc.find(".//title") is not None else ""
+        if comando == Command.GET_PAGE_SOURCE:
+            return self.html()
+        if comando in (Command.W3C_GET_CURRENT_WINDOW_HANDLE,):
+            return "memoria"
+        if comando in (Command.W3C_GET_WINDOW_HANDLES,):
+            return ["memoria"]
+
+        if comando in (Command.FIND_ELEMENT, Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS):
+            contexto = self.elemento(p["id"]) if comando in (Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS) else None
+            achados = self._buscar(p.get("using", ""), p.get("value", ""), contexto)
+            if comando in (Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENTS):
+                return [self.ref(e) for e in achados]
+            if not achados:
+                raise NoSuchElementException(f"DriverMemoria: nada em {p.get('using')}={p.get('value')}")
+            return self.ref(achados[0])
+
+        if comando in (Command.W3C_EXECUTE_SCRIPT, Command.W3C_EXECUTE_SCRIPT_ASYNC):
+            return self._script(p.get("script", ""), list(p.get("args") or []), comando == Command.W3C_EXECUTE_SCRIPT_ASYNC)
+
+        if comando == Command.W3C_ACTIONS:
+            self._acoes(p)
+            return None
+
+        el = self.elemento(p["id"])
+        if comando == Command.CLICK_ELEMENT:
+            self.clicar(el)
+            return None
+        if comando == Command.GET_ELEMENT_TEXT:
+            return _texto_visivel(el)
+        if comando == Command.GET_ELEMENT_TAG_NAME:
+            return el.tag
+        if comando == Command.IS_ELEMENT_SELECTED:
+            return el.get("checked") is not None or el.get("selected") is not None
+        if comando == Command.IS_ELEMENT_ENABLED:
+            return el.get("disabled") is None
+        if comando == Command.GET_ELEMENT_ATTRIBUTE:
+            return el.get(p.get("name", ""))
+        if comando == Command.GET_ELEMENT_PROPERTY:
+            return self.atributo(el, p.get("name", ""))
+        if comando == Command.GET_ELEMENT_RECT:
+            return {"x": 0, "y": 0, "width": 100, "height": 20} if _visivel(el) else {"x": 0, "y": 0, "width": 0, "height": 0}
+        if comando == Command.CLEAR_ELEMENT:
+            el.set("value", "")
+            return None
+        if comando == Command.SEND_KEYS_TO_ELEMENT:
+            el.set("value", (el.get("value") or "") + str(p.get("text", "")))
+            return None
+        raise WebDriverException(f"DriverMemoria: comando não suportado: {comando}")
+
+    def html(self) -> str:
+        if self.doc is None:
+            return ""
+        lh = _lxml_html()
+        return lh.tostring(self.doc, encoding="unicode")
+
+    def close(self) -> None:
+        pass
+
+
+# =============================================================================
+# Emulação dos scripts conhecidos (mesmo contrato do JS original)
+# =============================================================================
+
+def _js_click(ex: _ExecutorMemoria, el=None, *_):
+    if el is not None:
+        ex.clicar(el, js=True)
+    return None
+
+
+def _js_nada(ex: _ExecutorMemoria, *_):
+    return None
+
+
+def _js_get_attribute(ex: _ExecutorMemoria, el, nome, *_):
+    return ex.atributo(el, nome)
+
+
+def _js_is_displayed(ex: _ExecutorMemoria, el, *_):
+    return _visivel(el)
+
+
+def _js_propriedade(ex: _ExecutorMemoria, el, nome, *_):
+    return ex.atributo(el, nome)
+
+
+def _js_forcar_checked(ex: _ExecutorMemoria, el=None, *_):
+    """preenchimento._mark_apn1_radio: el.checked = true + input/change."""
+    if el is None:
+        return False
+    if el.get("checked") is None:
+        ex.ativar(el)
+    return el.get("checked") is not None
+
+
+def _js_aba_ativa(ex: _ExecutorMemoria, a, *_):
+    li = next(iter(a.xpath("ancestor-or-self::li[1]")), None)
+    cls_li = _classes(li) if li is not None else ""
+    return "active" in _classes(a) or "active" in cls_li or (a.get("aria-selected") or "") == "true"
+
+
+def _js_app_estavel(ex: _ExecutorMemoria, *_):
+    return {"ok": True, "modo": "memoria"}
+
+
+def _botoes_ok(ex: _ExecutorMemoria) -> list:
+    out = []
+    for b in ex.xpath("//button"):
+        if re.fullmatch(r"(?i)ok", " ".join(_texto_conteudo(b).split())) and _visivel(b):
+            caixa = next(iter(b.xpath("ancestor::app-messagebox[1]")), None)
+            out.append((caixa if caixa is not None else b, b))
+    return out
+
+
+def _js_msgbox(ex: _ExecutorMemoria, auto_dismiss=True, *_):
+    instalado = not ex._janela["msgbox"]
+    ex._janela["msgbox"] = True
+    textos, dispensadas = [], 0
+    if auto_dismiss:
+        for caixa, b in _botoes_ok(ex):
+            textos.append(_texto_visivel(caixa)[:300])
+            ex.clicar(b, js=True)
+            dispensadas += 1
+    pendente = (not auto_dismiss) and bool(_botoes_ok(ex))
+    return {"instalado": instalado, "dismissed": dispensadas, "textos": textos, "pendente": pendente}
+
+
+def _js_rede(ex: _ExecutorMemoria, *_):
+    instalado = not ex._janela["rede"]
+    ex._janela["rede"] = True
+    return {"instalado": instalado, "inflight": 0, "seq": len(ex.gravacoes)}
+
+
+def _js_aguardar_save(ex: _ExecutorMemoria, desde=0, _limite=0, _grace=0, ignorar=r"(?!)", *_):
+    if not ex._janela["rede"]:
+        return {"estado": "sem_rastreador", "saves": []}
+    novos = [g for g in ex.gravacoes if g["seq"] > int(desde or 0) and not re.search(ignorar, g["url"], re.I)]
+    if not novos:
+        return {"estado": "sem_save", "saves": []}
+    ok = all(200 <= int(g["status"]) < 400 for g in novos)
+    return {"estado": "ok" if ok else "falha", "saves": novos}
+
+
+def _linhas(ex: _ExecutorMemoria, xps) -> list:
+    for xp in xps or []:
+        rows = ex.xpath(xp)
+        if rows:
+            return rows
+    return []
+
+
+def _primeiro(el, xp: str):
+    return next(iter(el.xpath(xp)), None)
+
+
+def _js_aplicar_radios(ex: _ExecutorMemoria, xps, plano, todas=None, re_ordem=None, *_):
+    """preenchimento._JS_APLICAR_RADIOS."""
+    from aplatquente.preenchimento import RE_ORDEM_LINHA, _norm, _resp_norm
+
+    rows = _linhas(ex, xps)
+    por_ordem: Dict[str, Any] = {}
+    for row in rows:
+        el = _primeiro(row, ".//*[contains(@class,'ordem')]")
+        m = re.search(re_ordem or RE_ORDEM_LINHA, _texto_conteudo(el if el is not None else row))
+        if m:
+            por_ordem[m.group(1)] = row
+
+    def marcar(row, desejado: str):
+        alvo = next((lb for lb in row.xpath(".//label") if _resp_norm(_texto_conteudo(lb)) == desejado), None)
+        if alvo is None:
+            return False, "label"
+        fid = (alvo.get("for") or "").strip()
+        inp = ex.por_id_dom(fid) if fid else None
+        if inp is not None and inp.get("checked") is not None:
+            return True, "ja_marcado"
+        ex.clicar(alvo, js=True)
+        if inp is None:
+            return True, "clicado"
+        if inp.get("checked") is None:
+            ex.clicar(inp, js=True)
+        if inp.get("checked") is None:
+            ex.ativar(inp)
+        marcado = inp.get("checked") is not None
+        return marcado, "clicado" if marcado else "nao_marcou"
+
+    itens = []
+    if todas is not None:
+        desejado = _resp_norm(todas)
+        for i, row in enumerate(rows):
+            ok, motivo = marcar(row, desejado)
+            itens.append({"ordem": f"{i + 1:03d}", "ok": ok, "motivo": motivo})
+        return itens
+
+    for p in plano or []:
+        row = por_ordem.get(p.get("ordem"))
+        dica = _norm(p.get("hint") or "")
+        if row is None and dica:
+            for r in rows:
+                q = _primeiro(r, ".//*[contains(@class,'pergunta')]")
+                if dica in _norm(_texto_conteudo(q if q is not None else r)):
+                    row = r
+                    break
+        if row is None:
+            itens.append({"ordem": p.get("ordem"), "ok": False, "motivo": "linha"})
+            continue
+        ok, motivo = marcar(row, _resp_norm(p.get("resp") or ""))
+        itens.append({"ordem": p.get("ordem"), "ok": ok, "motivo": motivo})
+    return itens
+
+
+def _txt(el) -> str:
+    return _texto_visivel(el) if el is not None else ""
+
+
+def _js_snapshot_apn1(ex: _ExecutorMemoria, xps, *_):
+    """plano._JS_SNAPSHOT_APN1."""
+    out = []
+    for row in _linhas(ex, xps):
+        ordem = _txt(_primeiro(row, ".//div[contains(@class,'ordem')]"))
+        pergunta = _txt(_primeiro(row, ".//div[contains(@class,'pergunta')]")) or _txt(row)
+        id_sim = id_nao = ""
+        for lb in row.xpath(".//label"):
+            t = " ".join(_texto_conteudo(lb).split())
+            if not id_sim and t == "Sim":
+                id_sim = (lb.get("for") or "").strip()
+            if not id_nao and t in ("Não", "Nao"):
+                id_nao = (lb.get("for") or "").strip()
+        sel = None
+        inp_sim = ex.por_id_dom(id_sim) if id_sim else None
+        inp_nao = ex.por_id_dom(id_nao) if id_nao else None
+        if inp_sim is not None and inp_sim.get("checked") is not None:
+            sel = "Sim"
+        elif inp_nao is not None and inp_nao.get("checked") is not None:
+            sel = "Não"
+        out.append({
+            "ordem": ordem, "pergunta": pergunta, "id_sim": id_sim, "id_nao": id_nao,
+            "selecionado_atual": sel, "row_id": row.get("id") or "",
+        })
+    return out
+
+
+def _js_perguntas_apn1(ex: _ExecutorMemoria, xps, *_):
+    """plano._JS_PERGUNTAS_APN1."""
+    return [
+        _txt(_primeiro(row, ".//div[contains(@class,'pergunta')]")) or _txt(row)
+        for row in _linhas(ex, xps)
+    ]
+
+
+def _js_tipo_trabalho(ex: _ExecutorMemoria, xp, *_):
+    """infra._JS_TIPO_TRABALHO."""
+    sel = next(iter(ex.xpath(xp)), None)
+    if sel is None:
+        return ""
+    opcoes = sel.xpath(".//option")
+    opt = next((o for o in opcoes if o.get("selected") is not None), opcoes[0] if opcoes else None)
+    return " ".join(_texto_conteudo(opt).split()) if opt is not None else ""
+
+
+def _marcado(el) -> bool:
+    if el.tag == "input":
+        return el.get("checked") is not None
+    return (el.get("aria-checked") or "") == "true"
+
+
+def _rotulo_checkbox(ex: _ExecutorMemoria, el) -> str:
+    tr = _primeiro(el, "ancestor::tr[1]")
+    if tr is not None:
+        return _texto_conteudo(tr)
+    if el.get("id"):
+        lb = next(iter(ex.xpath(f"//label[@for={_literal(el.get('id'))}]")), None)
+        if lb is not None:
+            return _texto_conteudo(lb)
+    pai = _primeiro(el, "ancestor::label[1]")
+    if pai is not None:
+        return _texto_conteudo(pai)
+    for irmao in (el.getprevious(), el.getnext()):
+        if irmao is not None and irmao.tag == "label":
+            return _texto_conteudo(irmao)
+    return el.get("aria-label") or el.get("title") or ""
+
+
+def _js_indice_epis(ex: _ExecutorMemoria, xp, *_):
+    """epi._JS_INDICE_EPIS."""
+    raiz = next(iter(ex.xpath(xp)), None) if xp else None
+    if raiz is None:
+        raiz = ex.xpath("/*")[0]
+    els = raiz.xpath(".//input[@type='checkbox'] | .//*[@role='checkbox' or @role='switch']")
+    return [
+        {"el": el, "texto": _rotulo_checkbox(ex, el), "id": el.get("id") or "", "marcado": _marcado(el)}
+        for el in els
+    ]
+
+
+def _js_marcar_epis(ex: _ExecutorMemoria, els=None, *_):
+    """epi._JS_MARCAR_EPIS."""
+    out = []
+    for el in els or []:
+        if _marcado(el):
+            out.append({"ok": True, "motivo": "ja_marcado"})
+            continue
+        ex.clicar(el, js=True)
+        if not _marcado(el) and el.tag == "input":
+            el.set("checked", "")
+        out.append({"ok": True, "motivo": "clicado"} if _marcado(el) else {"ok": False, "motivo": "nao_marcou"})
+    return out
+
+
+def _js_categorias_epi(ex: _ExecutorMemoria, xp, *_):
+    """epi._JS_CATEGORIAS_EPI."""
+    raiz = next(iter(ex.xpath(xp)), None) if xp else None
+    if raiz is None:
+        raiz = ex.xpath("/*")[0]
+    out = []
+    for lb in raiz.xpath(".//label[contains(concat(' ', normalize-space(@class), ' '), ' control-label ')]"):
+        linha = lb.getparent()
+        if not any(b.tag == "button" and _texto_conteudo(b).strip() == "+" for b in linha):
+            continue
+        bloco = _primeiro(lb, "ancestor::*[contains(concat(' ', normalize-space(@class), ' '), ' form-group ')][1]")
+        if bloco is None:
+            bloco = linha.getparent()
+        associados = [" ".join((_texto_conteudo(td) or td.get("title") or "").split()) for td in bloco.xpath(".//app-grid//td")]
+        out.append({"categoria": " ".join(_texto_conteudo(lb).split()), "associados": [t for t in associados if t]})
+    return out
+
+
+_EMULADOS: Optional[Dict[str, Callable]] = None
+
+
+def _emulacao_embutida(script: str) -> Optional[Callable]:
+    global _EMULADOS
+    if _EMULADOS is None:
+        from aplatquente import epi, infra, plano, preenchimento
+        _EMULADOS = {
+            epi._JS_INDICE_EPIS: _js_indice_epis,
+            epi._JS_MARCAR_EPIS: _js_marcar_epis,
+            epi._JS_CATEGORIAS_EPI: _js_categorias_epi,
+            infra._JS_APP_ESTAVEL: _js_app_estavel,
+            infra._JS_MSGBOX_WATCHER: _js_msgbox,
+            infra._JS_REDE_TRACKER: _js_rede,
+            infra._JS_AGUARDAR_SAVE: _js_aguardar_save,
+            infra._JS_TIPO_TRABALHO: _js_tipo_trabalho,
+            plano._JS_SNAPSHOT_APN1: _js_snapshot_apn1,
+            plano._JS_PERGUNTAS_APN1: _js_perguntas_apn1,
+            preenchimento._JS_APLICAR_RADIOS: _js_aplicar_radios,
+        }
+    fn = _EMULADOS.get(script)
+    if fn is not None:
+        return fn
+
+    s = " ".join(script.split())
+    if s.startswith("/* getAttribute */"):
+        return _js_get_attribute
+    if s.startswith("/* isDisplayed */"):
+        return _js_is_displayed
+    if s == "return arguments[0][arguments[1]]":
+        return _js_propriedade
+    if s == "arguments[0].click();":
+        return _js_click
+    if "aria-selected" in s and "closest('li')" in s:
+        return _js_aba_ativa
+    if "el.checked = true" in s:
+        return _js_forcar_checked
+    if "scrollIntoView" in s and len(s) < 120:
+        return _js_nada
+    return None
+
+
+# =============================================================================
+# Driver
+# =============================================================================
+
+class DriverMemoria(RemoteWebDriver):
+    """
+    WebDriver sem navegador sobre um HTML em memória.
+
+    latencia_ms: atraso artificial por comando (simula o round trip ao navegador).
+    comandos: Counter de comandos WebDriver executados (zerar_contagem() zera).
+    """
+
+    def __init__(self, html: str = "<html><body></body></html>", latencia_ms: float = 0.0, url: str = "about:blank"):
+        executor = _ExecutorMemoria(latencia_ms)
+        executor.driver = self
+        executor.carregar(html, url)
+        super().__init__(command_executor=executor, options=ChromeOptions())
+        executor.comandos.clear()
+
+    @property
+    def memoria(self) -> _ExecutorMemoria:
+        return self.command_executor  # type: ignore[return-value]
+
+    @property
+    def comandos(self) -> Counter:
+        return self.memoria.comandos
+
+    @property
+    def latencia_ms(self) -> float:
+        return self.memoria.latencia_ms
+
+    @latencia_ms.setter
+    def latencia_ms(self, valor: float) -> None:
+        self.memoria.latencia_ms = valor
+
+    def zerar_contagem(self) -> None:
+        self.memoria.comandos.clear()
+
+    def total_comandos(self) -> int:
+        return sum(self.memoria.comandos.values())
+
+    def carregar_html(self, html: str, url: str = "about:blank") -> None:
+        """Troca o documento (como uma navegação: elementos antigos ficam stale)."""
+        self.memoria.carregar(html, url)
+
+    def ao_clicar(self, xpath: str, fn: Callable[["DriverMemoria", Any], None], evento: str = "click") -> None:
+        """
+        Registra a reação do app a um clique (evento 'click', 'dblclick' ou 'change')
+        em qualquer elemento dentro de `xpath`. fn recebe (driver, elemento lxml).
+        """
+        self.memoria.ao_clicar(xpath, fn, evento)
+
+    def emular_script(self, script: str, fn: Callable[..., Any]) -> None:
+        """Emula um execute_script pelo texto exato; fn recebe (executor, *args)."""
+        self.memoria.emular_script(script, fn)
+
+    def registrar_gravacao(self, url: str = "/api/salvar", status: int = 200, metodo: str = "POST") -> None:
+        """Chamado pelos ganchos: uma gravação vista pelo rastreador de rede."""
+        g = self.memoria.gravacoes
+        g.append({"metodo": metodo, "url": url, "status": status, "seq": len(g) + 1})
+
+    def xpath(self, expr: str) -> list:
+        """Elementos lxml do documento atual (para montar cenários e conferir estado)."""
+        return self.memoria.xpath(expr)
+
+    def html(self) -> str:
+        return self.memoria.html()
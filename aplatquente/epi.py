@@ -1,16 +1,23 @@
 # aplatquente/epi.py
 from __future__ import annotations
 
-import time
 import unicodedata
-from typing import Dict, Iterable, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 
-from aplatquente.infra import click_like_legacy, confirmar_etapa, ensure_no_messagebox, goto_tab
+from aplatquente.catalogo_epi import CatalogoEpi
+from aplatquente.config.xpaths import (
+    XPATH_EPI_BTN_CANCELAR,
+    XPATH_EPI_BTN_CONFIRMAR,
+    XPATH_EPI_MODAL_CONTENT,
+    xpath_epi_categoria,
+)
+from aplatquente.infra import aguardar_app_estavel, confirmar_etapa, ensure_no_messagebox, goto_tab, wait_and_click
+from aplatquente.rastreio import rastreado
 
 
 def _norm(s: str) -> str:
@@ -23,8 +30,10 @@ def _norm(s: str) -> str:
 
 
 def _click(driver, el: WebElement) -> bool:
+    # clique simples: o duplo clique do click_like_legacy marca e desmarca o checkbox
     try:
-        return click_like_legacy(driver, el, max_attempts=3, scroll=True, label="epi_click")
+        el.click()
+        return True
     except Exception:
         try:
             driver.execute_script("arguments[0].click();", el)
@@ -50,30 +59,143 @@ def aplicar_epi_adicional(driver, timeout: float, plano_epi_radios: Dict[str, st
 # 2) EPIs por categoria (checkbox/toggle/lista)
 # =============================================================================
 
-def aplicar_epi_por_categoria(driver, epis_categorias: Dict[str, Iterable[str]], timeout: float):
+# Raiz da aba EPI (sem ela, o índice varre o documento inteiro)
+_XPATH_RAIZ_EPI = "//app-epi-da-etapa"
+
+# Índice da aba EPI num único script: cada checkbox/toggle com o texto que o
+# identifica (linha da tabela, label[for], label ao redor ou irmão) e o estado.
+# A normalização e o casamento com o plano ficam no Python (_norm).
+_JS_INDICE_EPIS = r"""
+const raiz = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+  .singleNodeValue || document;
+const texto = (el) => (el ? el.textContent : '') || '';
+const marcado = (el) => el.tagName === 'INPUT' ? el.checked === true : el.getAttribute('aria-checked') === 'true';
+const rotulo = (el) => {
+  const tr = el.closest('tr');
+  if (tr) return texto(tr);
+  if (el.id) {
+    const lb = document.querySelector('label[for="' + CSS.escape(el.id) + '"]');
+    if (lb) return texto(lb);
+  }
+  const pai = el.closest('label');
+  if (pai) return texto(pai);
+  for (const irmao of [el.previousElementSibling, el.nextElementSibling]) {
+    if (irmao && irmao.tagName === 'LABEL') return texto(irmao);
+  }
+  return el.getAttribute('aria-label') || el.getAttribute('title') || '';
+};
+const els = raiz.querySelectorAll('input[type="checkbox"], [role="checkbox"], [role="switch"]');
+return Array.from(els).map((el) => ({el: el, texto: rotulo(el), id: el.id || '', marcado: marcado(el)}));
+"""
+
+# Marca os checkboxes recebidos num único script: clique simples (o duplo clique
+# do click_like_legacy desmarcaria de novo) e, se o app não reagir, checked + eventos.
+_JS_MARCAR_EPIS = r"""
+const marcado = (el) => el.tagName === 'INPUT' ? el.checked === true : el.getAttribute('aria-checked') === 'true';
+return (arguments[0] || []).map((el) => {
+  if (marcado(el)) return {ok: true, motivo: 'ja_marcado'};
+  el.click();
+  if (!marcado(el) && el.tagName === 'INPUT') {
+    el.checked = true;
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+  }
+  return marcado(el) ? {ok: true, motivo: 'clicado'} : {ok: false, motivo: 'nao_marcou'};
+});
+"""
+
+
+def _casar_epi(item_norm: str, textos: List[str], exatos: Optional[Dict[str, int]] = None) -> Optional[int]:
+    """Posição do checkbox do item no índice: texto exato, depois prefixo, depois contém."""
+    if not item_norm:
+        return None
+    if exatos is None:
+        pos = textos.index(item_norm) if item_norm in textos else None
+    else:
+        pos = exatos.get(item_norm)
+    if pos is not None:
+        return pos
+    for pos, t in enumerate(textos):
+        if t.startswith(item_norm):
+            return pos
+    for pos, t in enumerate(textos):
+        if item_norm in t:
+            return pos
+    return None
+
+
+def _aplicar_epis_em_lote(
+    driver,
+    epis_categorias: Dict[str, Iterable[str]],
+    raiz: str = _XPATH_RAIZ_EPI,
+    ao_indexar: Optional[Callable[[List[str]], None]] = None,
+) -> Optional[Dict[str, int]]:
     """
-    Best-effort: marca itens de EPIs por categoria.
-    Como o DOM real pode variar, a estratégia é:
-      - entrar na aba EPI
-      - para cada item: tentar achar checkbox/toggle próximo de um label com o texto do item
-    Não tenta desmarcar nada.
+    Uma extração da aba (índice), casamento no Python e um único script de clique
+    para os itens ainda desmarcados: 1-2 round trips no total, qualquer que seja o
+    número de itens. Retorna None se o índice falhar (o chamador vai item a item).
+    raiz: XPath do container indexado (a aba ou o modal de associação).
+    ao_indexar: recebe os textos do índice (ex.: para gravar o catálogo do modal).
     """
-    print("[STEP] EPI por categoria...")
-    goto_tab(driver, "EPI", timeout)
-    ensure_no_messagebox(driver, 2)
+    try:
+        indice = driver.execute_script(_JS_INDICE_EPIS, raiz)
+    except Exception as e:
+        print(f"[DEBUG][EPI CAT] Índice da aba falhou, seguindo item a item: {e}")
+        return None
+    if not isinstance(indice, list):
+        return None
 
-    total = ok = fail = 0
+    if ao_indexar is not None:
+        ao_indexar([str(e.get("texto") or "") for e in indice])
+    textos = [_norm(str(e.get("texto") or "")) for e in indice]
+    exatos: Dict[str, int] = {}
+    for pos, t in enumerate(textos):
+        exatos.setdefault(t, pos)
 
-    # garante que a aba EPI carregou algo (não rígido)
-    try:
-        WebDriverWait(driver, min(timeout, 10.0)).until(
-            EC.presence_of_element_located((By.XPATH, "//*[self::app-epi or @id='EPI' or .//input[@type='checkbox'] or .//label]"))
-        )
-    except Exception:
-        pass
+    # (categoria, item, posição no índice ou None)
+    casados: List[Tuple[str, str, Optional[int]]] = []
+    a_marcar: List[int] = []
+    for categoria, itens in (epis_categorias or {}).items():
+        for item in (itens or []):
+            pos = _casar_epi(_norm(str(item)), textos, exatos)
+            casados.append((str(categoria), str(item), pos))
+            if pos is not None and not indice[pos].get("marcado") and pos not in a_marcar:
+                a_marcar.append(pos)
+
+    motivos: Dict[int, Dict[str, Any]] = {}
+    if a_marcar:
+        try:
+            saida = driver.execute_script(_JS_MARCAR_EPIS, [indice[pos]["el"] for pos in a_marcar]) or []
+        except Exception as e:
+            print(f"[WARN][EPI CAT] Marcação em lote falhou: {e}")
+            saida = []
+        for k, pos in enumerate(a_marcar):
+            motivos[pos] = saida[k] if k < len(saida) else {"ok": False, "motivo": "script"}
+
+    ok = fail = 0
+    for categoria, item, pos in casados:
+        if pos is None:
+            fail += 1
+            print(f"[WARN] EPI CAT '{categoria}': não achei '{item}' (DOM pode ser diferente)")
+            continue
+        r = motivos.get(pos, {"ok": True, "motivo": "ja_marcado"})
+        if r.get("ok"):
+            ok += 1
+            print(f"[INFO] EPI CAT '{categoria}': marcou '{item}' ({r.get('motivo', '')})")
+        else:
+            fail += 1
+            print(f"[WARN] EPI CAT '{categoria}': falhou marcar '{item}': {r.get('motivo', '')}")
+
+    # clicado / nao_marcou: houve clique (form sujo); ja_marcado: nada mudou
+    alteradas = sum(1 for r in motivos.values() if r.get("motivo") in ("clicado", "nao_marcou"))
+    return {"total": len(casados), "ok": ok, "fail": fail, "alteradas": alteradas}
+
+
+def _aplicar_epis_item_a_item(driver, epis_categorias: Dict[str, Iterable[str]]) -> Dict[str, int]:
+    """Caminho antigo: até 4 XPaths no documento inteiro por item (fallback do lote)."""
+    total = ok = fail = alteradas = 0
 
     for categoria, itens in (epis_categorias or {}).items():
-        catn = _norm(str(categoria))
         for item in (itens or []):
             total += 1
             itn = _norm(str(item))
@@ -120,11 +242,13 @@ def aplicar_epi_por_categoria(driver, epis_categorias: Dict[str, Iterable[str]],
                         except Exception:
                             pass
 
+                        alteradas += 1
                         if _click(driver, el0):
                             marked = True
                             break
                     else:
                         # às vezes clicar no label/toggle marca
+                        alteradas += 1
                         if _click(driver, el0):
                             marked = True
                             break
@@ -138,15 +262,194 @@ def aplicar_epi_por_categoria(driver, epis_categorias: Dict[str, Iterable[str]],
                 fail += 1
                 print(f"[WARN] EPI CAT '{categoria}': não achei '{item}' (DOM pode ser diferente)")
 
-    time.sleep(0.3)
-    confirmar_etapa(driver, timeout)
-    return {"total": total, "ok": ok, "fail": fail}
+    return {"total": total, "ok": ok, "fail": fail, "alteradas": alteradas}
+
+
+# =============================================================================
+# 3) Associação pelo modal "+" de cada categoria (com catálogo em cache)
+# =============================================================================
+
+# Catálogo em uso (None: sem cache, o modal é lido a cada associação); o main liga com usar_catalogo()
+_CATALOGO: Optional[CatalogoEpi] = None
+
+
+def usar_catalogo(catalogo: Optional[CatalogoEpi]) -> None:
+    global _CATALOGO
+    _CATALOGO = catalogo
+
+
+# Categorias da aba EPI num único script: rótulo, se tem o botão "+" e os EPIs
+# já associados (grid da categoria). Sem nenhum "+", o DOM não é o do modal.
+_JS_CATEGORIAS_EPI = r"""
+const raiz = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+  .singleNodeValue || document;
+const out = [];
+for (const lb of raiz.querySelectorAll('label.control-label')) {
+  const linha = lb.parentElement;
+  const mais = Array.from(linha ? linha.children : []).some((b) => b.tagName === 'BUTTON' && b.textContent.trim() === '+');
+  if (!mais) continue;
+  const bloco = lb.closest('.form-group') || linha.parentElement;
+  const associados = Array.from(bloco.querySelectorAll('app-grid td'))
+    .map((td) => (td.textContent || td.getAttribute('title') || '').replace(/\s+/g, ' ').trim())
+    .filter((t) => t);
+  out.push({categoria: (lb.textContent || '').replace(/\s+/g, ' ').trim(), associados: associados});
+}
+return out;
+"""
+
+
+def _associar_no_modal(driver, rotulo: str, itens: List[str], timeout: float) -> Dict[str, int]:
+    """
+    Abre o modal "+" da categoria uma vez, marca todos os itens num script e
+    confirma uma vez (Cancelar se nada mudou, evitando o popup de EPI vazio).
+    A leitura do modal atualiza o catálogo em cache.
+    """
+    print(f"[INFO] EPI CAT '{rotulo}': associando {len(itens)} item(ns) pelo modal.")
+    wait_and_click(driver, xpath_epi_categoria(rotulo) + "/preceding-sibling::button[normalize-space()='+']",
+                   timeout, f"'+' de {rotulo}")
+    WebDriverWait(driver, timeout).until(EC.visibility_of_element_located((By.XPATH, XPATH_EPI_MODAL_CONTENT)))
+
+    catalogo = _CATALOGO
+    res = _aplicar_epis_em_lote(
+        driver,
+        {rotulo: itens},
+        raiz=XPATH_EPI_MODAL_CONTENT,
+        ao_indexar=(lambda textos: catalogo.atualizar(rotulo, textos)) if catalogo is not None else None,
+    )
+    if res is None:
+        print(f"[WARN] EPI CAT '{rotulo}': não consegui ler o modal de associação.")
+        res = {"total": len(itens), "ok": 0, "fail": len(itens), "alteradas": 0}
+
+    botao = XPATH_EPI_BTN_CONFIRMAR if res["alteradas"] else XPATH_EPI_BTN_CANCELAR
+    wait_and_click(driver, botao, timeout, "Confirmar da associação" if res["alteradas"] else "Cancelar da associação")
+    WebDriverWait(driver, timeout).until(EC.invisibility_of_element_located((By.XPATH, XPATH_EPI_MODAL_CONTENT)))
+    ensure_no_messagebox(driver, 1.0)
+    aguardar_app_estavel(driver)
+    return res
+
+
+def associar_epis_por_categoria(driver, epis_categorias: Dict[str, Iterable[str]], timeout: float) -> Optional[Dict[str, int]]:
+    """
+    Fluxo do APLAT real: os checkboxes só existem no modal aberto pelo "+".
+    - um script lê as categorias e os EPIs já associados: item associado não abre modal
+    - com o catálogo em cache válido, item de outra categoria é roteado para ela;
+      item fora do catálogo abre o modal da categoria (que relê o catálogo) e só
+      falha sem modal se a categoria já foi relida nesta execução
+    - um modal por categoria com pendências (não um por item)
+    Retorna None se a aba não tem categorias com "+" (o chamador usa o índice da aba).
+    """
+    try:
+        blocos = driver.execute_script(_JS_CATEGORIAS_EPI, _XPATH_RAIZ_EPI)
+    except Exception as e:
+        print(f"[DEBUG][EPI CAT] Leitura das categorias falhou: {e}")
+        return None
+    if not blocos:
+        return None
+
+    por_cat = {_norm(b.get("categoria") or ""): b for b in blocos}
+    catalogo = _CATALOGO
+    catalogo_completo = catalogo is not None and all(catalogo.valida(c) for c in por_cat)
+
+    total = ok = fail = alteradas = 0
+    pendentes: Dict[str, List[str]] = {}
+    for categoria, itens in (epis_categorias or {}).items():
+        catn = _norm(str(categoria))
+        for item in (itens or []):
+            total += 1
+            itn = _norm(str(item))
+            destino = catn
+            if catalogo is not None and catalogo.valida(catn) and _casar_epi(itn, catalogo.codigos(catn)) is None:
+                outra = catalogo.categoria_de(itn)
+                if outra is None and catalogo_completo:
+                    if catalogo.relida(catn):
+                        fail += 1
+                        print(f"[WARN] EPI CAT '{categoria}': '{item}' não existe no catálogo de EPIs.")
+                        continue
+                    # EPI novo no APLAT? o modal da categoria relê o catálogo antes de desistir
+                    print(f"[INFO] EPI CAT '{categoria}': '{item}' fora do catálogo em cache; relendo pelo modal.")
+                if outra is not None and outra != catn:
+                    print(f"[INFO] EPI CAT '{categoria}': '{item}' pertence a "
+                          f"'{(por_cat.get(outra) or {}).get('categoria') or outra}' no catálogo.")
+                    destino = outra
+
+            bloco = por_cat.get(destino)
+            if bloco is None:
+                fail += 1
+                print(f"[WARN] EPI CAT '{categoria}': categoria não encontrada na aba para '{item}'.")
+                continue
+            if _casar_epi(itn, [_norm(t) for t in bloco.get("associados") or []]) is not None:
+                ok += 1
+                print(f"[INFO] EPI CAT '{categoria}': '{item}' já associado.")
+                continue
+            pendentes.setdefault(destino, []).append(str(item))
+
+    for destino, itens in pendentes.items():
+        rotulo = por_cat[destino].get("categoria") or destino
+        try:
+            r = _associar_no_modal(driver, rotulo, itens, timeout)
+        except Exception as e:
+            print(f"[WARN] EPI CAT '{rotulo}': associação pelo modal falhou: {e}")
+            r = {"ok": 0, "fail": len(itens), "alteradas": 0}
+        ok += r["ok"]
+        fail += r["fail"]
+        alteradas += r["alteradas"]
+
+    return {"total": total, "ok": ok, "fail": fail, "alteradas": alteradas}
+
+
+@rastreado()
+def aplicar_epi_por_categoria(
+    driver,
+    epis_categorias: Dict[str, Iterable[str]],
+    timeout: float,
+    em_lote: bool = True,
+    diff: bool = False,
+):
+    """
+    Best-effort: marca itens de EPIs por categoria.
+    Como o DOM real pode variar, a estratégia é:
+      - entrar na aba EPI
+      - em_lote: com os botões "+" das categorias, associar pelo modal (um por
+        categoria com pendências); sem eles, indexar todos os checkboxes da aba num
+        script, casar cada item no Python (exato, prefixo, contém) e marcar os
+        casados num segundo script
+      - sem lote (ou se o índice falhar): para cada item, tentar achar
+        checkbox/toggle próximo de um label com o texto do item
+    Não tenta desmarcar nada.
+    diff: se nenhum item precisou de clique (todos já marcados), não confirma a aba.
+    """
+    print("[STEP] EPI por categoria...")
+    goto_tab(driver, "EPI", timeout)
+    ensure_no_messagebox(driver, 2)
+
+    # garante que a aba EPI carregou algo (não rígido)
+    try:
+        WebDriverWait(driver, min(timeout, 10.0)).until(
+            EC.presence_of_element_located((By.XPATH, "//*[self::app-epi or @id='EPI' or .//input[@type='checkbox'] or .//label]"))
+        )
+    except Exception:
+        pass
+
+    res = None
+    if em_lote:
+        res = associar_epis_por_categoria(driver, epis_categorias, timeout)
+        if res is None:
+            res = _aplicar_epis_em_lote(driver, epis_categorias)
+    if res is None:
+        res = _aplicar_epis_item_a_item(driver, epis_categorias)
+
+    if diff and not res["alteradas"]:
+        print("[INFO] EPI CAT: itens já marcados; Confirmar dispensado.")
+    else:
+        aguardar_app_estavel(driver)
+        confirmar_etapa(driver, timeout)
+    return res
 
 
-def processar_aba_epi(driver, epis_cat: Dict[str, Iterable[str]], timeout: float):
+def processar_aba_epi(driver, epis_cat: Dict[str, Iterable[str]], timeout: float, diff: bool = False):
     """Wrapper público esperado: processa EPIs por categoria e retorna resumo."""
     try:
-        return aplicar_epi_por_categoria(driver, epis_cat, timeout)
+        return aplicar_epi_por_categoria(driver, epis_cat, timeout, diff=diff)
     except Exception as e:
         print(f"[WARN] Erro ao processar aba EPI: {e}")
         return None
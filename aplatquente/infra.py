@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import os
+import re
+import shutil
 import time
-from typing import Optional, TypeAlias
+from typing import Iterator, Optional, TypeAlias
+from urllib.parse import urlsplit
 
 from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.edge.webdriver import WebDriver as EdgeDriver
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
 
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
@@ -24,10 +31,11 @@ from selenium.common.exceptions import (
     WebDriverException,
 )
 
-Driver: TypeAlias = EdgeDriver
+Driver: TypeAlias = RemoteWebDriver
 
 from aplatquente.config.xpaths import (
     MAIN_SCREEN_INDICATORS,
+    SEARCH_RESULT_ROWS_XPATHS,
     SEARCH_RESULT_XPATHS,
     XPATH_BTN_CONFIRMAR,
     XPATH_BTN_EXIBIR_OPCOES,
@@ -36,12 +44,15 @@ from aplatquente.config.xpaths import (
     XPATH_BTN_PESQUISAR,
     XPATH_CAMPO_DATA,
     XPATH_CAMPO_NUMERO,
+    XPATH_SELECT_TIPO_PT,
+    xpaths_resultado_por_numero,
 )
+from aplatquente.rastreio import rastreado
 
 
 
 # =============================================================================
-# Configurações do Edge
+# Configurações do navegador
 # =============================================================================
 
 EDGE_OPTIONS = [
@@ -49,8 +60,284 @@ EDGE_OPTIONS = [
     "--disable-gpu",
     "--disable-dev-shm-usage",
     "--no-sandbox",
+    # abas em segundo plano (--abas) seguem com timers/XHR do Angular sem freio
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
 ]
 
+# Tamanho fixo da janela em headless (o layout que os XPaths esperam não pode variar)
+JANELA_HEADLESS = (1920, 1080)
+
+# =============================================================================
+# Espera de estabilidade do Angular (substitui os sleeps fixos)
+# =============================================================================
+
+# Tempo máximo esperando a aplicação "acalmar" (s); teto de qualquer chamada
+APP_ESTAVEL_TIMEOUT = 5.0
+
+# Esperas seguidas que estouram o prazo até concluir que a página nunca fica
+# estável (timer/interval recorrente, relógio ou spinner animado no DOM); daí em
+# diante o driver não espera mais e faz só a pausa curta dos sleeps antigos (s)
+APP_ESTAVEL_FALHAS_MAX = 2
+APP_ESTAVEL_PAUSA_SEM_ESPERA_S = 0.3
+
+# Sem Testability exposta: DOM sem mutações por este intervalo conta como estável (ms)
+APP_ESTAVEL_QUIETO_MS = 150
+
+# Várias abas no mesmo navegador (abas.py): uma espera dentro do navegador prende
+# a sessão WebDriver inteira. Nesse modo as esperas viram fatias curtas no
+# navegador com pausas no Python, e nas pausas as outras abas usam o driver.
+ESPERA_FATIA_MS = APP_ESTAVEL_QUIETO_MS + 100
+ESPERA_PAUSA_S = 0.1
+
+
+def _em_abas(driver: Driver) -> bool:
+    return getattr(driver, "_aplat_abas", None) is not None
+
+# Resolve quando todas as Testabilities do Angular ficam estáveis (zona sem
+# tarefas pendentes: XHR, timers, animações). Se a página não expõe
+# getAllAngularTestabilities, espera o DOM ficar sem mutações por quietoMs.
+# Nunca estoura: ao atingir o limite devolve {ok:false}.
+_JS_APP_ESTAVEL = r"""
+const done = arguments[arguments.length - 1];
+const limiteMs = arguments[0];
+const quietoMs = arguments[1];
+let terminou = false;
+const fim = (ok, modo) => { if (!terminou) { terminou = true; done({ok, modo}); } };
+setTimeout(() => fim(false, 'timeout'), limiteMs);
+
+const tests = (typeof window.getAllAngularTestabilities === 'function')
+  ? window.getAllAngularTestabilities() : [];
+if (tests && tests.length) {
+  let pendentes = tests.length;
+  for (const t of tests) {
+    try {
+      t.whenStable(() => { if (--pendentes === 0) fim(true, 'angular'); });
+    } catch (e) {
+      if (--pendentes === 0) fim(true, 'angular');
+    }
+  }
+  return;
+}
+
+let timer = setTimeout(() => { obs.disconnect(); fim(true, 'dom'); }, quietoMs);
+const obs = new MutationObserver(() => {
+  clearTimeout(timer);
+  timer = setTimeout(() => { obs.disconnect(); fim(true, 'dom'); }, quietoMs);
+});
+obs.observe(document.body, {childList: true, subtree: true, attributes: true, characterData: true});
+"""
+
+
+def aguardar_app_estavel(driver: Driver, timeout: float = APP_ESTAVEL_TIMEOUT) -> bool:
+    """
+    Aguarda a aplicação ficar ociosa (Angular whenStable, ou DOM quieto) e
+    retorna assim que isso acontece. Um único round trip; nunca levanta:
+    False = não estabilizou no prazo (o chamador segue como antes).
+    O prazo nunca passa de APP_ESTAVEL_TIMEOUT; depois de APP_ESTAVEL_FALHAS_MAX
+    estouros seguidos o driver fica marcado como "nunca estável" e as chamadas
+    seguintes só fazem uma pausa curta.
+    """
+    if getattr(driver, "_aplat_nunca_estavel", False):
+        time.sleep(APP_ESTAVEL_PAUSA_SEM_ESPERA_S)
+        return False
+    limite_ms = int(max(min(timeout, APP_ESTAVEL_TIMEOUT), 0.05) * 1000)
+    fim = time.monotonic() + limite_ms / 1000.0
+    try:
+        # o próprio script respeita o limite; o timeout do driver é só uma folga
+        # (ajustado só quando precisa aumentar: cada ajuste é um round trip)
+        folga = max(timeout + 5.0, 30.0)
+        if getattr(driver, "_aplat_script_timeout", 0.0) < folga:
+            driver.set_script_timeout(folga)
+            driver._aplat_script_timeout = folga
+        while True:
+            restante_ms = int((fim - time.monotonic()) * 1000)
+            fatia_ms = min(ESPERA_FATIA_MS, max(restante_ms, 50)) if _em_abas(driver) else limite_ms
+            res = driver.execute_async_script(_JS_APP_ESTAVEL, fatia_ms, APP_ESTAVEL_QUIETO_MS)
+            if (isinstance(res, dict) and res.get("ok")) or fatia_ms >= restante_ms:
+                break
+            time.sleep(ESPERA_PAUSA_S)
+    except WebDriverException:
+        return False
+    if not isinstance(res, dict):
+        return False
+    if res.get("ok"):
+        driver._aplat_estavel_falhas = 0
+        return True
+    # só a espera com o prazo cheio conta (1s curto estourando é só um XHR lento)
+    if res.get("modo") == "timeout" and limite_ms >= int(APP_ESTAVEL_TIMEOUT * 1000):
+        falhas = getattr(driver, "_aplat_estavel_falhas", 0) + 1
+        driver._aplat_estavel_falhas = falhas
+        if falhas >= APP_ESTAVEL_FALHAS_MAX:
+            driver._aplat_nunca_estavel = True
+            print(f"[WARN] Aplicação não estabilizou em {falhas} esperas seguidas; seguindo sem esperar por ela.")
+    return False
+
+
+# =============================================================================
+# Rastreador de rede (XHR/fetch) para saber quando a gravação terminou
+# =============================================================================
+
+# Sem nenhuma requisição de gravação em tanto tempo após o clique, assume que
+# não houve save (validação do front, nada a gravar) e segue pelo caminho antigo (ms)
+REDE_GRACE_SAVE_MS = 1500
+
+# Gravações que não são o save da tela (telemetria, log do front): nem contam
+# como save nem derrubam o Confirmar quando falham (regex, sem distinção de caixa)
+REDE_URLS_IGNORADAS = r"telemetr|analytic|beacon|/collect|/log(ging)?\b|applicationinsights|/track"
+
+# Instala (se a página ainda não tem) o wrapper de XMLHttpRequest/fetch em
+# window.__aplatRede e devolve {instalado, inflight, seq}. seq = id da última
+# requisição de gravação (POST/PUT/PATCH/DELETE) iniciada.
+_JS_REDE_TRACKER = r"""
+let w = window.__aplatRede;
+let instalado = false;
+if (!w) {
+  w = window.__aplatRede = {inflight: 0, seq: 0, saves: []};
+  const GRAVA = ['POST', 'PUT', 'PATCH', 'DELETE'];
+  const iniciar = (metodo, url) => {
+    w.inflight++;
+    const reg = {metodo: metodo, url: String(url || '').slice(0, 200), status: null, seq: 0};
+    if (GRAVA.includes(metodo)) {
+      reg.seq = ++w.seq;
+      w.saves.push(reg);
+      if (w.saves.length > 50) w.saves.shift();
+    }
+    return reg;
+  };
+  const finalizar = (reg, status) => {
+    if (reg.status !== null) return;
+    reg.status = status;
+    w.inflight = Math.max(0, w.inflight - 1);
+  };
+
+  const open = XMLHttpRequest.prototype.open;
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.open = function (metodo, url) {
+    this.__aplatReq = {metodo: String(metodo || 'GET').toUpperCase(), url: url};
+    return open.apply(this, arguments);
+  };
+  XMLHttpRequest.prototype.send = function () {
+    const info = this.__aplatReq || {metodo: 'GET', url: ''};
+    const reg = iniciar(info.metodo, info.url);
+    this.addEventListener('loadend', () => finalizar(reg, this.status));
+    try {
+      return send.apply(this, arguments);
+    } catch (e) {
+      finalizar(reg, 0);
+      throw e;
+    }
+  };
+
+  if (typeof window.fetch === 'function') {
+    const f = window.fetch;
+    window.fetch = function (input, init) {
+      const metodo = String((init && init.method) || (input && input.method) || 'GET').toUpperCase();
+      const url = typeof input === 'string' ? input : ((input && input.url) || '');
+      const reg = iniciar(metodo, url);
+      return f.apply(this, arguments).then(
+        (r) => { finalizar(reg, r.status); return r; },
+        (e) => { finalizar(reg, 0); throw e; });
+    };
+  }
+  instalado = true;
+}
+return {instalado, inflight: w.inflight, seq: w.seq};
+"""
+
+# Aguarda (no navegador, sem round trips) as gravações iniciadas depois de
+# `desde` terminarem. Só as gravações contam: GETs em voo (polling, lookups
+# lentos) não seguram o Confirmar, e URLs de REDE_URLS_IGNORADAS ficam de fora.
+# Devolve {estado: 'ok'|'falha'|'sem_save'|'timeout'|'sem_rastreador', saves: [...]}.
+_JS_AGUARDAR_SAVE = r"""
+const done = arguments[arguments.length - 1];
+const desde = arguments[0];
+const limiteMs = arguments[1];
+const graceMs = arguments[2];
+const ignorar = new RegExp(arguments[3], 'i');
+const w = window.__aplatRede;
+if (!w) { done({estado: 'sem_rastreador', saves: []}); return; }
+const t0 = Date.now();
+const tick = () => {
+  const novos = w.saves.filter(r => r.seq > desde && !ignorar.test(r.url));
+  const dt = Date.now() - t0;
+  if (novos.length && novos.every(r => r.status !== null)) {
+    const ok = novos.every(r => r.status >= 200 && r.status < 400);
+    done({estado: ok ? 'ok' : 'falha', saves: novos});
+    return;
+  }
+  if (!novos.length && dt >= graceMs) { done({estado: 'sem_save', saves: []}); return; }
+  if (dt >= limiteMs) { done({estado: 'timeout', saves: novos}); return; }
+  setTimeout(tick, 25);
+};
+tick();
+"""
+
+
+def instalar_rastreador_rede(driver: Driver) -> Optional[int]:
+    """
+    Instala (idempotente; reinstala se a página recarregou) o rastreador de
+    XHR/fetch. Retorna o seq da última gravação, ou None se o script falhar.
+    """
+    try:
+        estado = driver.execute_script(_JS_REDE_TRACKER)
+    except WebDriverException:
+        return None
+    if not isinstance(estado, dict):
+        return None
+    if estado.get("instalado"):
+        print("[DEBUG] Rastreador de rede instalado.")
+    return int(estado.get("seq") or 0)
+
+
+def aguardar_gravacao(driver: Driver, desde: Optional[int], timeout: float, rotulo: str = "Confirmar") -> Optional[bool]:
+    """
+    Espera a resposta do backend às gravações disparadas após `desde`.
+    True: gravou (2xx/3xx). None: nenhuma gravação observada (ou sem rastreador),
+    o chamador segue com as heurísticas antigas. Falha HTTP levanta RuntimeError.
+    """
+    if desde is None:
+        return None
+
+    limite_ms = int(max(timeout, 0.1) * 1000)
+    inicio = time.monotonic()
+    try:
+        folga = max(timeout + 5.0, 30.0)
+        if getattr(driver, "_aplat_script_timeout", 0.0) < folga:
+            driver.set_script_timeout(folga)
+            driver._aplat_script_timeout = folga
+        while True:
+            decorrido_ms = int((time.monotonic() - inicio) * 1000)
+            if not _em_abas(driver):
+                fatia_ms, grace_ms = limite_ms, REDE_GRACE_SAVE_MS
+            else:
+                # o script conta o tempo a partir de cada chamada: limite e carência descontam as fatias já feitas
+                fatia_ms = min(ESPERA_FATIA_MS, max(limite_ms - decorrido_ms, 0))
+                grace_ms = max(REDE_GRACE_SAVE_MS - decorrido_ms, 0)
+            res = driver.execute_async_script(_JS_AGUARDAR_SAVE, desde, fatia_ms, grace_ms, REDE_URLS_IGNORADAS)
+            if not (isinstance(res, dict) and res.get("estado") == "timeout") or decorrido_ms + fatia_ms >= limite_ms:
+                break
+            time.sleep(ESPERA_PAUSA_S)
+    except WebDriverException:
+        return None
+    if not isinstance(res, dict):
+        return None
+
+    estado = res.get("estado")
+    saves = res.get("saves") or []
+    if estado == "ok":
+        print(f"[DEBUG] {rotulo}: gravação concluída ({len(saves)} requisição(ões)).")
+        return True
+    if estado == "falha":
+        ruins = [f"{r.get('metodo')} {r.get('url')} -> HTTP {r.get('status')}" for r in saves
+                 if not (200 <= int(r.get("status") or 0) < 400)]
+        raise RuntimeError(f"{rotulo}: gravação falhou no servidor: " + "; ".join(ruins))
+    if estado == "timeout":
+        print(f"[WARN] {rotulo}: gravação sem resposta em {timeout:.0f}s.")
+    return None
+
+
 # =============================================================================
 # Clique robusto (estilo legado), mas dentro do infra.py
 # =============================================================================
@@ -74,11 +361,11 @@ def click_like_legacy(
         try:
             if scroll:
                 try:
+                    # scroll instantâneo é síncrono: não precisa esperar depois
                     driver.execute_script(
-                        "arguments[0].scrollIntoView({block:'center', inline:'nearest'});",
+                        "arguments[0].scrollIntoView({block:'center', inline:'nearest', behavior:'instant'});",
                         element,
                     )
-                    time.sleep(0.05)
                 except Exception:
                     pass
 
@@ -141,21 +428,25 @@ TAB_XPATHS: dict[str, list[str]] = {
 # Marcas (heurísticas) para confirmar que a aba carregou (fallbacks genéricos)
 TAB_READY_XPATHS: dict[str, list[str]] = {
     "Questionário PT": [
+        "//app-questionario-etapa",
         "//app-questionario-pt",
         "//app-questionario",
         "//div[contains(@id,'QUESTION') or contains(@id,'question')]",
     ],
     "Análise Ambiental": [
+        "//app-analise-ambiental-da-etapa",
         "//app-analise-ambiental",
         "//app-analiseambiental",
         "//div[contains(@id,'ANALISE') or contains(@id,'analise')]",
     ],
     "EPI": [
+        "//app-epi-da-etapa",
         "//app-epi",
         "//div[@id='EPI']",
         "//label[contains(.,'EPI') or contains(.,'Epi')]",
     ],
     "APN-1": [
+        "//app-apn1-da-etapa",
         "//app-apn1",
         "//div[@id='APN1']",
         "//input[@type='radio']",
@@ -173,11 +464,101 @@ XPATH_BTN_FECHAR_FALLBACKS = [
 ]
 
 
+# =============================================================================
+# Observador de messagebox (MutationObserver instalado uma vez por carga de página)
+# =============================================================================
+
+# True: o observador clica "Ok" assim que a messagebox aparece.
+# False: só registra; ensure_no_messagebox fecha pelo caminho legado.
+MSGBOX_AUTO_DISMISS = True
+
+# Instala (se ainda não existir em window) e devolve o estado, zerando os contadores.
+_JS_MSGBOX_WATCHER = r"""
+const autoDismiss = !!arguments[0];
+const isOk = (b) => /^ok$/i.test((b.textContent || '').replace(/\s+/g, ' ').trim());
+const visivel = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const botoesOk = () => {
+  const out = [];
+  for (const box of document.querySelectorAll('app-messagebox')) {
+    for (const b of box.querySelectorAll('button')) if (isOk(b) && visivel(b)) out.push([box, b]);
+  }
+  for (const b of document.querySelectorAll('button')) {
+    if (!b.closest('app-messagebox') && isOk(b) && visivel(b)) out.push([b.closest('.modal-content') || b, b]);
+  }
+  return out;
+};
+
+let w = window.__aplatMsgbox;
+let instalado = false;
+if (!w) {
+  w = window.__aplatMsgbox = {dismissed: 0, textos: [], autoDismiss, agendado: false};
+  const scan = () => {
+    w.agendado = false;
+    if (!w.autoDismiss) return;
+    for (const [box, b] of botoesOk()) {
+      w.textos.push((box.innerText || '').replace(/\s+/g, ' ').trim().slice(0, 300));
+      b.click();
+      w.dismissed++;
+    }
+  };
+  w.scan = scan;
+  new MutationObserver(() => {
+    if (!w.agendado) { w.agendado = true; setTimeout(scan, 0); }
+  }).observe(document.body, {childList: true, subtree: true});
+  instalado = true;
+}
+w.autoDismiss = autoDismiss;
+w.scan();
+
+// com auto-dismiss o clique já foi feito acima; o Angular remove a caixa de forma assíncrona
+const pendente = !w.autoDismiss && botoesOk().length > 0;
+const out = {instalado, dismissed: w.dismissed, textos: w.textos.splice(0), pendente};
+w.dismissed = 0;
+return out;
+"""
+
+
+def _estado_observador_messagebox(driver: Driver, auto_dismiss: Optional[bool] = None) -> Optional[dict]:
+    """
+    Consulta (e instala, se a página recarregou) o observador de messagebox.
+    Um único execute_script. Retorna None se o script falhar.
+    """
+    if auto_dismiss is None:
+        auto_dismiss = MSGBOX_AUTO_DISMISS
+    try:
+        estado = driver.execute_script(_JS_MSGBOX_WATCHER, auto_dismiss)
+    except Exception:
+        return None
+    if not isinstance(estado, dict):
+        return None
+
+    if estado.get("instalado"):
+        print("[DEBUG] Observador de messagebox instalado.")
+    for txt in estado.get("textos") or []:
+        print(f"[INFO] Messagebox fechada automaticamente: {txt[:180]}")
+    return estado
+
+
+def instalar_observador_messagebox(driver: Driver, auto_dismiss: Optional[bool] = None) -> bool:
+    """
+    Instala o MutationObserver que detecta app-messagebox/diálogos "Ok".
+    Chamar após o carregamento da página (login); reinstala sozinho se a página recarregar.
+    """
+    return _estado_observador_messagebox(driver, auto_dismiss) is not None
+
+
 def ensure_no_messagebox(driver: Driver, timeout: float = 2.0) -> bool:
     """
     Fecha messagebox/alerta (ex.: botão OK) se aparecer.
     Retorna True se encontrou e fechou algo.
+
+    Com o observador ativo a checagem é imediata (uma consulta ao estado);
+    o polling por XPath só roda se houver messagebox pendente ou o script falhar.
     """
+    estado = _estado_observador_messagebox(driver)
+    if estado is not None and not estado.get("pendente"):
+        return bool(estado.get("dismissed"))
+
     # você já tem XPATH_BTN_OK no seu config/xpaths.py; mantemos fallback
     candidatos = []
     try:
@@ -211,13 +592,12 @@ def ensure_no_messagebox(driver: Driver, timeout: float = 2.0) -> bool:
                         except Exception:
                             continue
                     closed = True
-                    time.sleep(0.25)
                     break
             except Exception:
                 continue
         if closed:
-            # tenta limpar encadeamento de popups
-            time.sleep(0.25)
+            # espera a caixa sair (e eventual popup encadeado aparecer)
+            aguardar_app_estavel(driver, 1.0)
             break
 
         time.sleep(0.15)
@@ -273,6 +653,7 @@ def wait_tab_loaded(driver: Driver, tab_name: str, timeout: float) -> None:
     ensure_no_messagebox(driver, 1.5)
 
 
+@rastreado(arg="tab_name")
 def goto_tab(driver: Driver, tab_name: str, timeout: float = 15.0) -> None:
     """
     Clica em uma aba e aguarda ela ficar ativa + carregar.
@@ -304,7 +685,7 @@ def goto_tab(driver: Driver, tab_name: str, timeout: float = 15.0) -> None:
             WebDriverWait(driver, timeout).until(lambda d: _tab_is_active(d, tab_el))
 
             # espera carregar conteúdo
-            time.sleep(0.25)
+            aguardar_app_estavel(driver)
             wait_tab_loaded(driver, tab_name, timeout)
             return
 
@@ -315,6 +696,7 @@ def goto_tab(driver: Driver, tab_name: str, timeout: float = 15.0) -> None:
     raise RuntimeError(f"Não foi possível abrir a aba '{tab_name}'. Erro: {last_err}")
 
 
+@rastreado()
 def confirmar_etapa(driver: Driver, timeout: float = 20.0) -> None:
     """
     Clica no botão Confirmar (rodapé fixo), aguarda estabilizar e fecha messagebox se aparecer.
@@ -343,77 +725,197 @@ def confirmar_etapa(driver: Driver, timeout: float = 20.0) -> None:
     if not btn:
         raise RuntimeError(f"Botão Confirmar não encontrado/clicável. Último erro: {last_err}")
 
+    desde = instalar_rastreador_rede(driver)
+
     # clique robusto
     ok = click_like_legacy(driver, btn, max_attempts=3, scroll=True, label="CONFIRMAR")
     if not ok:
         raise RuntimeError("Falha ao clicar Confirmar.")
 
-    # aguarda “acalmar” (Angular geralmente salva e reabilita UI)
-    time.sleep(0.4)
+    # espera a resposta da gravação; falha HTTP levanta aqui
+    gravou = aguardar_gravacao(driver, desde, timeout, "Confirmar")
+
+    # aguarda “acalmar” (Angular processa a resposta e reabilita UI)
+    aguardar_app_estavel(driver)
     ensure_no_messagebox(driver, 3.0)
 
-    # heurística: aguarda o próprio botão ficar clicável de novo (salvou/voltou)
-    try:
-        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, XPATH_BTN_CONFIRMAR_FALLBACKS[0])))
-    except Exception:
-        # não é fatal; em alguns layouts o XPath muda
-        pass
+    # sem gravação observada: heurística antiga, aguarda o botão ficar clicável de novo
+    if not gravou:
+        try:
+            WebDriverWait(driver, timeout).until(EC.element_to_be_clickable((By.XPATH, XPATH_BTN_CONFIRMAR_FALLBACKS[0])))
+        except Exception:
+            # não é fatal; em alguns layouts o XPath muda
+            pass
 
-    time.sleep(0.2)
+    aguardar_app_estavel(driver)
 
 
 # =============================================================================
 # Driver
 # =============================================================================
 
-def create_edge_driver() -> Driver:
+# Driver por navegador: (executável do driver, classe Options, classe Service, fábrica)
+_BROWSERS = {
+    "edge": ("msedgedriver", EdgeOptions, EdgeService, webdriver.Edge),
+    "chrome": ("chromedriver", ChromeOptions, ChromeService, webdriver.Chrome),
+    "firefox": ("geckodriver", FirefoxOptions, FirefoxService, webdriver.Firefox),
+}
+
+BROWSERS_SUPORTADOS = tuple(_BROWSERS.keys())
+
+
+def _driver_paths(nome: str) -> list[str]:
     """
-    Cria e retorna uma instância do WebDriver do Edge com opções configuradas.
-    Procura o executável do msedgedriver em locais conhecidos.
+    Locais onde procurar o executável do driver (portável Windows/Linux/macOS):
+    pasta do projeto, cwd e PATH. Se nada existir, o Selenium Manager resolve.
     """
-    options = EdgeOptions()
-    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    exe = f"{nome}.exe" if os.name == "nt" else nome
+    base_dir = os.path.abspath(os.path.dirname(__file__))  # onde está este infra.py
 
-    for arg in EDGE_OPTIONS:
-        options.add_argument(arg)
+    paths = [
+        os.path.join(base_dir, exe),     # recomendado (na pasta do projeto)
+        os.path.join(os.getcwd(), exe),  # caso rode com outro cwd
+    ]
+    no_path = shutil.which(exe)
+    if no_path:
+        paths.append(no_path)
+    return paths
 
-    # Diretório do projeto (onde está este infra.py)
-    base_dir = os.path.abspath(os.path.dirname(__file__))
 
-    driver_paths = [
-        os.path.join(base_dir, "msedgedriver.exe"),     # recomendado (na pasta do projeto)
-        os.path.join(os.getcwd(), "msedgedriver.exe"),  # caso rode com outro cwd
-        "msedgedriver.exe",                             # fallback: PATH
-    ]
+def create_driver(
+    browser: str = "edge",
+    headless: bool = False,
+    debugger_address: Optional[str] = None,
+) -> Driver:
+    """
+    Cria e retorna uma instância do WebDriver (edge, chrome ou firefox) com opções configuradas.
+    Procura o executável do driver em locais conhecidos.
+
+    headless: sem janela, com tamanho fixo (JANELA_HEADLESS) para o layout dos XPaths não mudar.
+    debugger_address ("127.0.0.1:9222"): em vez de abrir um navegador novo, conecta
+    num Edge/Chrome já aberto com --remote-debugging-port (sessão/cache já quentes).
+    Use encerrar_driver() no fim: ele não fecha o navegador compartilhado.
+    """
+    browser = (browser or "edge").strip().lower()
+    if browser not in _BROWSERS:
+        raise ValueError(f"Navegador não suportado: {browser} (use {', '.join(BROWSERS_SUPORTADOS)})")
+    if debugger_address and browser == "firefox":
+        raise ValueError("Conexão em navegador já aberto (debugger_address) só é suportada em Edge/Chrome.")
+
+    driver_name, options_cls, service_cls, factory = _BROWSERS[browser]
+    options = options_cls()
+
+    if debugger_address:
+        # anexando: flags de linha de comando/excludeSwitches não se aplicam
+        options.debugger_address = debugger_address
+    elif browser == "firefox":
+        if headless:
+            options.add_argument("-headless")
+    else:
+        options.add_experimental_option("excludeSwitches", ["enable-logging"])
+        for arg in EDGE_OPTIONS:
+            if headless and arg == "--start-maximized":
+                continue
+            options.add_argument(arg)
+        if headless:
+            options.add_argument("--headless=new")
+            options.add_argument(f"--window-size={JANELA_HEADLESS[0]},{JANELA_HEADLESS[1]}")
 
     last_error: Optional[Exception] = None
 
-    for path in driver_paths:
+    def _preparar(d: Driver) -> Driver:
+        if debugger_address:
+            d._aplat_anexado = True  # type: ignore[attr-defined]
+            print(f"[INFO] Conectado ao navegador em execução ({debugger_address}).")
+            return d
+        try:
+            if headless:
+                d.set_window_size(*JANELA_HEADLESS)
+            else:
+                d.maximize_window()
+        except Exception:
+            pass
+        return d
+
+    for path in _driver_paths(driver_name):
         if os.path.exists(path):
             try:
-                print(f"[INFO] Usando msedgedriver encontrado em: {path}")
-                service = EdgeService(path)
-                d = webdriver.Edge(service=service, options=options)
-                try:
-                    d.maximize_window()
-                except Exception:
-                    pass
-                return d
+                print(f"[INFO] Usando {driver_name} encontrado em: {path}")
+                service = service_cls(path)
+                d = factory(service=service, options=options)
+                return _preparar(d)
             except Exception as e:
                 last_error = e
                 print(f"[WARN] Falha ao iniciar WebDriver com {path}: {e}")
 
-    # Fallback: tentar PATH do sistema
+    # Fallback: Selenium Manager (baixa/localiza o driver compatível)
     try:
-        print("[INFO] Tentando iniciar WebDriver usando PATH do sistema.")
-        d = webdriver.Edge(options=options)
-        try:
-            d.maximize_window()
-        except Exception:
-            pass
-        return d
+        print(f"[INFO] {driver_name} não encontrado localmente; usando Selenium Manager.")
+        d = factory(options=options)
+        return _preparar(d)
     except Exception as e:
-        raise RuntimeError("Não foi possível iniciar o WebDriver Edge.") from (last_error or e)
+        raise RuntimeError(f"Não foi possível iniciar o WebDriver ({browser}).") from (last_error or e)
+
+
+def create_edge_driver(debugger_address: Optional[str] = None, headless: bool = False) -> Driver:
+    """Compatível com as chamadas existentes: create_driver('edge', ...)."""
+    return create_driver("edge", headless=headless, debugger_address=debugger_address)
+
+
+def driver_anexado(driver: Driver) -> bool:
+    """True se o driver foi conectado a um navegador já aberto (debugger_address)."""
+    return bool(getattr(driver, "_aplat_anexado", False))
+
+
+def encerrar_driver(driver: Driver) -> None:
+    """
+    Encerra o driver. Se estiver anexado a um navegador compartilhado, para só o
+    driver (o navegador, a aba do APLAT e o login continuam abertos).
+    """
+    try:
+        if driver_anexado(driver):
+            driver.service.stop()
+            print("[INFO] Desconectado do navegador compartilhado (mantido aberto).")
+        else:
+            driver.quit()
+    except Exception:
+        pass
+
+
+def sessao_viva(driver: Driver) -> bool:
+    """
+    A sessão WebDriver (e a janela corrente) ainda responde? Um round trip barato;
+    False quando o navegador fechou, a sessão expirou (InvalidSessionIdException)
+    ou a aba sumiu.
+    """
+    try:
+        driver.current_window_handle
+        return True
+    except WebDriverException:
+        return False
+
+
+def selecionar_aba_aplat(driver: Driver, url: str) -> bool:
+    """
+    Num navegador anexado, muda o foco para a aba que já está no APLAT
+    (mesmo host da URL). Retorna True se encontrou.
+    """
+    host = urlsplit(url).netloc
+    try:
+        atual = driver.current_window_handle
+        if host and host in (driver.current_url or ""):
+            return True
+        for handle in driver.window_handles:
+            if handle == atual:
+                continue
+            driver.switch_to.window(handle)
+            if host and host in (driver.current_url or ""):
+                print(f"[INFO] Usando aba já aberta do APLAT: {driver.current_url}")
+                return True
+        driver.switch_to.window(atual)
+    except Exception:
+        pass
+    return False
 
 # =============================================================================
 # Funções utilitárias de espera e interação
@@ -495,22 +997,31 @@ def wait_element_stable(
 
     return
 
-def wait_for_single_etapa_card(driver: Driver, timeout: float) -> WebElement:
+def wait_for_single_etapa_card(driver: Driver, timeout: float, numero_etapa: Optional[str] = None) -> WebElement:
     """
     Na tela intermediária, deve existir 1 card (app-etapa-row) visível.
-    Retorna o primeiro visível.
+    Retorna o primeiro visível (com numero_etapa: o primeiro com esse número exato;
+    "18/10/2026" não aceita o card de "18/100/2026").
     """
+    xps = ["//app-etapa-row"]
+    token = None
+    if numero_etapa:
+        lit = xpath_literal(numero_etapa)
+        # elemento com o número exato; senão o card que contém o texto, conferido no Python
+        xps = [f"//app-etapa-row[.//*[normalize-space()={lit}]]", f"//app-etapa-row[contains(normalize-space(.), {lit})]"]
+        token = re.compile(r"(?<![\d/])" + re.escape(numero_etapa) + r"(?![\d/])")
+
     def _pick(d: Driver):
-        cards = d.find_elements(By.XPATH, "//app-etapa-row")
-        visibles: list[WebElement] = []
-        for c in cards:
-            try:
-                if c.is_displayed():
-                    visibles.append(c)
-            except Exception:
-                pass
-        if visibles:
-            return visibles[0]
+        for i, xp in enumerate(xps):
+            for c in d.find_elements(By.XPATH, xp):
+                try:
+                    if not c.is_displayed():
+                        continue
+                    if i > 0 and token is not None and not token.search(c.text or ""):
+                        continue
+                    return c
+                except Exception:
+                    pass
         return False
 
     return WebDriverWait(driver, timeout).until(_pick)
@@ -537,22 +1048,25 @@ def wait_for_etapa_tabs_loaded(driver: Driver, timeout: float) -> None:
 
     WebDriverWait(driver, timeout).until(_ok)
 
+@rastreado()
 def double_click_card_open_details(
     driver: Driver,
     timeout: float,
     max_attempts: int = 3,
+    numero_etapa: Optional[str] = None,
 ) -> None:
     """
     Tela do card único:
     - espera card existir e estabilizar
     - dá double click robusto
     - aguarda abas carregarem
+    numero_etapa: quando há vários cards (pesquisa só por data), escolhe o da etapa.
     """
     last_err: Exception | None = None
 
     for attempt in range(1, max_attempts + 1):
         try:
-            card = wait_for_single_etapa_card(driver, min(timeout, 12.0))
+            card = wait_for_single_etapa_card(driver, min(timeout, 12.0), numero_etapa)
 
             try:
                 driver.execute_script("arguments[0].scrollIntoView({block:'center'});", card)
@@ -580,7 +1094,7 @@ def double_click_card_open_details(
 
         except Exception as e:
             last_err = e
-            time.sleep(0.6)
+            aguardar_app_estavel(driver, 1.0)
 
     raise RuntimeError(
         f"Não foi possível abrir detalhes da etapa (duplo clique no card falhou): {last_err}"
@@ -823,6 +1337,7 @@ def _perform_login(driver: Driver, username: str, password: str, timeout: float)
     return _wait_main_screen(driver, max(8.0, timeout))
 
 
+@rastreado()
 def attempt_auto_login(
     driver: Driver,
     url: str,
@@ -838,6 +1353,11 @@ def attempt_auto_login(
     Você pediu para NÃO complicar com SSO pré-logado: então aqui a prioridade é
     keyring -> tentativas -> fallback manual.
     """
+    # Navegador anexado já na tela do APLAT: não recarrega a página
+    if driver_anexado(driver) and selecionar_aba_aplat(driver, url) and _wait_main_screen(driver, 1.0):
+        print("[LOGIN] Aba do APLAT já logada no navegador anexado. Prosseguindo.")
+        return True
+
     print(f"[INFO] Acessando APLAT: {url}")
     driver.get(url)
 
@@ -914,6 +1434,7 @@ def prompt_manual_login(driver: Driver, timeout: float) -> None:
 # Pesquisa e Navegação por Abas
 # =============================================================================
 
+@rastreado()
 def perform_search(
     driver: Driver,
     data_str: str,
@@ -922,7 +1443,10 @@ def perform_search(
     search_timeout: float,
     detail_wait: float,
 ) -> None:
-    """Executa a busca da etapa no APLAT e abre a etapa até chegar no modal com abas (EPI/APN-1/etc)."""
+    """
+    Executa a busca da etapa no APLAT e abre a etapa até chegar no modal com abas (EPI/APN-1/etc).
+    detail_wait > 0: ao final aguarda a aplicação estabilizar (não é mais um sleep fixo).
+    """
     print(f"[INFO] Pesquisando etapa {numero_etapa} na data {data_str}...")
 
     wait_and_click(driver, XPATH_BTN_EXIBIR_OPCOES, timeout, "botão Exibir Opções")
@@ -960,7 +1484,7 @@ def perform_search(
     double_click_card_open_details(driver, timeout=timeout, max_attempts=3)
 
     if detail_wait and detail_wait > 0:
-        time.sleep(detail_wait)
+        aguardar_app_estavel(driver)
 
 
 def _find_first_result(driver: Driver):
@@ -976,6 +1500,327 @@ def _find_first_result(driver: Driver):
     return False
 
 
+def xpath_literal(texto: str) -> str:
+    """Literal XPath 1.0 seguro para qualquer texto (aspas simples/duplas)."""
+    if "'" not in texto:
+        return f"'{texto}'"
+    if '"' not in texto:
+        return f'"{texto}"'
+    partes = texto.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in partes) + ")"
+
+
+def _find_visible(driver: Driver, xpaths: list[str]):
+    """Primeiro elemento visível/habilitado entre os XPaths (em ordem); False se nenhum."""
+    for xpath in xpaths:
+        for elem in driver.find_elements(By.XPATH, xpath):
+            try:
+                if elem.is_displayed() and elem.is_enabled():
+                    return (elem, xpath)
+            except Exception:
+                continue
+    return False
+
+
+# =============================================================================
+# Varredura do grid de resultados (todas as etapas de uma data)
+# =============================================================================
+
+# Número de etapa no formato do APLAT (ex.: 18/164/2024); casa também datas
+# (03/01/2026), por isso o número vem da coluna "Número" quando o grid tem cabeçalho
+_RE_NUMERO_ETAPA = r"\b\d{1,3}/\d{1,6}/\d{4}\b"
+
+# Extrai a página atual do grid num único script:
+# cabeçalhos, textos das células, número da etapa e tipo de trabalho (se houver coluna/célula).
+# Número: célula da coluna "Número"/"Etapa"; sem ela, descartada a data pesquisada
+# (arguments[2]), o primeiro candidato da linha sem cara de data dd/mm/aaaa; se todos
+# têm cara de data (número como 18/10/2026), o único candidato restante; senão ''.
+_JS_EXTRAIR_GRID = r"""
+const xps = arguments[0];
+const reNumero = new RegExp(arguments[1], 'g');
+const dataBusca = arguments[2] || '';
+const norm = (t) => (t || '').normalize('NFD').replace(/[\u0300-\u036f]/g, '')
+  .replace(/\s+/g, ' ').trim().toUpperCase();
+const visivel = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+
+let linhas = [];
+for (const xp of xps) {
+  const snap = document.evaluate(xp, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < snap.snapshotLength; i++) {
+    const el = snap.snapshotItem(i);
+    if (visivel(el)) linhas.push(el);
+  }
+  if (linhas.length) break;
+}
+
+let colTipo = -1;
+let colNumero = -1;
+if (linhas.length) {
+  const tabela = linhas[0].closest('table');
+  const ths = tabela ? Array.from(tabela.querySelectorAll('thead th')) : [];
+  ths.forEach((th, i) => {
+    const h = norm(th.textContent);
+    if (colTipo < 0 && h.includes('TIPO') && (h.includes('TRABALHO') || h.includes('PT'))) colTipo = i;
+    if (colNumero < 0 && (h.startsWith('NUMERO') || /^N[O\u00BA\u00B0]\.?$/.test(h) || h === 'ETAPA')) colNumero = i;
+  });
+}
+
+const pareceData = (s) => {
+  const p = s.split('/');
+  if (p[0].length !== 2 || p[1].length !== 2) return false;
+  const d = +p[0], m = +p[1];
+  return d >= 1 && d <= 31 && m >= 1 && m <= 12;
+};
+const candidatos = (t) => (t.match(reNumero) || []);
+const numeroDaLinha = (textos) => {
+  if (colNumero >= 0 && colNumero < textos.length) {
+    const c = candidatos(textos[colNumero]);
+    if (c.length) return c[0];
+  }
+  const todos = [].concat(...textos.map(candidatos));
+  const outros = todos.filter(s => s !== dataBusca);
+  const naoData = outros.filter(s => !pareceData(s));
+  if (naoData.length) return naoData[0];
+  const restantes = new Set(outros);
+  if (restantes.size === 1) return outros[0];
+  return new Set(todos).size === 1 ? todos[0] : '';
+};
+
+const out = [];
+for (const tr of linhas) {
+  const cels = Array.from(tr.querySelectorAll('td'));
+  const textos = (cels.length ? cels : [tr]).map(c => (c.textContent || '').replace(/\s+/g, ' ').trim());
+  const todo = textos.join(' | ');
+  let tipo = '';
+  if (colTipo >= 0 && colTipo < textos.length) {
+    tipo = norm(textos[colTipo]);
+  } else {
+    for (const t of textos) {
+      const n = norm(t);
+      if (/TRABALHO A (QUENTE|FRIO)|^(QUENTE|FRIO)$/.test(n)) { tipo = n; break; }
+    }
+  }
+  out.push({numero: numeroDaLinha(textos), tipo: tipo, texto: todo});
+}
+return {linhas: out, assinatura: out.length + ':' + (out.length ? out[0].texto : '')};
+"""
+
+# Clica na próxima página do grid (paginação ngb/bootstrap ou botões de seta).
+# Retorna false quando não há próxima página habilitada.
+_JS_PROXIMA_PAGINA = r"""
+// '»' costuma ser "última página" (ngb-pagination): não entra
+const simbolos = ['›', '>'];
+const palavras = ['PROXIMA', 'PROXIMO', 'NEXT'];
+const norm = (t) => (t || '').normalize('NFD').replace(/[\u0300-\u036f]/g, '')
+  .replace(/\s+/g, ' ').trim().toUpperCase();
+const cands = Array.from(document.querySelectorAll(
+  'ul.pagination li a, ul.pagination li button, app-grid button, app-paginacao button, app-paginacao a'));
+for (const el of cands) {
+  const rotulo = norm(el.getAttribute('aria-label') || el.getAttribute('title') || el.textContent);
+  if (!simbolos.includes(rotulo) && !palavras.some(p => rotulo.startsWith(p))) continue;
+  const li = el.closest('li');
+  if (el.disabled || el.getAttribute('aria-disabled') === 'true' || (li && li.classList.contains('disabled'))) continue;
+  if (!(el.offsetWidth || el.offsetHeight)) continue;
+  el.click();
+  return true;
+}
+return false;
+"""
+
+# Tipo Trabalho selecionado no modal da etapa (texto da option), num script
+_JS_TIPO_TRABALHO = r"""
+const snap = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+const sel = snap.singleNodeValue;
+if (!sel || sel.selectedIndex < 0) return '';
+const opt = sel.options[sel.selectedIndex];
+return (opt ? opt.textContent : '').replace(/\s+/g, ' ').trim();
+"""
+
+# Limite de páginas da varredura (proteção contra paginação que não avança)
+VARREDURA_MAX_PAGINAS = 100
+
+
+def _extrair_pagina_grid(driver: Driver, data_busca: str = "") -> dict:
+    """data_busca: data pesquisada (dd/mm/aaaa), que não é candidata a número de etapa."""
+    return (
+        driver.execute_script(_JS_EXTRAIR_GRID, SEARCH_RESULT_ROWS_XPATHS, _RE_NUMERO_ETAPA, data_busca)
+        or {"linhas": [], "assinatura": ""}
+    )
+
+
+def _ir_para_proxima_pagina(driver: Driver, assinatura: str, timeout: float) -> bool:
+    """Avança o grid uma página; True só se o conteúdo do grid mudou de fato."""
+    if not driver.execute_script(_JS_PROXIMA_PAGINA):
+        return False
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: _extrair_pagina_grid(d).get("assinatura") != assinatura)
+        return True
+    except TimeoutException:
+        return False
+
+
+def e_trabalho_quente(tipo: str) -> bool:
+    """Tipo Trabalho (texto do grid ou do combo) indica Trabalho a Quente?"""
+    return "QUENTE" in tipo.upper()
+
+
+def ler_tipo_trabalho(driver: Driver) -> str:
+    """Texto do Tipo Trabalho selecionado no modal da etapa ('' se não encontrado)."""
+    try:
+        return driver.execute_script(_JS_TIPO_TRABALHO, XPATH_SELECT_TIPO_PT) or ""
+    except WebDriverException:
+        return ""
+
+
+class SessaoPesquisa:
+    """
+    Pesquisa uma data UMA vez (sem número de etapa) e abre cada etapa direto
+    do grid já carregado. Só refaz a pesquisa no servidor quando o grid está
+    "velho" (sumiu da tela ou não tem a etapa); se mesmo assim a etapa não
+    aparecer (ex.: paginação), cai no perform_search por número.
+    """
+
+    def __init__(self, driver: Driver, data_str: str, timeout: float, search_timeout: float):
+        self.driver = driver
+        self.data_str = data_str
+        self.timeout = timeout
+        self.search_timeout = search_timeout
+        self.pesquisas = 0
+        self._carregada = False
+        # tipo de trabalho por número de etapa, visto no grid (varredura ou consulta)
+        self._tipos: dict[str, str] = {}
+
+    @rastreado("pesquisar_data")
+    def _pesquisar_data(self) -> None:
+        driver = self.driver
+        print(f"[INFO] Pesquisando todas as etapas da data {self.data_str}...")
+
+        # painel de filtros pode ter ficado aberto da pesquisa anterior
+        if not _find_visible(driver, [XPATH_CAMPO_DATA]):
+            wait_and_click(driver, XPATH_BTN_EXIBIR_OPCOES, self.timeout, "botão Exibir Opções")
+
+        date_field = WebDriverWait(driver, self.timeout).until(
+            EC.element_to_be_clickable((By.XPATH, XPATH_CAMPO_DATA))
+        )
+        date_field.clear()
+        date_field.send_keys(self.data_str)
+
+        num_field = WebDriverWait(driver, self.timeout).until(
+            EC.element_to_be_clickable((By.XPATH, XPATH_CAMPO_NUMERO))
+        )
+        _clear_and_type(driver, num_field, "")
+
+        wait_and_click(driver, XPATH_BTN_PESQUISAR, self.timeout, "botão Pesquisar")
+
+        try:
+            WebDriverWait(driver, self.search_timeout).until(lambda d: _find_first_result(d))
+        except TimeoutException:
+            raise RuntimeError(f"Nenhuma etapa encontrada na data {self.data_str}.")
+
+        self.pesquisas += 1
+        self._carregada = True
+
+    def _linha_da_etapa(self, numero_etapa: str):
+        return _find_visible(self.driver, xpaths_resultado_por_numero(xpath_literal(numero_etapa)))
+
+    def _procurar_nas_paginas(self, numero_etapa: str):
+        """Avança a paginação do grid até achar a linha da etapa (ou acabar)."""
+        for _ in range(VARREDURA_MAX_PAGINAS):
+            assinatura = _extrair_pagina_grid(self.driver).get("assinatura", "")
+            if not _ir_para_proxima_pagina(self.driver, assinatura, self.timeout):
+                return False
+            achado = self._linha_da_etapa(numero_etapa)
+            if achado:
+                return achado
+        return False
+
+    def varrer(self, apenas_quente: bool = True) -> Iterator[dict]:
+        """
+        Pesquisa a data e percorre todas as páginas do grid, gerando
+        {"numero", "tipo", "texto"} de cada etapa (uma extração por página).
+        Com apenas_quente, descarta linhas cujo tipo é conhecido e não é quente;
+        tipo vazio (grid sem essa coluna) segue adiante e é conferido no modal.
+        """
+        self._pesquisar_data()
+        vistos: set[str] = set()
+        ignoradas = 0
+        sem_numero = 0
+
+        for pagina in range(1, VARREDURA_MAX_PAGINAS + 1):
+            dados = _extrair_pagina_grid(self.driver, self.data_str)
+            linhas = dados.get("linhas") or []
+            print(f"[INFO] Varredura: página {pagina} com {len(linhas)} linha(s).")
+
+            for linha in linhas:
+                numero = linha.get("numero") or ""
+                if not numero:
+                    sem_numero += 1
+                    print(f"[WARN] Varredura: linha sem número de etapa reconhecível, ignorada: {(linha.get('texto') or '')[:160]!r}")
+                    continue
+                if numero in vistos:
+                    continue
+                vistos.add(numero)
+                if linha.get("tipo"):
+                    self._tipos[numero] = linha["tipo"]
+                if apenas_quente and linha.get("tipo") and not e_trabalho_quente(linha["tipo"]):
+                    ignoradas += 1
+                    continue
+                yield linha
+
+            if not _ir_para_proxima_pagina(self.driver, dados.get("assinatura", ""), self.timeout):
+                break
+
+        print(
+            f"[INFO] Varredura concluída: {len(vistos)} etapa(s) no grid, {ignoradas} de outro tipo ignorada(s)"
+            + (f", {sem_numero} linha(s) sem número (ver [WARN] acima)." if sem_numero else ".")
+        )
+
+    @rastreado("tipo_no_grid")
+    def tipo_no_grid(self, numero_etapa: str) -> str:
+        """
+        Tipo Trabalho da etapa lido da linha do grid, antes de abrir o modal
+        (uma extração da página corrente). '' quando o grid não tem essa
+        informação ou a etapa não está na página: aí a conferência é no modal.
+        """
+        if numero_etapa in self._tipos:
+            return self._tipos[numero_etapa]
+        if not self._carregada:
+            self._pesquisar_data()
+        for linha in _extrair_pagina_grid(self.driver, self.data_str).get("linhas") or []:
+            if linha.get("numero") and linha.get("tipo"):
+                self._tipos[linha["numero"]] = linha["tipo"]
+        return self._tipos.get(numero_etapa, "")
+
+    @rastreado("abrir_etapa_do_grid")
+    def abrir_etapa(self, numero_etapa: str, detail_wait: float = 0.3) -> None:
+        """Abre a etapa a partir do grid da data (pesquisando só se necessário)."""
+        achado = self._linha_da_etapa(numero_etapa) if self._carregada else False
+
+        if not achado:
+            # grid ausente/velho: uma nova pesquisa da data inteira
+            self._pesquisar_data()
+            achado = self._linha_da_etapa(numero_etapa) or self._procurar_nas_paginas(numero_etapa)
+
+        if not achado:
+            print(f"[INFO] Etapa {numero_etapa} não está no grid da data; pesquisando por número.")
+            self._carregada = False
+            perform_search(self.driver, self.data_str, numero_etapa, self.timeout, self.search_timeout, detail_wait)
+            return
+
+        row_element, xpath_used = achado
+        if row_element.tag_name.lower() != "app-etapa-row":
+            try:
+                row_element.click()
+            except Exception:
+                self.driver.execute_script("arguments[0].click();", row_element)
+            print(f"[INFO] Resultado da etapa {numero_etapa} aberto do grid (XPath usado: {xpath_used}).")
+
+        double_click_card_open_details(self.driver, timeout=self.timeout, max_attempts=3, numero_etapa=numero_etapa)
+
+        if detail_wait and detail_wait > 0:
+            aguardar_app_estavel(self.driver)
+
+
 
 
 
@@ -985,6 +1830,7 @@ def _find_first_result(driver: Driver):
 # Fechar / Confirmar Etapa
 # =============================================================================
 
+@rastreado()
 def fechar_modal_etapa(driver: Driver, timeout: float) -> None:
     """Fecha o modal de etapa (após confirmar) se aberto."""
     try:
@@ -1000,6 +1846,7 @@ def fechar_modal_etapa(driver: Driver, timeout: float) -> None:
         pass
 
 
+@rastreado()
 def clicar_botao_confirmar_rodape(driver: Driver, timeout: float) -> None:
     """Clica no botão 'Confirmar' no rodapé da etapa com fallback JS e espera básica."""
 
@@ -1023,26 +1870,33 @@ def clicar_botao_confirmar_rodape(driver: Driver, timeout: float) -> None:
     if not btn:
         raise RuntimeError(f"Botão Confirmar não encontrado: {ultimo_erro}")
 
+    desde = instalar_rastreador_rede(driver)
+
     ok = click_like_legacy(driver, btn, max_attempts=3, scroll=True, label="CONFIRMAR_RODAPE")
     if not ok:
         raise RuntimeError("Falha ao clicar no botão Confirmar (rodapé).")
 
-    time.sleep(0.3)
+    # espera a resposta da gravação; falha HTTP levanta aqui
+    gravou = aguardar_gravacao(driver, desde, timeout, "Confirmar (rodapé)")
+
+    aguardar_app_estavel(driver)
     ensure_no_messagebox(driver, 3.0)
 
-    try:
-        WebDriverWait(driver, timeout).until(
-            EC.element_to_be_clickable((By.XPATH, XPATH_BTN_CONFIRMAR_FALLBACKS[0]))
-        )
-    except Exception:
-        pass
+    # com a gravação confirmada pelo rastreador as esperas abaixo são desnecessárias
+    if not gravou:
+        try:
+            WebDriverWait(driver, timeout).until(
+                EC.element_to_be_clickable((By.XPATH, XPATH_BTN_CONFIRMAR_FALLBACKS[0]))
+            )
+        except Exception:
+            pass
 
-    try:
-        ok_btn = WebDriverWait(driver, 3).until(
-            EC.element_to_be_clickable((By.XPATH, XPATH_BTN_OK))
-        )
-        click_like_legacy(driver, ok_btn, max_attempts=2, scroll=True, label="OK_MSGBOX")
-    except Exception:
-        pass
+        try:
+            ok_btn = WebDriverWait(driver, 3).until(
+                EC.element_to_be_clickable((By.XPATH, XPATH_BTN_OK))
+            )
+            click_like_legacy(driver, ok_btn, max_attempts=2, scroll=True, label="OK_MSGBOX")
+        except Exception:
+            pass
 
     print("[INFO] Botão Confirmar acionado e confirmado (se necessário).")
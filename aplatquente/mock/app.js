@@ -0,0 +1,324 @@
+// aplatquente/mock/app.js
+// APLAT simulado: mesma estrutura de DOM que a automação usa (pesquisa, grid,
+// card app-etapa-row, modal com abas, app-messagebox, app-botoes-etapa).
+// Sem framework: um contador de tarefas pendentes faz o papel da Testability
+// do Angular (whenStable), e toda chamada ao servidor é XHR (como no Angular).
+(function () {
+  'use strict';
+
+  const CFG = window.__MOCK || {fixtures: {}, latenciaAbaMs: 150, pagina: 10};
+  const FX = CFG.fixtures;
+  const ABAS = ['Dados da Etapa', 'Equipe', 'Precedências', 'Questionário PT', 'Análise Ambiental', 'EPI', 'APN-1'];
+
+  // ===========================================================================
+  // Testability (getAllAngularTestabilities / whenStable)
+  // ===========================================================================
+  let pendentes = 0;
+  let aguardando = [];
+  const liberar = () => {
+    if (pendentes > 0) return;
+    const cbs = aguardando;
+    aguardando = [];
+    cbs.forEach((cb) => { try { cb(); } catch (e) { /* ignora */ } });
+  };
+  const inicio = () => { pendentes++; };
+  const fim = () => { pendentes = Math.max(0, pendentes - 1); setTimeout(liberar, 0); };
+  window.getAllAngularTestabilities = () => [{
+    isStable: () => pendentes === 0,
+    whenStable: (cb) => { aguardando.push(cb); setTimeout(liberar, 0); },
+  }];
+
+  const tarefa = (fn, ms) => {
+    inicio();
+    setTimeout(() => { try { fn(); } finally { fim(); } }, ms || 0);
+  };
+
+  const api = (metodo, url, corpo) => new Promise((resolve, reject) => {
+    inicio();
+    const xhr = new XMLHttpRequest();
+    xhr.open(metodo, url);
+    xhr.setRequestHeader('Content-Type', 'application/json');
+    xhr.onload = () => {
+      try {
+        if (xhr.status >= 200 && xhr.status < 300) resolve(JSON.parse(xhr.responseText || 'null'));
+        else reject(new Error('HTTP ' + xhr.status));
+      } finally { fim(); }
+    };
+    xhr.onerror = () => { try { reject(new Error('rede')); } finally { fim(); } };
+    xhr.send(corpo === undefined ? null : JSON.stringify(corpo));
+  });
+
+  // ===========================================================================
+  // Utilitários
+  // ===========================================================================
+  const $ = (id) => document.getElementById(id);
+  const esc = (s) => String(s == null ? '' : s).replace(/[&<>"']/g,
+    (c) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+
+  const mensagem = (texto) => {
+    $('areaMensagens').innerHTML =
+      '<app-messagebox><div class="modal"><div class="modal-dialog"><div class="modal-content">' +
+      '<div class="modal-body"><h5>' + esc(texto) + '</h5></div>' +
+      '<div class="modal-footer"><button type="button" class="btn btn-primary">Ok</button></div>' +
+      '</div></div></div></app-messagebox>';
+  };
+  document.addEventListener('click', (ev) => {
+    const b = ev.target.closest('app-messagebox button');
+    if (b) $('areaMensagens').innerHTML = '';
+  });
+
+  // ===========================================================================
+  // Pesquisa + grid de resultados (paginado)
+  // ===========================================================================
+  const estado = {resultados: [], pagina: 0, selecionada: null, etapa: null, aba: 0, modelo: null};
+
+  $('btnExibirOpcoes').addEventListener('click', () => {
+    tarefa(() => $('painelFiltros').classList.toggle('hidden'), 50);
+  });
+
+  $('btnPesquisar').addEventListener('click', () => {
+    const data = $('campoData').value.trim();
+    const numero = $('campoNumero').value.trim();
+    $('areaResultados').innerHTML = '';
+    $('areaCard').innerHTML = '';
+    estado.selecionada = null;
+    api('GET', '/api/pesquisa?data=' + encodeURIComponent(data) + '&numero=' + encodeURIComponent(numero))
+      .then((res) => {
+        estado.resultados = res || [];
+        estado.pagina = 0;
+        renderGrid();
+      })
+      .catch((e) => mensagem('Erro na pesquisa: ' + e.message));
+  });
+
+  const renderGrid = () => {
+    const tam = CFG.pagina || 10;
+    const total = estado.resultados.length;
+    if (!total) {
+      $('areaResultados').innerHTML = '<p>Nenhum registro encontrado.</p>';
+      return;
+    }
+    const paginas = Math.ceil(total / tam);
+    const itens = estado.resultados.slice(estado.pagina * tam, (estado.pagina + 1) * tam);
+    const linhas = itens.map((e) =>
+      '<tr data-numero="' + esc(e.numero) + '"' + (e.numero === estado.selecionada ? ' class="selecionada"' : '') + '>' +
+      '<td>' + esc(e.numero) + '</td><td>' + esc(e.tipo) + '</td><td>' + esc(e.descricao) + '</td></tr>').join('');
+    const li = (rotulo, aria, alvo, desab) =>
+      '<li class="page-item' + (desab ? ' disabled' : '') + '"><a class="page-link" data-pagina="' + alvo + '"' +
+      (aria ? ' aria-label="' + aria + '"' : '') + '>' + rotulo + '</a></li>';
+    let pag = li('‹', 'Previous', estado.pagina - 1, estado.pagina === 0);
+    for (let i = 0; i < paginas; i++) pag += li(String(i + 1), '', i, false);
+    pag += li('›', 'Next', estado.pagina + 1, estado.pagina >= paginas - 1);
+
+    $('areaResultados').innerHTML =
+      '<app-grid><div class="row"><div class="div-dinamica"><table class="table table-condensed table-bordered tableAplat">' +
+      '<thead><tr><th>Número</th><th>Tipo Trabalho</th><th>Descrição</th></tr></thead>' +
+      '<tbody>' + linhas + '</tbody></table></div></div>' +
+      '<ul class="pagination">' + pag + '</ul></app-grid>';
+  };
+
+  $('areaResultados').addEventListener('click', (ev) => {
+    const a = ev.target.closest('ul.pagination a');
+    if (a) {
+      if (a.closest('li').classList.contains('disabled')) return;
+      const alvo = parseInt(a.getAttribute('data-pagina'), 10);
+      tarefa(() => { estado.pagina = alvo; renderGrid(); }, 80);
+      return;
+    }
+    const tr = ev.target.closest('tbody tr[data-numero]');
+    if (!tr) return;
+    estado.selecionada = tr.getAttribute('data-numero');
+    renderGrid();
+    const e = estado.resultados.find((x) => x.numero === estado.selecionada);
+    tarefa(() => {
+      $('areaCard').innerHTML =
+        '<app-etapa-row><div class="card"><strong>' + esc(e.numero) + '</strong> - ' + esc(e.descricao) +
+        '<br><small>' + esc(e.tipo) + '</small></div></app-etapa-row>';
+    }, 60);
+  });
+
+  $('areaCard').addEventListener('dblclick', (ev) => {
+    const card = ev.target.closest('app-etapa-row');
+    if (!card || !estado.selecionada) return;
+    api('GET', '/api/etapa?numero=' + encodeURIComponent(estado.selecionada))
+      .then(abrirModal)
+      .catch((e) => mensagem('Erro ao abrir a etapa: ' + e.message));
+  });
+
+  // ===========================================================================
+  // Modal da etapa (abas renderizadas sob demanda, só a ativa fica no DOM)
+  // ===========================================================================
+  const abrirModal = (etapa) => {
+    const gravado = etapa.gravado || {};
+    estado.etapa = etapa;
+    estado.aba = 0;
+    estado.modelo = {
+      respostas: JSON.parse(JSON.stringify(gravado.respostas || {})),
+      epis: JSON.parse(JSON.stringify(gravado.epis || {})),
+    };
+    const abas = ABAS.map((t, i) =>
+      '<li class="nav-item' + (i === 0 ? ' active' : '') + '"><a class="nav-link" data-aba="' + i + '">' + esc(t) + '</a></li>').join('');
+    $('areaModal').innerHTML =
+      '<app-form-etapa><app-modal><div class="modal"><div class="modal-dialog"><div class="modal-content">' +
+      '<div class="modal-header"><h4>Etapa ' + esc(etapa.numero) + '</h4></div>' +
+      '<div class="modal-body"><div><app-cadastrar-etapa><app-tabs>' +
+      '<ul class="nav nav-tabs tabAplat">' + abas + '</ul>' +
+      '<app-tab><div id="conteudoAba"></div></app-tab>' +
+      '</app-tabs></app-cadastrar-etapa></div></div>' +
+      '<div class="modal-footer"><app-botoes-etapa>' +
+      '<button type="button" class="btn btn-primary">Confirmar</button>' +
+      '<button type="button" class="btn btn-default">Fechar</button>' +
+      '</app-botoes-etapa></div>' +
+      '</div></div></div></app-modal></app-form-etapa>';
+    renderAba();
+  };
+
+  const renderAba = () => {
+    $('conteudoAba').innerHTML = '';
+    tarefa(() => { $('conteudoAba').innerHTML = htmlAba(ABAS[estado.aba]); }, CFG.latenciaAbaMs);
+  };
+
+  const htmlAba = (nome) => {
+    const e = estado.etapa;
+    if (nome === 'Dados da Etapa') {
+      const opcoes = ['Trabalho a Frio', 'Trabalho a Quente'].map((t) =>
+        '<option' + (t === e.tipo ? ' selected' : '') + '>' + esc(t) + '</option>').join('');
+      const carac = (e.caracteristicas || []).map((c) =>
+        '<app-input-caracteristicas><span class="nomecaracteristica">' + esc(c) + '</span></app-input-caracteristicas>').join('');
+      return '<app-dados-da-etapa><div class="row"><label>Descrição</label>' +
+        '<textarea formcontrolname="descricao" readonly>' + esc(e.descricao) + '</textarea></div>' +
+        '<div class="row"><span id="label-subtitulo">Tipo Trabalho</span>' +
+        '<app-combo-box formcontrolname="tipoPT"><select disabled>' + opcoes + '</select></app-combo-box></div>' +
+        '<fieldset><legend>Características do trabalho</legend>' + carac + '</fieldset></app-dados-da-etapa>';
+    }
+    if (nome === 'Questionário PT') return questionario('app-questionario-etapa', FX.qpt || []);
+    if (nome === 'Análise Ambiental') return questionario('app-analise-ambiental-da-etapa', FX.amb || []);
+    if (nome === 'APN-1') return questionario('app-apn1-da-etapa', (FX.apn1 || {})[e.apn1] || []);
+    if (nome === 'EPI') return abaEpi();
+    return '<div><p>' + esc(nome) + '</p></div>';
+  };
+
+  const linhaQuestao = (q, k) => {
+    const marcada = ((estado.modelo.respostas[q.secao] || {})[q.id]);
+    const radios = q.opcoes.map((rot, i) => {
+      const id = q.secao + '_' + estado.etapa.id + '_' + k + '_' + q.id + '_' + i;
+      return '<span><input type="radio" id="' + id + '" data-secao="' + q.secao + '" data-qid="' + q.id +
+        '" data-idx="' + i + '"' + (marcada === i ? ' checked' : '') + '>' +
+        '<label id="' + id + '_label" for="' + id + '">' + esc(rot) + '</label></span>';
+    }).join('');
+    return '<div class="row" id="questao_' + q.id + '">' +
+      '<div class="form-group col-sm-1 ordem"> ' + q.ordem + ' </div>' +
+      '<div class="form-group pergunta col-md-7">' + esc(q.pergunta) + '</div>' +
+      '<div class="form-group col-md-4"><div class="resposta simnao">' + radios + '</div></div></div>';
+  };
+
+  const secoes = (perguntas) => {
+    const grupos = [];
+    for (const q of perguntas) {
+      let g = grupos.find((x) => x.secao === q.secao);
+      if (!g) grupos.push(g = {secao: q.secao, itens: []});
+      g.itens.push(q);
+    }
+    return grupos.map((g) =>
+      '<div id="' + g.secao + '"><h4>' + esc((FX.titulos || {})[g.secao] || g.secao) + '</h4><hr>' +
+      g.itens.map((q, k) => linhaQuestao(q, 10 + k)).join('') + '</div>').join('');
+  };
+
+  const questionario = (componente, perguntas) =>
+    '<' + componente + '><app-questionario><form><section id="questionario">' + secoes(perguntas) +
+    '</section></form></app-questionario></' + componente + '>';
+
+  // radios sem name (como no APLAT): o componente desmarca os irmãos da linha
+  document.addEventListener('change', (ev) => {
+    const inp = ev.target;
+    if (!inp.matches('#conteudoAba input[type=radio]') || !inp.checked) return;
+    const row = inp.closest('[id^=questao_]');
+    row.querySelectorAll('input[type=radio]').forEach((r) => { if (r !== inp) r.checked = false; });
+    const secao = inp.getAttribute('data-secao');
+    (estado.modelo.respostas[secao] = estado.modelo.respostas[secao] || {})[inp.getAttribute('data-qid')] =
+      parseInt(inp.getAttribute('data-idx'), 10);
+  });
+
+  // ===========================================================================
+  // Aba EPI: categorias (+ abre o modal de associação) e radios de EPI adicional
+  // ===========================================================================
+  const abaEpi = () => {
+    const cats = ((FX.epi || {}).categorias || []).map((cat) => {
+      const itens = estado.modelo.epis[cat] || [];
+      const linhas = itens.map((t) => '<tr><td title="' + esc(t) + '"> ' + esc(t) + ' </td></tr>').join('');
+      return '<div class="row"><div class="form-group col-sm-3"><div class="row">' +
+        '<button type="button" class="btn btn-primary" data-epi-add="' + esc(cat) + '">+</button>' +
+        '<button type="button" class="btn btn-primary"' + (itens.length ? '' : ' disabled') + '>-</button>' +
+        '<label for="inputUnidade" class="control-label">' + esc(cat) + '</label></div>' +
+        '<div class="row"><app-grid><div class="div-dinamica"><table class="table tableAplat"><tbody>' +
+        linhas + '</tbody></table></div></app-grid></div></div></div>';
+    }).join('');
+    return '<app-epi-da-etapa><div>' + cats + '</div><div id="areaAssociar"></div>' +
+      '<app-questionario><form><section id="questionario">' + secoes(FX.epi_radios || []) +
+      '</section></form></app-questionario></app-epi-da-etapa>';
+  };
+
+  const abrirAssociacao = (cat) => {
+    const ja = new Set(estado.modelo.epis[cat] || []);
+    const linhas = (((FX.epi || {}).catalogo || {})[cat] || []).map((t) =>
+      '<tr><td class="tablecheckboxtd"><input type="checkbox" name="Associado"' + (ja.has(t) ? ' checked' : '') + '></td>' +
+      '<td title="' + esc(t) + '"> ' + esc(t) + ' </td></tr>').join('');
+    $('areaAssociar').innerHTML =
+      '<app-associar-epi data-categoria="' + esc(cat) + '"><app-modal><div class="modal"><div class="modal-dialog">' +
+      '<div class="modal-content"><div class="modal-header"><h4>' + esc(cat) + '</h4></div>' +
+      '<div class="modal-body"><table class="table tableAplat"><thead><tr><th></th><th>EPI</th></tr></thead>' +
+      '<tbody>' + linhas + '</tbody></table></div>' +
+      '<div class="modal-footer"><button type="button" class="btn btn-primary">Confirmar</button>' +
+      '<button type="button" class="btn btn-default">Cancelar</button></div>' +
+      '</div></div></div></app-modal></app-associar-epi>';
+  };
+
+  // ===========================================================================
+  // Cliques do modal (abas, rodapé, associação de EPI)
+  // ===========================================================================
+  $('areaModal').addEventListener('click', (ev) => {
+    const alvo = ev.target;
+
+    const aba = alvo.closest('ul.tabAplat a');
+    if (aba) {
+      const i = parseInt(aba.getAttribute('data-aba'), 10);
+      document.querySelectorAll('ul.tabAplat li').forEach((li, k) => li.classList.toggle('active', k === i));
+      estado.aba = i;
+      renderAba();
+      return;
+    }
+
+    const add = alvo.closest('button[data-epi-add]');
+    if (add) { tarefa(() => abrirAssociacao(add.getAttribute('data-epi-add')), 120); return; }
+
+    const botaoAssoc = alvo.closest('app-associar-epi button');
+    if (botaoAssoc) {
+      const modal = botaoAssoc.closest('app-associar-epi');
+      if (botaoAssoc.textContent.trim() === 'Confirmar') {
+        const cat = modal.getAttribute('data-categoria');
+        estado.modelo.epis[cat] = Array.from(modal.querySelectorAll('tbody tr'))
+          .filter((tr) => tr.querySelector('input[name=Associado]').checked)
+          .map((tr) => tr.querySelector('td[title]').getAttribute('title'));
+      }
+      tarefa(() => { $('conteudoAba').innerHTML = abaEpi(); }, 80);
+      return;
+    }
+
+    const rodape = alvo.closest('app-botoes-etapa button');
+    if (!rodape) return;
+    const rotulo = rodape.textContent.trim();
+    if (rotulo === 'Fechar') {
+      tarefa(() => { $('areaModal').innerHTML = ''; estado.etapa = null; }, 60);
+    } else if (rotulo === 'Confirmar') {
+      rodape.disabled = true;
+      api('POST', '/api/etapa/salvar', {
+        numero: estado.etapa.numero,
+        respostas: estado.modelo.respostas,
+        epis: estado.modelo.epis,
+      })
+        .then(() => mensagem('Registro salvo com sucesso.'))
+        .catch((e) => mensagem('Erro ao salvar: ' + e.message))
+        .then(() => { rodape.disabled = false; });
+    }
+  });
+})();
@@ -0,0 +1,797 @@
+# aplatquente/mock_aplat.py
+from __future__ import annotations
+
+# =============================================================================
+# APLAT simulado (local, sem rede) + benchmark de ponta a ponta
+# - serve: sobe o site simulado (pesquisa, grid, card, modal com abas,
+#   app-messagebox, app-botoes-etapa) em http://127.0.0.1:PORTA/
+# - bench: sobe o site, processa as etapas headless com o fluxo real e mede
+#   etapas/hora e segundos por passo
+# - micro: mesmas telas no DriverMemoria (sem navegador); comandos e ms por
+#   caminho de preenchimento
+# As perguntas vêm dos .txt de referência do repositório (qpt, apn, epi, AMB).
+# Uso: python -m aplatquente.aplatquente mock bench --browser chrome --etapas 10
+# =============================================================================
+
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+_PASTA_PACOTE = os.path.dirname(os.path.abspath(__file__))
+_PASTA_ESTATICOS = os.path.join(_PASTA_PACOTE, "mock")
+# os .txt de referência ficam na raiz do repositório
+PASTA_FIXTURES_PADRAO = os.path.dirname(_PASTA_PACOTE)
+
+DATA_PADRAO = "2026-01-03"
+
+
+# =============================================================================
+# Leitura dos .txt de referência
+# =============================================================================
+
+def _ler(pasta: str, nome: str) -> str:
+    caminho = os.path.join(pasta, nome)
+    if not os.path.exists(caminho):
+        raise RuntimeError(f"Arquivo de referência não encontrado: {caminho} (use --fixtures).")
+    with open(caminho, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _texto(fragmento: str) -> str:
+    """HTML -> texto simples (sem tags, entidades resolvidas, espaços colapsados)."""
+    t = re.sub(r"<[^>]+>", " ", fragmento or "")
+    return " ".join(html.unescape(t).split())
+
+
+def perguntas_de_html(conteudo: str) -> List[Dict[str, Any]]:
+    """
+    Linhas div#questao_* capturadas do APLAT: seção (prefixo do id do radio),
+    ordem, pergunta e rótulos das opções. Repetições do mesmo id são ignoradas.
+    """
+    out: List[Dict[str, Any]] = []
+    vistos = set()
+    marcas = list(re.finditer(r'id="questao_(\d+)"', conteudo))
+    for i, m in enumerate(marcas):
+        qid = m.group(1)
+        fim = marcas[i + 1].start() if i + 1 < len(marcas) else len(conteudo)
+        bloco = conteudo[m.start():fim]
+        ordem = re.search(r'ordem[^"]*"[^>]*>\s*(\d{3})\s*<', bloco)
+        pergunta = re.search(r'class="form-group pergunta[^"]*">(.*?)</div>', bloco, re.DOTALL)
+        radio = re.search(r'type="radio" id="([A-Z0-9]+)_', bloco)
+        opcoes = [_texto(x) for x in re.findall(r"<label[^>]*>(.*?)</label>", bloco, re.DOTALL)]
+        if qid in vistos or not (ordem and pergunta and radio and opcoes):
+            continue
+        vistos.add(qid)
+        out.append({
+            "id": int(qid),
+            "secao": radio.group(1),
+            "ordem": ordem.group(1),
+            "pergunta": _texto(pergunta.group(1)),
+            "opcoes": opcoes,
+        })
+    return out
+
+
+def titulos_secoes(conteudo: str) -> Dict[str, str]:
+    return {
+        sec: _texto(tit)
+        for sec, tit in re.findall(r'<div[^>]*id="([A-Z0-9]+)"[^>]*><h4[^>]*>(.*?)</h4>', conteudo)
+    }
+
+
+def perguntas_de_texto(conteudo: str, base_id: int) -> List[Dict[str, Any]]:
+    """
+    Formato copiado da tela ("001Pergunta...\\nSimNão"): cada bloco termina em
+    "SimNão". Bloco sem número (cópia incompleta) recebe a ordem seguinte.
+    """
+    inicio = re.search(r"^001\S", conteudo, re.MULTILINE)
+    if not inicio:
+        return []
+    out: List[Dict[str, Any]] = []
+    linhas: List[str] = []
+    ordem_atual: Optional[str] = None
+    for linha in conteudo[inicio.start():].splitlines():
+        linha = linha.strip()
+        if linha.startswith(("Assinado por", "Agora o de")):
+            break
+        m = re.match(r"^(\d{3})(\S.*)$", linha)
+        if m:
+            ordem_atual, linhas = m.group(1), [m.group(2)]
+            continue
+        if linha == "SimNão":
+            if ordem_atual is None:
+                ordem_atual = f"{int(out[-1]['ordem']) + 1:03d}" if out else "001"
+            pergunta = " ".join(linhas).strip()
+            out.append({
+                "id": base_id + len(out),
+                "secao": "APN1",
+                "ordem": ordem_atual,
+                "pergunta": pergunta or f"Pergunta {ordem_atual}",
+                "opcoes": ["Sim", "Não"],
+            })
+            ordem_atual, linhas = None, []
+            continue
+        if linha and not linha.startswith("/html"):
+            linhas.append(linha)
+    return out
+
+
+def epis_de_html(conteudo: str) -> Dict[str, Any]:
+    """Categorias (labels ao lado dos botões +), itens associados de exemplo e catálogo do modal."""
+    linhas = conteudo.splitlines()
+    bloco_cat = next((l for l in linhas if "control-label" in l and "<button" in l), "")
+    categorias: List[str] = []
+    associados: Dict[str, List[str]] = {}
+    partes = re.split(r'<label for="inputUnidade" class="control-label">', bloco_cat)
+    for i in range(1, len(partes)):
+        nome = _texto(partes[i].split("</label>", 1)[0])
+        categorias.append(nome)
+        associados[nome] = [html.unescape(t) for t in re.findall(r'<td[^>]*title="([^"]+)"', partes[i])]
+
+    # tabelas do modal de associação, na mesma ordem das categorias
+    tabelas = [l for l in linhas if 'name="Associado"' in l]
+    catalogo: Dict[str, List[str]] = {}
+    for nome, tabela in zip(categorias, tabelas):
+        itens = [html.unescape(t) for t in re.findall(r'<td[^>]*title="([^"]+)"', tabela) if t.strip()]
+        catalogo[nome] = list(dict.fromkeys(itens))
+    for nome in categorias:
+        catalogo.setdefault(nome, associados.get(nome, []))
+    return {"categorias": categorias, "catalogo": catalogo, "associados_exemplo": associados}
+
+
+def carregar_fixtures(pasta: Optional[str] = None) -> Dict[str, Any]:
+    pasta = pasta or PASTA_FIXTURES_PADRAO
+    qpt = _ler(pasta, "qpt.txt")
+    amb = _ler(pasta, "analise ambiental completo.txt")
+    epi = _ler(pasta, "epi.txt")
+
+    titulos = {}
+    for conteudo in (qpt, amb, epi):
+        titulos.update(titulos_secoes(conteudo))
+    titulos.setdefault("APN1", "APN-1")
+
+    return {
+        "titulos": titulos,
+        "qpt": perguntas_de_html(qpt),
+        "amb": perguntas_de_html(amb),
+        "epi_radios": perguntas_de_html(epi),
+        "apn1": {
+            "17": perguntas_de_texto(_ler(pasta, "apn 17.txt"), 9000),
+            "20": perguntas_de_texto(_ler(pasta, "apn1 20.txt"), 9100),
+        },
+        "epi": epis_de_html(epi),
+    }
+
+
+# =============================================================================
+# Etapas simuladas
+# =============================================================================
+
+_DESCRICOES = [
+    ("SOLDA DE SUPORTE NA TUBULAÇÃO DO MÓDULO M-05", ["Solda elétrica", "Esmerilhamento"]),
+    ("CORTE COM MAÇARICO DE CHAPA NO CONVÉS PRINCIPAL", ["Corte a quente", "Oxicorte"]),
+    ("ESMERILHAMENTO DE CORDÃO DE SOLDA EM ALTURA", ["Esmerilhamento", "Trabalho em altura"]),
+    ("REPARO COM SOLDA EM LINHA DE ÁGUA DE INCÊNDIO SOBRE O MAR", ["Solda elétrica", "Sobre o mar"]),
+    ("LIXAMENTO E PINTURA DE ESTRUTURA NA ÁREA DE PROCESSO", ["Lixamento elétrico"]),
+]
+
+
+def gerar_etapas(data_iso: str, n: int, frio_a_cada: int = 4, seed: int = 18) -> List[Dict[str, Any]]:
+    """n etapas na data; uma a cada `frio_a_cada` é Trabalho a Frio (0 = todas quentes)."""
+    rnd = random.Random(seed)
+    ano = data_iso[:4]
+    etapas = []
+    for i in range(n):
+        descricao, carac = _DESCRICOES[i % len(_DESCRICOES)]
+        frio = bool(frio_a_cada) and (i + 1) % frio_a_cada == 0
+        etapas.append({
+            "id": 3795 + i,
+            "numero": f"18/{1001 + i}/{ano}",
+            "data": data_iso,
+            "tipo": "Trabalho a Frio" if frio else "Trabalho a Quente",
+            "descricao": ("INSPEÇÃO VISUAL DE VÁLVULAS" if frio else descricao),
+            "caracteristicas": ([] if frio else list(carac)),
+            "apn1": rnd.choice(["17", "20"]),
+        })
+    return etapas
+
+
+# =============================================================================
+# Servidor HTTP
+# =============================================================================
+
+class EstadoMock:
+    """Etapas e respostas gravadas (em memória), com latências simuladas (s)."""
+
+    def __init__(
+        self,
+        fixtures: Dict[str, Any],
+        etapas: List[Dict[str, Any]],
+        latencia_pesquisa: float = 0.6,
+        latencia_abrir: float = 0.3,
+        latencia_save: float = 0.4,
+        latencia_aba: float = 0.15,
+        falha_save: float = 0.0,
+        pagina: int = 10,
+    ):
+        self.fixtures = fixtures
+        self.etapas = {e["numero"]: e for e in etapas}
+        self.gravado: Dict[str, Dict[str, Any]] = {}
+        self.saves = 0
+        self.latencia_pesquisa = latencia_pesquisa
+        self.latencia_abrir = latencia_abrir
+        self.latencia_save = latencia_save
+        self.latencia_aba = latencia_aba
+        self.falha_save = falha_save
+        self.pagina = pagina
+        self.lock = threading.Lock()
+
+    def config_front(self) -> Dict[str, Any]:
+        return {
+            "fixtures": self.fixtures,
+            "latenciaAbaMs": int(self.latencia_aba * 1000),
+            "pagina": self.pagina,
+        }
+
+
+def _data_iso(data_ui: str) -> str:
+    m = re.match(r"^(\d{2})/(\d{2})/(\d{4})$", (data_ui or "").strip())
+    return f"{m.group(3)}-{m.group(2)}-{m.group(1)}" if m else (data_ui or "").strip()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "AplatMock/1.0"
+
+    @property
+    def estado(self) -> EstadoMock:
+        return self.server.estado  # type: ignore[attr-defined]
+
+    def log_message(self, *args) -> None:  # silencioso: o bench imprime o que interessa
+        pass
+
+    def _json(self, obj: Any, status: int = 200) -> None:
+        corpo = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _arquivo(self, nome: str, tipo: str, injetar: Optional[str] = None) -> None:
+        with open(os.path.join(_PASTA_ESTATICOS, nome), "rb") as f:
+            corpo = f.read()
+        if injetar is not None:
+            corpo = corpo.replace(b"/*__MOCK_CONFIG__*/", injetar.encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        est = self.estado
+
+        if url.path in ("/", "/index.html"):
+            cfg = "window.__MOCK = " + json.dumps(est.config_front(), ensure_ascii=False) + ";"
+            return self._arquivo("app.html", "text/html; charset=utf-8", injetar=cfg)
+        if url.path == "/app.js":
+            return self._arquivo("app.js", "application/javascript; charset=utf-8")
+        if url.path == "/favicon.ico":
+            self.send_response(204)
+            self.end_headers()
+            return
+
+        if url.path == "/api/pesquisa":
+            time.sleep(est.latencia_pesquisa)
+            data = _data_iso(q.get("data", ""))
+            numero = q.get("numero", "").strip()
+            res = [
+                {k: e[k] for k in ("numero", "tipo", "descricao")}
+                for e in sorted(est.etapas.values(), key=lambda e: e["id"])
+                if e["data"] == data and (not numero or e["numero"] == numero)
+            ]
+            return self._json(res)
+
+        if url.path == "/api/etapa":
+            time.sleep(est.latencia_abrir)
+            etapa = est.etapas.get(q.get("numero", ""))
+            if not etapa:
+                return self._json({"erro": "etapa não encontrada"}, 404)
+            with est.lock:
+                gravado = json.loads(json.dumps(est.gravado.get(etapa["numero"], {})))
+            return self._json({**etapa, "gravado": gravado})
+
+        if url.path == "/api/estado":
+            with est.lock:
+                return self._json({"saves": est.saves, "gravado": est.gravado})
+
+        self._json({"erro": "rota desconhecida"}, 404)
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        est = self.estado
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError:
+            return self._json({"erro": "json inválido"}, 400)
+
+        if url.path == "/api/etapa/salvar":
+            time.sleep(est.latencia_save)
+            numero = corpo.get("numero", "")
+            if numero not in est.etapas:
+                return self._json({"erro": "etapa não encontrada"}, 404)
+            if est.falha_save and random.random() < est.falha_save:
+                return self._json({"erro": "falha simulada"}, 500)
+            with est.lock:
+                atual = est.gravado.setdefault(numero, {"respostas": {}, "epis": {}})
+                for secao, resp in (corpo.get("respostas") or {}).items():
+                    atual["respostas"].setdefault(secao, {}).update(resp)
+                atual["epis"].update(corpo.get("epis") or {})
+                est.saves += 1
+            return self._json({"ok": True})
+
+        self._json({"erro": "rota desconhecida"}, 404)
+
+
+def iniciar_servidor(estado: EstadoMock, porta: int = 0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Sobe o servidor numa thread daemon; a URL fica em servidor.url."""
+    servidor = ThreadingHTTPServer((host, porta), _Handler)
+    servidor.daemon_threads = True
+    servidor.estado = estado  # type: ignore[attr-defined]
+    servidor.url = f"http://{host}:{servidor.server_address[1]}/"  # type: ignore[attr-defined]
+    threading.Thread(target=servidor.serve_forever, name="aplat-mock", daemon=True).start()
+    return servidor
+
+
+# =============================================================================
+# Páginas estáticas (mesmo DOM do app.js) para o DriverMemoria
+# =============================================================================
+
+ABAS = ["Dados da Etapa", "Equipe", "Precedências", "Questionário PT", "Análise Ambiental", "EPI", "APN-1"]
+
+
+def _esc(s: Any) -> str:
+    return html.escape("" if s is None else str(s), quote=True)
+
+
+def _html_secoes(perguntas: List[Dict[str, Any]], titulos: Dict[str, str], etapa_id: int) -> str:
+    grupos: Dict[str, List[Dict[str, Any]]] = {}
+    for q in perguntas:
+        grupos.setdefault(q["secao"], []).append(q)
+    out = []
+    for secao, itens in grupos.items():
+        linhas = []
+        for k, q in enumerate(itens, 10):
+            radios = "".join(
+                f'<span><input type="radio" id="{q["secao"]}_{etapa_id}_{k}_{q["id"]}_{i}">'
+                f'<label id="{q["secao"]}_{etapa_id}_{k}_{q["id"]}_{i}_label" '
+                f'for="{q["secao"]}_{etapa_id}_{k}_{q["id"]}_{i}">{_esc(rot)}</label></span>'
+                for i, rot in enumerate(q["opcoes"])
+            )
+            linhas.append(
+                f'<div class="row" id="questao_{q["id"]}">'
+                f'<div class="form-group col-sm-1 ordem"> {q["ordem"]} </div>'
+                f'<div class="form-group pergunta col-md-7">{_esc(q["pergunta"])}</div>'
+                f'<div class="form-group col-md-4"><div class="resposta simnao">{radios}</div></div></div>'
+            )
+        out.append(f'<div id="{secao}"><h4>{_esc(titulos.get(secao, secao))}</h4><hr>{"".join(linhas)}</div>')
+    return "".join(out)
+
+
+def _html_questionario(componente: str, perguntas: List[Dict[str, Any]], titulos: Dict[str, str], etapa_id: int) -> str:
+    return (
+        f'<{componente}><app-questionario><form><section id="questionario">'
+        f"{_html_secoes(perguntas, titulos, etapa_id)}</section></form></app-questionario></{componente}>"
+    )
+
+
+def _html_aba_epi(fixtures: Dict[str, Any], etapa_id: int) -> str:
+    """
+    Categorias (grid dos associados vazio, "+" abre o modal de associação, como
+    no epi.txt capturado) e os radios de EPI adicional.
+    """
+    epi = fixtures["epi"]
+    cats = []
+    for cat in epi["categorias"]:
+        cats.append(
+            '<div class="row"><div class="form-group col-sm-3"><div class="row">'
+            f'<button type="button" class="btn btn-primary" data-epi-add="{_esc(cat)}">+</button>'
+            f'<button type="button" class="btn btn-primary" disabled>-</button>'
+            f'<label for="inputUnidade" class="control-label">{_esc(cat)}</label></div>'
+            '<div class="row"><app-grid><div class="div-dinamica"><table class="table tableAplat"><tbody>'
+            "</tbody></table></div></app-grid></div></div></div>"
+        )
+    return (
+        f'<app-epi-da-etapa><div>{"".join(cats)}</div><div id="areaAssociar"></div>'
+        f'<app-questionario><form><section id="questionario">'
+        f'{_html_secoes(fixtures["epi_radios"], fixtures["titulos"], etapa_id)}'
+        "</section></form></app-questionario></app-epi-da-etapa>"
+    )
+
+
+def _html_associar_epi(fixtures: Dict[str, Any], categoria: str, associados: List[str]) -> str:
+    """Modal de associação da categoria (o que o "+" abre)."""
+    linhas = "".join(
+        '<tr><td class="tablecheckboxtd"><input type="checkbox" name="Associado"'
+        f'{" checked" if t in associados else ""}></td>'
+        f'<td title="{_esc(t)}"> {_esc(t)} </td></tr>'
+        for t in fixtures["epi"]["catalogo"].get(categoria, [])
+    )
+    return (
+        f'<app-associar-epi data-categoria="{_esc(categoria)}"><app-modal><div class="modal"><div class="modal-dialog">'
+        f'<div class="modal-content"><div class="modal-header"><h4>{_esc(categoria)}</h4></div>'
+        f'<div class="modal-body"><table class="table tableAplat"><tbody>{linhas}</tbody></table></div>'
+        '<div class="modal-footer"><button type="button" class="btn btn-primary">Confirmar</button>'
+        '<button type="button" class="btn btn-default">Cancelar</button></div>'
+        "</div></div></div></app-modal></app-associar-epi>"
+    )
+
+
+def _html_aba(fixtures: Dict[str, Any], etapa: Dict[str, Any], nome: str) -> str:
+    titulos = fixtures["titulos"]
+    if nome == "Dados da Etapa":
+        opcoes = "".join(
+            f'<option{" selected" if t == etapa["tipo"] else ""}>{_esc(t)}</option>'
+            for t in ("Trabalho a Frio", "Trabalho a Quente")
+        )
+        carac = "".join(
+            f'<app-input-caracteristicas><span class="nomecaracteristica">{_esc(c)}</span></app-input-caracteristicas>'
+            for c in etapa["caracteristicas"]
+        )
+        return (
+            '<app-dados-da-etapa><div class="row"><label>Descrição</label>'
+            f'<textarea formcontrolname="descricao" readonly>{_esc(etapa["descricao"])}</textarea></div>'
+            '<div class="row"><span id="label-subtitulo">Tipo Trabalho</span>'
+            f'<app-combo-box formcontrolname="tipoPT"><select disabled>{opcoes}</select></app-combo-box></div>'
+            f"<fieldset><legend>Características do trabalho</legend>{carac}</fieldset></app-dados-da-etapa>"
+        )
+    if nome == "Questionário PT":
+        return _html_questionario("app-questionario-etapa", fixtures["qpt"], titulos, etapa["id"])
+    if nome == "Análise Ambiental":
+        return _html_questionario("app-analise-ambiental-da-etapa", fixtures["amb"], titulos, etapa["id"])
+    if nome == "APN-1":
+        return _html_questionario("app-apn1-da-etapa", fixtures["apn1"][etapa["apn1"]], titulos, etapa["id"])
+    if nome == "EPI":
+        return _html_aba_epi(fixtures, etapa["id"])
+    return f"<div><p>{_esc(nome)}</p></div>"
+
+
+def pagina_etapa_aberta(etapa: Dict[str, Any]) -> str:
+    """Tela com o modal da etapa aberto em "Dados da Etapa" (conteúdo das abas vem pelos ganchos)."""
+    abas = "".join(
+        f'<li class="nav-item{" active" if i == 0 else ""}"><a class="nav-link" data-aba="{i}">{_esc(t)}</a></li>'
+        for i, t in enumerate(ABAS)
+    )
+    return (
+        '<!doctype html><html><head><title>APLAT (memória)</title></head><body>'
+        "<app-root><div><app-permissao-trabalho><div><app-programacao-diaria>"
+        "<app-dynamic-component><app-form-etapa><app-modal><div class=\"modal\"><div class=\"modal-dialog\">"
+        f'<div class="modal-content"><div class="modal-header"><h4>Etapa {_esc(etapa["numero"])}</h4></div>'
+        '<div class="modal-body"><div><app-cadastrar-etapa><app-tabs>'
+        f'<ul class="nav nav-tabs tabAplat">{abas}</ul><app-tab><div id="conteudoAba"></div></app-tab>'
+        "</app-tabs></app-cadastrar-etapa></div></div>"
+        '<div class="modal-footer"><app-botoes-etapa>'
+        '<button type="button" class="btn btn-primary">Confirmar</button>'
+        '<button type="button" class="btn btn-default">Fechar</button>'
+        "</app-botoes-etapa></div></div></div></div></app-modal></app-form-etapa></app-dynamic-component>"
+        "</app-programacao-diaria></div></app-permissao-trabalho></div></app-root>"
+        '<div id="areaMensagens"></div></body></html>'
+    )
+
+
+def driver_memoria_etapa(
+    fixtures: Dict[str, Any],
+    etapa: Dict[str, Any],
+    latencia_ms: float = 0.0,
+    mensagem_ao_gravar: bool = True,
+):
+    """
+    DriverMemoria com o modal da etapa aberto e o comportamento do app nos ganchos:
+    troca de aba (o conteúdo de cada aba é preservado, como o modelo do Angular),
+    Confirmar do rodapé grava e mostra a messagebox, "+" da categoria de EPI abre
+    o modal de associação e o Confirmar dele passa os marcados para o grid da categoria.
+    """
+    from aplatquente.driver_memoria import DriverMemoria, _lxml_html
+    from aplatquente.infra import xpath_literal
+
+    lh = _lxml_html()
+    driver = DriverMemoria(pagina_etapa_aberta(etapa), latencia_ms=latencia_ms, url="memoria://aplat/")
+    conteudos = {nome: lh.fragment_fromstring(_html_aba(fixtures, etapa, nome)) for nome in ABAS}
+
+    def mostrar(nome: str) -> None:
+        area = driver.xpath("//div[@id='conteudoAba']")[0]
+        for filho in list(area):
+            area.remove(filho)
+        area.append(conteudos[nome])
+
+    def trocar_aba(drv, el) -> None:
+        a = el if el.tag == "a" else el.xpath("ancestor::a[1]")[0]
+        i = int(a.get("data-aba"))
+        for k, li in enumerate(drv.xpath("//ul[contains(@class,'tabAplat')]/li")):
+            li.set("class", "nav-item active" if k == i else "nav-item")
+        mostrar(ABAS[i])
+
+    def gravar(drv, _el) -> None:
+        drv.registrar_gravacao("/api/etapa/salvar")
+        if mensagem_ao_gravar:
+            drv.xpath("//div[@id='areaMensagens']")[0].append(lh.fragment_fromstring(
+                '<app-messagebox><div class="modal-content"><div class="modal-body"><h5>Registro salvo com sucesso.</h5>'
+                '</div><div class="modal-footer"><button type="button" class="btn btn-primary">Ok</button></div>'
+                "</div></app-messagebox>"
+            ))
+
+    def grid_da_categoria(drv, cat: str):
+        return drv.xpath(f"//button[@data-epi-add={xpath_literal(cat)}]/ancestor::div[contains(@class,'form-group')][1]//tbody")[0]
+
+    def abrir_associacao(drv, el) -> None:
+        cat = el.get("data-epi-add")
+        associados = [td.get("title") for td in grid_da_categoria(drv, cat).xpath(".//td[@title]")]
+        area = drv.xpath("//div[@id='areaAssociar']")[0]
+        for filho in list(area):
+            area.remove(filho)
+        area.append(lh.fragment_fromstring(_html_associar_epi(fixtures, cat, associados)))
+
+    def fechar_associacao(drv, el) -> None:
+        modal = el.xpath("ancestor::app-associar-epi[1]")[0]
+        if " ".join(el.itertext()).strip() == "Confirmar":
+            tbody = grid_da_categoria(drv, modal.get("data-categoria"))
+            for filho in list(tbody):
+                tbody.remove(filho)
+            for tr in modal.xpath(".//tbody/tr[.//input[@checked]]"):
+                t = tr.xpath("./td[@title]")[0].get("title")
+                tbody.append(lh.fragment_fromstring(f'<tr><td title="{_esc(t)}"> {_esc(t)} </td></tr>'))
+        modal.getparent().remove(modal)
+
+    driver.ao_clicar("//ul[contains(@class,'tabAplat')]//a", trocar_aba)
+    driver.ao_clicar("//app-botoes-etapa//button[normalize-space()='Confirmar']", gravar)
+    driver.ao_clicar("//button[@data-epi-add]", abrir_associacao)
+    driver.ao_clicar("//app-associar-epi//button", fechar_associacao)
+    mostrar(ABAS[0])
+    return driver
+
+
+# =============================================================================
+# Micro-benchmark do preenchimento (sem navegador)
+# =============================================================================
+
+def _casos_micro(fixtures: Dict[str, Any], etapa: Dict[str, Any]):
+    """(nome, função(driver)) de cada caminho de preenchimento medido."""
+    from aplatquente.epi import aplicar_epi_por_categoria
+    from aplatquente.plano import coletar_apn1_itens
+    from aplatquente.preenchimento import (
+        _index_rows_by_ordem,
+        _mark_apn1_radio,
+        _mark_row_radio_generic,
+        preencher_analise_ambiental,
+        preencher_epi_adicional,
+        preencher_questionario_pt,
+    )
+    from aplatquente.infra import goto_tab, ler_tipo_trabalho
+
+    plano_qpt = {q["ordem"]: q["opcoes"][0] for q in fixtures["qpt"]}
+    plano_epi = {q["ordem"]: "Não" for q in fixtures["epi_radios"]}
+    epis = {cat: itens[:3] for cat, itens in fixtures["epi"]["catalogo"].items()}
+    t = 5.0
+
+    def linhas_genericas(driver):
+        goto_tab(driver, "Questionário PT", t)
+        rows = _index_rows_by_ordem(driver)
+        return {"total": len(rows), "ok": sum(_mark_row_radio_generic(driver, r, plano_qpt[o]) for o, r in rows.items())}
+
+    def linhas_apn1(driver):
+        goto_tab(driver, "APN-1", t)
+        rows = _index_rows_by_ordem(driver)
+        return {"total": len(rows), "ok": sum(_mark_apn1_radio(driver, r, "Não") for r in rows.values())}
+
+    def coleta(snapshot: bool):
+        def fn(driver):
+            goto_tab(driver, "APN-1", t)
+            return {"total": len(coletar_apn1_itens(driver, t, snapshot=snapshot))}
+        return fn
+
+    return [
+        ("Tipo Trabalho (modal)", lambda d: {"tipo": ler_tipo_trabalho(d)}),
+        ("QPT em lote", lambda d: preencher_questionario_pt(d, plano_qpt, t, em_lote=True)),
+        ("QPT por linha", lambda d: preencher_questionario_pt(d, plano_qpt, t, em_lote=False)),
+        ("QPT _mark_row_radio_generic", linhas_genericas),
+        ("EPI adicional em lote", lambda d: preencher_epi_adicional(d, plano_epi, t, em_lote=True)),
+        ("EPI adicional por linha", lambda d: preencher_epi_adicional(d, plano_epi, t, em_lote=False)),
+        ("AMB em lote", lambda d: preencher_analise_ambiental(d, t, em_lote=True)),
+        ("AMB por linha", lambda d: preencher_analise_ambiental(d, t, em_lote=False)),
+        ("EPI por categoria (modal)", lambda d: aplicar_epi_por_categoria(d, epis, t)),
+        ("APN-1 coleta snapshot", coleta(True)),
+        ("APN-1 coleta por linha", coleta(False)),
+        ("APN-1 _mark_apn1_radio", linhas_apn1),
+    ]
+
+
+def micro_benchmark(args) -> int:
+    """Mede comandos WebDriver e tempo de cada caminho de preenchimento no DriverMemoria."""
+    import contextlib
+    import io
+
+    fixtures = carregar_fixtures(args.fixtures)
+    etapa = gerar_etapas(args.data, 1, frio_a_cada=0)[0]
+    etapa["apn1"] = args.apn1
+
+    print(f"====== MICRO-BENCHMARK (DriverMemoria, latência {args.latencia_ms:g} ms/cmd) ======")
+    print(f"  {'caso':<30} {'cmds':>6} {'ms':>9} {'ms/cmd':>7}  resultado")
+    falhas = 0
+    for nome, fn in _casos_micro(fixtures, etapa):
+        if args.filtro and args.filtro.lower() not in nome.lower():
+            continue
+        driver = driver_memoria_etapa(fixtures, etapa, latencia_ms=args.latencia_ms)
+        saida = io.StringIO()
+        inicio = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else saida):
+                res = fn(driver)
+        except Exception as e:
+            res = f"ERRO: {e}"
+            falhas += 1
+        ms = 1000.0 * (time.perf_counter() - inicio)
+        n = driver.total_comandos()
+        if isinstance(res, dict):
+            res = " ".join(f"{k}={v}" for k, v in res.items() if k != "plano")
+        print(f"  {nome:<30} {n:>6} {ms:>9.1f} {ms / max(n, 1):>7.2f}  {res}")
+        if args.detalhe:
+            for cmd, k in driver.comandos.most_common():
+                print(f"      {cmd:<28} {k:>6}")
+        driver.quit()
+    print("=" * 72 + "\n")
+    return 1 if falhas else 0
+
+
+# =============================================================================
+# Benchmark de ponta a ponta
+# =============================================================================
+
+def benchmark(args) -> int:
+    """Processa as etapas do mock com o fluxo real e imprime etapas/hora e s/passo."""
+    from aplatquente import rastreio
+    from aplatquente.aplatquente import imprimir_resumo, parse_args, processar_etapa, _nova_pesquisa
+    from aplatquente.infra import create_driver, encerrar_driver, instalar_observador_messagebox, instalar_rastreador_rede
+
+    fixtures = carregar_fixtures(args.fixtures)
+    etapas = gerar_etapas(args.data, args.etapas, frio_a_cada=args.frio_a_cada)
+    estado = EstadoMock(
+        fixtures,
+        etapas,
+        latencia_pesquisa=args.latencia_pesquisa,
+        latencia_abrir=args.latencia_abrir,
+        latencia_save=args.latencia_save,
+        latencia_aba=args.latencia_aba,
+        falha_save=args.falha_save,
+    )
+    servidor = iniciar_servidor(estado, args.porta)
+    print(f"[INFO] APLAT simulado em {servidor.url} ({len(etapas)} etapa(s) em {args.data}).")
+
+    numeros = [e["numero"] for e in etapas]
+    # mesmos argumentos do CLI principal (defaults inclusos), só com a URL do mock
+    cli = parse_args(["--data", args.data, "--valor", *numeros, "--url", servidor.url] + list(args.extra or []))
+    data_ui = f"{args.data[8:10]}/{args.data[5:7]}/{args.data[:4]}"
+
+    rastreio.ativar()
+    driver = create_driver(args.browser, headless=not args.janela)
+    if cli.contar_comandos:
+        rastreio.contar_comandos(driver)
+    try:
+        driver.get(servidor.url)
+        instalar_observador_messagebox(driver)
+        instalar_rastreador_rede(driver)
+
+        pesquisa = _nova_pesquisa(driver, data_ui, cli)
+        inicio = time.perf_counter()
+        resultados = [
+            processar_etapa(driver, numero, data_ui, cli, pesquisa, conferir_tipo=not cli.qualquer_tipo)
+            for numero in numeros
+        ]
+        total_s = time.perf_counter() - inicio
+    finally:
+        encerrar_driver(driver)
+        servidor.shutdown()
+
+    imprimir_resumo(resultados)
+    rastreio.imprimir_tabela_tempos()
+    if args.trace:
+        rastreio.exportar_chrome_trace(args.trace)
+        print(f"[INFO] Trace gravado em {args.trace}.")
+
+    n = len(resultados)
+    print("====== BENCHMARK (APLAT simulado) ======")
+    print(f"  etapas:        {n}")
+    print(f"  tempo total:   {total_s:.1f}s")
+    print(f"  s/etapa:       {total_s / max(n, 1):.2f}")
+    print(f"  etapas/hora:   {3600.0 * n / max(total_s, 1e-9):.0f}")
+    print(f"  gravações:     {estado.saves}")
+    print("========================================\n")
+    return 0 if all(r["status"] != "erro" for r in resultados) else 1
+
+
+def servir(args) -> int:
+    estado = EstadoMock(
+        carregar_fixtures(args.fixtures),
+        gerar_etapas(args.data, args.etapas, frio_a_cada=args.frio_a_cada),
+        latencia_pesquisa=args.latencia_pesquisa,
+        latencia_abrir=args.latencia_abrir,
+        latencia_save=args.latencia_save,
+        latencia_aba=args.latencia_aba,
+        falha_save=args.falha_save,
+    )
+    servidor = iniciar_servidor(estado, args.porta)
+    print(f"[INFO] APLAT simulado em {servidor.url} (Ctrl+C para sair).")
+    print(f"[INFO] Etapas em {args.data}: " + ", ".join(estado.etapas))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="aplatquente mock", description="APLAT simulado local e benchmark headless")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    for nome, ajuda in (("serve", "Só sobe o site simulado"), ("bench", "Mede etapas/hora com o fluxo real, headless")):
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument("--porta", type=int, default=0 if nome == "bench" else 8018, help="Porta HTTP (0 = livre)")
+        p.add_argument("--fixtures", default=PASTA_FIXTURES_PADRAO, help="Pasta com qpt.txt, apn*.txt, epi.txt...")
+        p.add_argument("--data", default=DATA_PADRAO, help="Data das etapas (YYYY-MM-DD)")
+        p.add_argument("--etapas", type=int, default=10, help="Quantidade de etapas simuladas")
+        p.add_argument("--frio-a-cada", type=int, default=4, help="Uma etapa de Trabalho a Frio a cada N (0 = nenhuma)")
+        p.add_argument("--latencia-pesquisa", type=float, default=0.6, help="Latência da pesquisa (s)")
+        p.add_argument("--latencia-abrir", type=float, default=0.3, help="Latência ao abrir a etapa (s)")
+        p.add_argument("--latencia-save", type=float, default=0.4, help="Latência do Confirmar (s)")
+        p.add_argument("--latencia-aba", type=float, default=0.15, help="Tempo de render de cada aba (s)")
+        p.add_argument("--falha-save", type=float, default=0.0, help="Probabilidade de HTTP 500 no Confirmar")
+
+    micro = sub.add_parser("micro", help="Micro-benchmark do preenchimento no DriverMemoria (sem navegador)")
+    micro.add_argument("--fixtures", default=PASTA_FIXTURES_PADRAO, help="Pasta com qpt.txt, apn*.txt, epi.txt...")
+    micro.add_argument("--data", default=DATA_PADRAO, help="Data da etapa simulada (YYYY-MM-DD)")
+    micro.add_argument("--apn1", choices=("17", "20"), default="20", help="Questionário APN-1 usado")
+    micro.add_argument("--latencia-ms", type=float, default=0.0, help="Latência simulada por comando (ms)")
+    micro.add_argument("--filtro", help="Só os casos cujo nome contém este texto")
+    micro.add_argument("--detalhe", action="store_true", help="Contagem por comando WebDriver")
+    micro.add_argument("--verbose", action="store_true", help="Mostrar a saída das funções de preenchimento")
+
+    bench = sub.choices["bench"]
+    from aplatquente.infra import BROWSERS_SUPORTADOS
+    bench.add_argument("--browser", choices=BROWSERS_SUPORTADOS, default="chrome", help="Navegador (headless)")
+    bench.add_argument("--janela", action="store_true", help="Mostrar a janela (sem headless)")
+    bench.add_argument("--trace", help="Gravar os spans em formato Chrome trace")
+    bench.add_argument(
+        "extra",
+        nargs=argparse.REMAINDER,
+        help="Após '--': opções repassadas ao fluxo principal (ex.: -- --contar-comandos --pesquisa-por-etapa)",
+    )
+    args = parser.parse_args(argv)
+    if getattr(args, "extra", None) and args.extra[0] == "--":
+        args.extra = args.extra[1:]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.comando == "serve":
+        return servir(args)
+    if args.comando == "micro":
+        return micro_benchmark(args)
+    return benchmark(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -9,14 +9,19 @@ from __future__ import annotations
 # - APN-1: coleta dinâmica (17 ou 20), identifica por texto, responde por regras
 # =============================================================================
 
+import copy
+import hashlib
 import os
 import re
+import threading
 import unicodedata
-from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
 
 from selenium.webdriver.common.by import By
 
 from aplatquente.infra import Driver, clicar_botao_confirmar_rodape, safe_find_element
+from aplatquente.rastreio import rastreado
 
 
 # =============================================================================
@@ -42,19 +47,42 @@ def _first_present(d: dict, candidates: List[Tuple[str, ...]], default: Any) ->
     return default
 
 
+# Cache de regras por caminho: (mtime_ns, tamanho) -> regras já normalizadas.
+# Edições no YAML são recarregadas na próxima chamada (sem reiniciar o processo).
+_REGRAS_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_REGRAS_LOCK = threading.Lock()
+
+
 def carregar_regras(regras_path: Optional[str] = None) -> Dict[str, Any]:
     if regras_path is None:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "."))
         regras_path = os.path.join(base_dir, "config", "regras.yaml")
+    regras_path = os.path.abspath(regras_path)
 
+    try:
+        st = os.stat(regras_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"regras.yaml não encontrado em: {regras_path}")
+    versao = (st.st_mtime_ns, st.st_size)
+
+    with _REGRAS_LOCK:
+        hit = _REGRAS_CACHE.get(regras_path)
+        if hit is None or hit[0] != versao:
+            if hit is not None:
+                print(f"[INFO] regras.yaml alterado; recarregando: {regras_path}")
+            _REGRAS_CACHE[regras_path] = (versao, _ler_regras(regras_path))
+        regras = _REGRAS_CACHE[regras_path][1]
+
+    # cópia: quem chama pode mexer no dict sem contaminar o cache
+    return copy.deepcopy(regras)
+
+
+def _ler_regras(regras_path: str) -> Dict[str, Any]:
     try:
         import yaml  # type: ignore
     except Exception as e:
         raise RuntimeError("PyYAML não instalado. Rode: pip install pyyaml>=6.0") from e
 
-    if not os.path.exists(regras_path):
-        raise FileNotFoundError(f"regras.yaml não encontrado em: {regras_path}")
-
     with open(regras_path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f) or {}
 
@@ -95,6 +123,8 @@ def carregar_regras(regras_path: Optional[str] = None) -> Dict[str, Any]:
         "epis_categoria_base": epis_categoria_base,
         "qpt_base": qpt_base,
         "apn1_regras": apn1_regras,
+        # derivado: chave APN-1 -> regra (YAML sobre o fallback embutido)
+        "apn1_respostas": _mapa_respostas_apn1(apn1_regras),
     }
 
 
@@ -255,49 +285,194 @@ def coletar_caracteristicas(driver: Driver, timeout: float) -> str:
     return ""
 
 
+# =============================================================================
+# Detector de padrões pré-compilado (pré-filtro por literal + re.search)
+# =============================================================================
+
+# (nome, regex compilada, literais): algum literal aparece em todo casamento da
+# regex; None quando não dá para extrair (a regex roda sempre)
+_Detector = List[Tuple[str, "re.Pattern[str]", Optional[Tuple[str, ...]]]]
+
+_META_REGEX = "\\[(.*+?{|^$)"
+
+
+def _alternativas(pat: str) -> List[str]:
+    """Divide a regex nos '|' do nível de fora (respeita grupos, classes e escapes)."""
+    partes, nivel, classe, ini, i = [], 0, False, 0, 0
+    while i < len(pat):
+        c = pat[i]
+        if c == "\\":
+            i += 2
+            continue
+        if classe:
+            classe = c != "]"
+        elif c == "[":
+            classe = True
+        elif c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+        elif c == "|" and nivel == 0:
+            partes.append(pat[ini:i])
+            ini = i + 1
+        i += 1
+    partes.append(pat[ini:])
+    return partes
+
+
+def _fim_do_grupo(pat: str, ini: int) -> int:
+    """Índice do ')' que fecha o grupo aberto em pat[ini]."""
+    nivel, classe, i = 0, False, ini
+    while i < len(pat):
+        c = pat[i]
+        if c == "\\":
+            i += 2
+            continue
+        if classe:
+            classe = c != "]"
+        elif c == "[":
+            classe = True
+        elif c == "(":
+            nivel += 1
+        elif c == ")":
+            nivel -= 1
+            if nivel == 0:
+                return i
+        i += 1
+    return -1
+
+
+def _trechos_fixos(alt: str) -> List[str]:
+    """Trechos de texto fixo no nível de fora da alternativa (fora de grupos/classes/escapes)."""
+    trechos, atual, i = [], "", 0
+    while i < len(alt):
+        c = alt[i]
+        if c not in _META_REGEX:
+            atual += c
+            i += 1
+            continue
+        if c in "?*{":
+            atual = atual[:-1]  # o último caractere é opcional
+        trechos.append(atual)
+        atual = ""
+        if c == "\\":
+            i += 2
+        elif c == "(":
+            fim = _fim_do_grupo(alt, i)
+            i = fim + 1 if fim >= 0 else len(alt)
+        elif c in "[{":
+            fim = alt.find("]" if c == "[" else "}", i + 2)
+            i = fim + 1 if fim >= 0 else len(alt)
+        else:
+            i += 1
+    trechos.append(atual)
+    return [t for t in trechos if t]
+
+
+def _literais(pat: str) -> Optional[List[str]]:
+    """
+    Literais obrigatórios da regex: de cada alternativa, o maior trecho de texto
+    fixo (ou, sem nenhum, os literais do grupo com que ela começa). Todo casamento
+    contém algum deles. None se alguma alternativa não tem texto fixo garantido
+    ou a regex usa construções (?...) (flags embutidas, lookarounds).
+    """
+    if "(?" in pat:
+        return None
+    literais: List[str] = []
+    for alt in _alternativas(pat):
+        trechos = _trechos_fixos(alt)
+        if trechos:
+            literais.append(max(trechos, key=len))
+            continue
+        i = 0
+        while alt.startswith("\\b", i):
+            i += 2
+        fim = _fim_do_grupo(alt, i) if alt[i:i + 1] == "(" else -1
+        if fim < 0 or alt[i + 1:i + 2] == "?" or alt[fim + 1:fim + 2] in ("?", "*", "{"):
+            return None
+        internos = _literais(alt[i + 1:fim])
+        if not internos:
+            return None
+        literais.extend(internos)
+    return literais
+
+
+def _compilar_detector(padroes: List[Tuple[str, str]]) -> _Detector:
+    """Compila (nome, regex) com os literais do pré-filtro de cada padrão."""
+    detector: _Detector = []
+    for nome, pat in padroes:
+        literais = _literais(pat)
+        detector.append((nome, re.compile(pat), tuple(dict.fromkeys(literais)) if literais else None))
+    return detector
+
+
+def _detectar(detector: _Detector, texto: str) -> Set[str]:
+    """
+    Nomes dos padrões que casam em algum ponto do texto (mesmo resultado de
+    re.search por padrão). A regex só roda quando algum literal dela aparece no
+    texto (busca de substring, bem mais barata que a regex).
+    """
+    achados: Set[str] = set()
+    for nome, rx, literais in detector:
+        if literais is not None and not any(lit in texto for lit in literais):
+            continue
+        if rx.search(texto):
+            achados.add(nome)
+    return achados
+
+
 # =============================================================================
 # Contexto (flags)
 # =============================================================================
 
+_CTX_PATTERNS: List[Tuple[str, str]] = [
+    ("tem_espaco_confinado", r"\b(ESPACO CONFINADO|ESPAÇO CONFINADO|INTERIOR DE|DENTRO DE|TANQUE|VASO|CALDEIRA)\b"),
+    ("tem_altura", r"\b(TRABALHO EM ALTURA|NR\s*35|NR-35|ALTURA ACIMA DE 2M|ACIMA DE 2M)\b"),
+    ("tem_acesso_cordas", r"\b(ACESSO POR CORDAS|TRABALHO POR CORDAS|ALPINISMO INDUSTRIAL)\b"),
+    ("tem_sobre_o_mar", r"\b(SOBRE O MAR)\b"),
+
+    ("tem_chama", r"\b(CHAMA ABERTA|OXICORTE|MA[ÇC]ARICO|SOLD(A|AGEM)|CORTE|ESMERIL)\b"),
+    ("tem_trat_mec", r"\b(TRATAMENTO MECANICO|TRATAMENTO MECÂNICO|TRAT\.?\s*MEC)\b"),
+    ("tem_lixadeira", r"\b(ESMERILHADEIRA|ESMERIL|LIXADEIRA|POLITRIZ|DESBASTE)\b"),
+
+    ("tem_hidrojato", r"\b(HIDROJATEAMENTO|HIDRO JATO|HIDROJATO|JATO DE AGUA|JATO DE ÁGUA)\b"),
+    ("tem_partes_moveis", r"\b(PARTES MOVEIS|PARTES M[ÓO]VEIS|EIXO GIRANDO|CORREIA|ENGRENAGEM)\b"),
+    ("tem_pressurizado", r"\b(PRESSURIZAD|PRESSAO|PRESSÃO|LINHA PRESSURIZADA|VASO PRESSURIZADO|ABERTURA DE LINHA|ABERTURA DE EQUIPAMENTO)\b"),
+    ("tem_eletricidade", r"\b(ELETRIC|EL[ÉE]TRIC|ENERGIZAD|PAINEL|QUADRO ELETRICO|QUADRO EL[ÉE]TRICO|ARCO ELETRICO|ARCO EL[ÉE]TRICO)\b"),
+
+    ("tem_h2s", r"\b(H2S|SULFETO DE HIDROGENIO|SULFETO DE HIDROG[ÊE]NIO)\b"),
+    ("tem_radiacao", r"\b(RADIACAO IONIZANTE|RADIAÇÃO IONIZANTE)\b"),
+    ("tem_mergulho", r"\b(MERGULHO)\b"),
+    ("tem_temperatura_extrema", r"\b(TEMPERATURA EXTREMA|SUPERFICIE QUENTE|SUPERFÍCIE QUENTE|PROTECAO TERMICA|PROTEÇÃO TÉRMICA|FRIO EXTREMO|CRIOG[ÊE]NIC)\b"),
+
+    ("tem_intervencao_controle_ou_protecao_paineis", r"\b(CIRCUITO DE CONTROLE|CIRCUITO DE PROTECAO|CIRCUITO DE PROTEÇÃO|PAINEL(ES)? ELETRIC|PAIN[ÉE]IS EL[ÉE]TRIC)\b"),
+    ("tem_intervencao_nobreak_cc_critico", r"\b(NO-?BREAK|CORRENTE CONTINUA|CORRENTE CONTÍNUA|CC CRITIC|DC CRITIC)\b"),
+    ("tem_interferencia_outras_areas", r"\b(INTERFERIR NA SEGURANCA OPERACIONAL|INTERFERIR NA SEGURANÇA OPERACIONAL|OUTRAS AREAS|OUTRAS ÁREAS)\b"),
+    ("tem_centelha_faisca_estatica", r"\b(CENTELH|FAISC|ESTATICA|ESTÁTICA|ELETRICIDADE ESTATICA|ELETRICIDADE ESTÁTICA)\b"),
+
+    # Novas do modelo 20:
+    ("tem_produtos_quimicos", r"\b(PRODUTOS QUIMICOS|PRODUTOS QUÍMICOS|SUBSTANCIA CORROSIVA|SUBSTÂNCIA CORROSIVA|TOXIC|TÓXIC|ASFIXIANTE)\b"),
+    ("tem_co2", r"\b(CO2|DI(O|Ó)XIDO DE CARBONO|AMBIENTES PROTEGIDOS POR CO2|PROTEGID(O|A)S? POR CO2)\b"),
+
+    # Q020 (indisponibilidade do SCI) – deixo como flag separada
+    ("tem_sci_indisp", r"\b(INDISPONIBILIDADE.*(COMBATE A INCENDIO|COMBATE A INC[ÊE]NDIO)|PROVOCANDO SUA INDISPONIBILIDADE)\b"),
+]
+
+_CTX_DETECTOR = _compilar_detector(_CTX_PATTERNS)
+
+
+@lru_cache(maxsize=256)
+def _flags_contexto(texto_full: str) -> FrozenSet[str]:
+    return frozenset(_detectar(_CTX_DETECTOR, texto_full))
+
+
 def montar_contexto(descricao: str, caracteristicas: str) -> Dict[str, Any]:
     texto_full = normalizar_texto(f"{descricao} {caracteristicas}")
     ctx: Dict[str, Any] = {"texto_full": texto_full}
 
-    patterns: Dict[str, str] = {
-        "tem_espaco_confinado": r"\b(ESPACO CONFINADO|ESPAÇO CONFINADO|INTERIOR DE|DENTRO DE|TANQUE|VASO|CALDEIRA)\b",
-        "tem_altura": r"\b(TRABALHO EM ALTURA|NR\s*35|NR-35|ALTURA ACIMA DE 2M|ACIMA DE 2M)\b",
-        "tem_acesso_cordas": r"\b(ACESSO POR CORDAS|TRABALHO POR CORDAS|ALPINISMO INDUSTRIAL)\b",
-        "tem_sobre_o_mar": r"\b(SOBRE O MAR)\b",
-
-        "tem_chama": r"\b(CHAMA ABERTA|OXICORTE|MA[ÇC]ARICO|SOLD(A|AGEM)|CORTE|ESMERIL)\b",
-        "tem_trat_mec": r"\b(TRATAMENTO MECANICO|TRATAMENTO MECÂNICO|TRAT\.?\s*MEC)\b",
-        "tem_lixadeira": r"\b(ESMERILHADEIRA|ESMERIL|LIXADEIRA|POLITRIZ|DESBASTE)\b",
-
-        "tem_hidrojato": r"\b(HIDROJATEAMENTO|HIDRO JATO|HIDROJATO|JATO DE AGUA|JATO DE ÁGUA)\b",
-        "tem_partes_moveis": r"\b(PARTES MOVEIS|PARTES M[ÓO]VEIS|EIXO GIRANDO|CORREIA|ENGRENAGEM)\b",
-        "tem_pressurizado": r"\b(PRESSURIZAD|PRESSAO|PRESSÃO|LINHA PRESSURIZADA|VASO PRESSURIZADO|ABERTURA DE LINHA|ABERTURA DE EQUIPAMENTO)\b",
-        "tem_eletricidade": r"\b(ELETRIC|EL[ÉE]TRIC|ENERGIZAD|PAINEL|QUADRO ELETRICO|QUADRO EL[ÉE]TRICO|ARCO ELETRICO|ARCO EL[ÉE]TRICO)\b",
-
-        "tem_h2s": r"\b(H2S|SULFETO DE HIDROGENIO|SULFETO DE HIDROG[ÊE]NIO)\b",
-        "tem_radiacao": r"\b(RADIACAO IONIZANTE|RADIAÇÃO IONIZANTE)\b",
-        "tem_mergulho": r"\b(MERGULHO)\b",
-        "tem_temperatura_extrema": r"\b(TEMPERATURA EXTREMA|SUPERFICIE QUENTE|SUPERFÍCIE QUENTE|PROTECAO TERMICA|PROTEÇÃO TÉRMICA|FRIO EXTREMO|CRIOG[ÊE]NIC)\b",
-
-        "tem_intervencao_controle_ou_protecao_paineis": r"\b(CIRCUITO DE CONTROLE|CIRCUITO DE PROTECAO|CIRCUITO DE PROTEÇÃO|PAINEL(ES)? ELETRIC|PAIN[ÉE]IS EL[ÉE]TRIC)\b",
-        "tem_intervencao_nobreak_cc_critico": r"\b(NO-?BREAK|CORRENTE CONTINUA|CORRENTE CONTÍNUA|CC CRITIC|DC CRITIC)\b",
-        "tem_interferencia_outras_areas": r"\b(INTERFERIR NA SEGURANCA OPERACIONAL|INTERFERIR NA SEGURANÇA OPERACIONAL|OUTRAS AREAS|OUTRAS ÁREAS)\b",
-        "tem_centelha_faisca_estatica": r"\b(CENTELH|FAISC|ESTATICA|ESTÁTICA|ELETRICIDADE ESTATICA|ELETRICIDADE ESTÁTICA)\b",
-
-        # Novas do modelo 20:
-        "tem_produtos_quimicos": r"\b(PRODUTOS QUIMICOS|PRODUTOS QUÍMICOS|SUBSTANCIA CORROSIVA|SUBSTÂNCIA CORROSIVA|TOXIC|TÓXIC|ASFIXIANTE)\b",
-        "tem_co2": r"\b(CO2|DI(O|Ó)XIDO DE CARBONO|AMBIENTES PROTEGIDOS POR CO2|PROTEGID(O|A)S? POR CO2)\b",
-
-        # Q020 (indisponibilidade do SCI) – deixo como flag separada
-        "tem_sci_indisp": r"\b(INDISPONIBILIDADE.*(COMBATE A INCENDIO|COMBATE A INC[ÊE]NDIO)|PROVOCANDO SUA INDISPONIBILIDADE)\b",
-    }
-
-    for k, pat in patterns.items():
-        ctx[k] = bool(re.search(pat, texto_full))
+    achados = _flags_contexto(texto_full)
+    for k, _pat in _CTX_PATTERNS:
+        ctx[k] = k in achados
 
     ctx["hazard_olhos"] = bool(ctx.get("tem_chama") or ctx.get("tem_trat_mec") or ctx.get("tem_lixadeira"))
     return ctx
@@ -387,25 +562,148 @@ _APN1_PATTERNS: List[Tuple[str, str]] = [
 ]
 
 
+_APN1_DETECTOR = _compilar_detector(_APN1_PATTERNS)
+
+
 def _identificar_chave_apn1(pergunta_norm: str) -> Optional[str]:
-    for key, pat in _APN1_PATTERNS:
-        if re.search(pat, pergunta_norm):
+    # a primeira chave (na ordem de _APN1_PATTERNS) que casa tem prioridade
+    achados = _detectar(_APN1_DETECTOR, pergunta_norm)
+    for key, _pat in _APN1_PATTERNS:
+        if key in achados:
             return key
     return None
 
 
-def coletar_apn1_itens(driver: Driver, timeout: float) -> List[Dict[str, Any]]:
-    itens: List[Dict[str, Any]] = []
+_APN1_ROW_XPATHS: List[str] = [
+    "//app-apn1-da-etapa//div[starts-with(@id,'questao_') and contains(@class,'row')]",
+    "//app-apn1-da-etapa//app-questionario//form//div[starts-with(@id,'questao_')]",
+]
 
-    rows = driver.find_elements(
-        By.XPATH,
-        "//app-apn1-da-etapa//div[starts-with(@id,'questao_') and contains(@class,'row')]"
-    )
-    if not rows:
-        rows = driver.find_elements(
-            By.XPATH,
-            "//app-apn1-da-etapa//app-questionario//form//div[starts-with(@id,'questao_')]"
+# Snapshot da APN-1 em um único execute_script (evita ~6 round trips por linha).
+# Recebe a lista de XPaths de linhas (mesma ordem de fallback do caminho por linha).
+_JS_SNAPSHOT_APN1 = r"""
+const xps = arguments[0] || [];
+const norm = (s) => (s || '').replace(/\s+/g, ' ').trim();
+const txt = (el) => el ? norm(el.innerText || el.textContent || '') : '';
+
+let rows = [];
+for (const xp of xps) {
+  const snap = document.evaluate(xp, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < snap.snapshotLength; i++) rows.push(snap.snapshotItem(i));
+  if (rows.length) break;
+}
+
+return rows.map((row) => {
+  const ordem = txt(row.querySelector('div[class*="ordem"]'));
+  let pergunta = txt(row.querySelector('div[class*="pergunta"]'));
+  if (!pergunta) pergunta = txt(row);
+
+  let idSim = '', idNao = '';
+  for (const lb of row.querySelectorAll('label')) {
+    const t = norm(lb.textContent);
+    if (!idSim && t === 'Sim') idSim = (lb.getAttribute('for') || '').trim();
+    if (!idNao && (t === 'Não' || t === 'Nao')) idNao = (lb.getAttribute('for') || '').trim();
+  }
+
+  let sel = null;
+  const inpSim = idSim ? document.getElementById(idSim) : null;
+  const inpNao = idNao ? document.getElementById(idNao) : null;
+  if (inpSim && inpSim.checked) sel = 'Sim';
+  else if (inpNao && inpNao.checked) sel = 'Não';
+
+  return {ordem, pergunta, id_sim: idSim, id_nao: idNao, selecionado_atual: sel, row_id: row.id || ''};
+});
+"""
+
+
+def _coletar_apn1_itens_snapshot(driver: Driver) -> Optional[List[Dict[str, Any]]]:
+    """
+    Coleta todas as linhas da APN-1 com um único execute_script.
+    Retorna None se o script falhar (o chamador usa o caminho por linha).
+    """
+    try:
+        raw = driver.execute_script(_JS_SNAPSHOT_APN1, _APN1_ROW_XPATHS)
+    except Exception as e:
+        print(f"[DEBUG] Snapshot APN-1 falhou, usando coleta por linha: {e}")
+        return None
+
+    if not isinstance(raw, list):
+        return None
+
+    itens: List[Dict[str, Any]] = []
+    for r in raw:
+        if not isinstance(r, dict):
+            continue
+        pergunta = (r.get("pergunta") or "").strip()
+        itens.append(
+            {
+                "ordem": (r.get("ordem") or "").strip(),
+                "pergunta": pergunta,
+                "pergunta_norm": normalizar_texto(pergunta),
+                "id_sim": (r.get("id_sim") or "").strip(),
+                "id_nao": (r.get("id_nao") or "").strip(),
+                "selecionado_atual": r.get("selecionado_atual"),
+                "row_id": r.get("row_id") or "",
+            }
         )
+    return itens
+
+
+# Só os textos das perguntas (mesma extração do snapshot) para comparar fingerprint.
+_JS_PERGUNTAS_APN1 = r"""
+const xps = arguments[0] || [];
+const norm = (s) => (s || '').replace(/\s+/g, ' ').trim();
+const txt = (el) => el ? norm(el.innerText || el.textContent || '') : '';
+
+let rows = [];
+for (const xp of xps) {
+  const snap = document.evaluate(xp, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < snap.snapshotLength; i++) rows.push(snap.snapshotItem(i));
+  if (rows.length) break;
+}
+return rows.map((row) => txt(row.querySelector('div[class*="pergunta"]')) || txt(row));
+"""
+
+
+def fingerprint_apn1(perguntas_norm: List[str]) -> str:
+    """Fingerprint barato do questionário APN-1: quantidade + hash dos textos normalizados."""
+    h = hashlib.sha1("\n".join(perguntas_norm).encode("utf-8")).hexdigest()[:16]
+    return f"{len(perguntas_norm)}:{h}"
+
+
+def fingerprint_apn1_dom(driver: Driver) -> Optional[str]:
+    """Fingerprint das questões APN-1 atualmente no DOM (um execute_script); None se falhar."""
+    try:
+        perguntas = driver.execute_script(_JS_PERGUNTAS_APN1, _APN1_ROW_XPATHS)
+    except Exception:
+        return None
+    if not isinstance(perguntas, list):
+        return None
+    return fingerprint_apn1([normalizar_texto(str(p or "")) for p in perguntas])
+
+
+def coletar_apn1_itens(driver: Driver, timeout: float, snapshot: bool = True) -> List[Dict[str, Any]]:
+    """
+    Coleta as questões da APN-1 (ordem, pergunta, ids dos radios, seleção atual).
+    Por padrão usa o snapshot em um único script; cai para a coleta por linha
+    se o script falhar.
+    """
+    if snapshot:
+        itens = _coletar_apn1_itens_snapshot(driver)
+        if itens is not None:
+            return itens
+
+    return _coletar_apn1_itens_por_linha(driver)
+
+
+def _coletar_apn1_itens_por_linha(driver: Driver) -> List[Dict[str, Any]]:
+    itens: List[Dict[str, Any]] = []
+
+    rows = []
+    for xp in _APN1_ROW_XPATHS:
+        rows = driver.find_elements(By.XPATH, xp)
+        if rows:
+            break
 
     for row in rows:
         try:
@@ -477,35 +775,55 @@ def _resolver_resposta_apn1_por_regra(ctx: Dict[str, Any], regra: Any) -> str:
     return "Não"
 
 
-def decidir_respostas_apn1(ctx: Dict[str, Any], itens: List[Dict[str, Any]], apn1_regras: Dict[str, Any]) -> List[Dict[str, Any]]:
+_APN1_FALLBACK_MAP: Dict[str, str] = {
+    "alteracao_condicoes_operacionais": "Não",
+    "temperatura_extrema": "tem_temperatura_extrema",
+    "intervencao_controle_ou_protecao_paineis": "tem_intervencao_controle_ou_protecao_paineis",
+    "intervencao_nobreak_cc_critico": "tem_intervencao_nobreak_cc_critico",
+    "interfere_outras_areas": "tem_interferencia_outras_areas",
+    "espaco_confinado": "tem_espaco_confinado",
+    "altura_nr35": "tem_altura",
+    "sobre_o_mar": "tem_sobre_o_mar",
+    "risco_h2s": "tem_h2s",
+    "chama_aberta_area_classificada": "tem_chama",
+    "risco_centelha_faisca_estatica": "tem_centelha_faisca_estatica",
+    "radiacao_ionizante": "tem_radiacao",
+    "abertura_linha_pressurizado": "tem_pressurizado",
+    "choque_ou_arco_eletrico": "tem_eletricidade",
+    "partes_moveis": "tem_partes_moveis",
+    "produtos_quimicos": "tem_produtos_quimicos",
+    "mergulho": "tem_mergulho",
+    "hidrojateamento": "tem_hidrojato",
+    "combate_incendio_co2": "tem_co2",
+    "combate_incendio_indisponibilidade": "tem_sci_indisp",
+}
+
+
+def _mapa_respostas_apn1(apn1_regras: Any) -> Dict[str, Any]:
+    """Chave APN-1 -> regra; respostas do YAML têm prioridade sobre o fallback embutido."""
     respostas_yaml = {}
     if isinstance(apn1_regras, dict):
         respostas_yaml = apn1_regras.get("respostas") or {}
     if not isinstance(respostas_yaml, dict):
         respostas_yaml = {}
 
-    fallback_map = {
-        "alteracao_condicoes_operacionais": "Não",
-        "temperatura_extrema": "tem_temperatura_extrema",
-        "intervencao_controle_ou_protecao_paineis": "tem_intervencao_controle_ou_protecao_paineis",
-        "intervencao_nobreak_cc_critico": "tem_intervencao_nobreak_cc_critico",
-        "interfere_outras_areas": "tem_interferencia_outras_areas",
-        "espaco_confinado": "tem_espaco_confinado",
-        "altura_nr35": "tem_altura",
-        "sobre_o_mar": "tem_sobre_o_mar",
-        "risco_h2s": "tem_h2s",
-        "chama_aberta_area_classificada": "tem_chama",
-        "risco_centelha_faisca_estatica": "tem_centelha_faisca_estatica",
-        "radiacao_ionizante": "tem_radiacao",
-        "abertura_linha_pressurizado": "tem_pressurizado",
-        "choque_ou_arco_eletrico": "tem_eletricidade",
-        "partes_moveis": "tem_partes_moveis",
-        "produtos_quimicos": "tem_produtos_quimicos",
-        "mergulho": "tem_mergulho",
-        "hidrojateamento": "tem_hidrojato",
-        "combate_incendio_co2": "tem_co2",
-        "combate_incendio_indisponibilidade": "tem_sci_indisp",
-    }
+    mapa: Dict[str, Any] = dict(_APN1_FALLBACK_MAP)
+    mapa.update(respostas_yaml)
+    return mapa
+
+
+def decidir_respostas_apn1(
+    ctx: Dict[str, Any],
+    itens: List[Dict[str, Any]],
+    apn1_regras: Dict[str, Any],
+    respostas: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Decide Sim/Não para cada questão APN-1 identificada pelo texto.
+    respostas: mapa já derivado (regras["apn1_respostas"]); se None, deriva de apn1_regras.
+    """
+    if respostas is None:
+        respostas = _mapa_respostas_apn1(apn1_regras)
 
     out: List[Dict[str, Any]] = []
 
@@ -513,10 +831,8 @@ def decidir_respostas_apn1(ctx: Dict[str, Any], itens: List[Dict[str, Any]], apn
         pergunta_norm = it.get("pergunta_norm", "")
         key = _identificar_chave_apn1(pergunta_norm)
 
-        if key and key in respostas_yaml:
-            resp = _resolver_resposta_apn1_por_regra(ctx, respostas_yaml[key])
-        elif key and key in fallback_map:
-            resp = _resolver_resposta_apn1_por_regra(ctx, fallback_map[key])
+        if key and key in respostas:
+            resp = _resolver_resposta_apn1_por_regra(ctx, respostas[key])
         else:
             resp = "Não"
             print(f"[WARN] APN-1 não reconhecida: ordem={it.get('ordem','?')} row={it.get('row_id','')} :: {pergunta_norm[:180]}")
@@ -533,24 +849,39 @@ def decidir_respostas_apn1(ctx: Dict[str, Any], itens: List[Dict[str, Any]], apn
 # Orquestração
 # =============================================================================
 
+@rastreado()
 def gerar_plano_trabalho_quente(driver: Driver, timeout: float, regras_path: Optional[str] = None) -> Dict[str, Any]:
     regras = carregar_regras(regras_path)
 
     descricao = coletar_descricao(driver, timeout)
     caracteristicas = coletar_caracteristicas(driver, timeout)
+    apn1_itens = coletar_apn1_itens(driver, timeout)
+
+    return montar_plano(descricao, caracteristicas, apn1_itens, regras)
 
+
+def montar_plano(
+    descricao: str,
+    caracteristicas: str,
+    apn1_itens: List[Dict[str, Any]],
+    regras: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Parte pura do plano (sem driver): contexto, bases ajustadas e decisões da APN-1.
+    apn1_itens: itens como os de coletar_apn1_itens (ou itens_apn1_de_textos).
+    """
     ctx = montar_contexto(descricao, caracteristicas)
 
     qpt = ajustar_base_qpt(ctx, regras["qpt_base"])
-    epi_radios = ajustar_base_epi_radios(ctx, regras["epi_radios_base"])
     epis_cat = ajustar_base_epis_categoria(ctx, regras["epis_categoria_base"])
 
-    apn1_itens = coletar_apn1_itens(driver, timeout)
-    apn1_itens = decidir_respostas_apn1(ctx, apn1_itens, regras.get("apn1_regras", {}))
+    apn1_itens = decidir_respostas_apn1(ctx, apn1_itens, regras.get("apn1_regras", {}), regras.get("apn1_respostas"))
 
     epi_radios = ajustar_base_epi_radios(ctx, regras["epi_radios_base"])
     epi_radios_ordem = epi_radios_para_ordem(epi_radios)
 
+    apn1_fingerprint = fingerprint_apn1([it.get("pergunta_norm", "") for it in apn1_itens])
+
     apn1_por_ordem: Dict[str, str] = {}
     for it in apn1_itens:
         ordem = (it.get("ordem") or "").strip()
@@ -568,16 +899,61 @@ def gerar_plano_trabalho_quente(driver: Driver, timeout: float, regras_path: Opt
         "epis_cat": epis_cat,
         "apn1_itens": apn1_itens,
         "apn1_por_ordem": apn1_por_ordem,
+        "apn1_fingerprint": apn1_fingerprint,
     }
 
 
+def itens_apn1_de_textos(perguntas: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Monta itens APN-1 (formato de coletar_apn1_itens) a partir de textos exportados.
+    Aceita strings (ordem = posição 001..) ou dicts {"ordem", "pergunta"}.
+    """
+    itens: List[Dict[str, Any]] = []
+    for idx, p in enumerate(perguntas or [], 1):
+        if isinstance(p, dict):
+            ordem = str(p.get("ordem") or "").strip() or f"{idx:03d}"
+            pergunta = str(p.get("pergunta") or "").strip()
+        else:
+            ordem = f"{idx:03d}"
+            pergunta = str(p or "").strip()
+        if not pergunta:
+            continue
+        itens.append(
+            {
+                "ordem": ordem,
+                "pergunta": pergunta,
+                "pergunta_norm": normalizar_texto(pergunta),
+                "id_sim": "",
+                "id_nao": "",
+                "selecionado_atual": None,
+                "row_id": "",
+            }
+        )
+    return itens
+
+
 # =============================================================================
 # Aplicação do plano
 # =============================================================================
-def aplicar_plano(driver, plano: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+@rastreado()
+def aplicar_plano(
+    driver,
+    plano: Dict[str, Any],
+    timeout: float,
+    pular: Optional[Set[str]] = None,
+    ao_concluir_aba: Optional[Callable[[str, Any], None]] = None,
+    diff: bool = False,
+) -> Dict[str, Any]:
     """
     Aplica o plano gerado preenchendo as abas relevantes.
     Regra operacional: cada rotina de preenchimento já confirma a aba antes de trocar.
+
+    pular: chaves de aba (qpt, analise_ambiental, epi_radios, epi_cat, apn1) já
+    concluídas numa execução anterior (--resume); ficam como {"retomada": True}.
+    ao_concluir_aba(chave, resultado): chamado ao fim de cada aba (também com
+    {"erro": ...} quando ela falha), para o diário de execução.
+    diff: cada aba lê a seleção atual, só clica no que difere do plano e não
+    confirma quando não há diferença (ver houve_alteracao).
     """
 
     resultado: Dict[str, Any] = {
@@ -601,51 +977,110 @@ def aplicar_plano(driver, plano: Dict[str, Any], timeout: float) -> Dict[str, An
         resultado["warnings"].append(f"Imports de preenchimento/epi falharam: {e}")
         return resultado
 
+    pular = set(pular or ())
+    for chave in pular:
+        resultado[chave] = {"retomada": True}
+    planejadas = abas_planejadas(plano)
+
+    def concluir(chave: str, res: Any) -> None:
+        resultado[chave] = res
+        if ao_concluir_aba is not None:
+            ao_concluir_aba(chave, res)
+
+    def falhou(chave: str, aviso: str, e: Exception) -> None:
+        resultado["warnings"].append(f"{aviso}: {e}")
+        if ao_concluir_aba is not None:
+            ao_concluir_aba(chave, {"erro": str(e)})
+
     # 1) Questionário PT
     try:
         qpt = plano.get("qpt", {}) or plano.get("questionario_pt", {}) or {}
-        if qpt:
-            resultado["qpt"] = preencher_questionario_pt(driver, qpt, timeout)
+        if "qpt" in planejadas and "qpt" not in pular:
+            concluir("qpt", preencher_questionario_pt(driver, qpt, timeout, diff=diff))
     except Exception as e:
-        resultado["warnings"].append(f"Questionário PT não aplicado: {e}")
+        falhou("qpt", "Questionário PT não aplicado", e)
 
     # 2) Análise Ambiental
     try:
-        resultado["analise_ambiental"] = preencher_analise_ambiental(driver, timeout)
+        if "analise_ambiental" in planejadas and "analise_ambiental" not in pular:
+            concluir("analise_ambiental", preencher_analise_ambiental(driver, timeout, diff=diff))
     except Exception as e:
-        resultado["warnings"].append(f"Análise Ambiental não aplicada: {e}")
+        falhou("analise_ambiental", "Análise Ambiental não aplicada", e)
 
     # 3) EPI adicional (radios)
     try:
         epi_rad_raw = plano.get("epi_radios", {}) or plano.get("epi_adicional", {}) or {}
-        if epi_rad_raw:
+        if "epi_radios" in planejadas and "epi_radios" not in pular:
             epi_rad_payload = dict(epi_rad_raw)
             epi_rad_payload.update(plano.get("epi_radios_ordem", {}) or epi_radios_para_ordem(epi_rad_raw))
 
-            resultado["epi_radios"] = preencher_epi_adicional(driver, epi_rad_payload, timeout)
+            concluir("epi_radios", preencher_epi_adicional(driver, epi_rad_payload, timeout, diff=diff))
     except Exception as e:
-        resultado["warnings"].append(f"EPI adicional não aplicado: {e}")
+        falhou("epi_radios", "EPI adicional não aplicado", e)
 
 
     # 4) EPIs por categoria
     try:
         epi_cat = plano.get("epis_cat", {}) or plano.get("epi_categoria", {}) or {}
-        if epi_cat:
-            resultado["epi_cat"] = processar_aba_epi(driver, epi_cat, timeout)
+        if "epi_cat" in planejadas and "epi_cat" not in pular:
+            res_epi = processar_aba_epi(driver, epi_cat, timeout, diff=diff)
+            if res_epi is None:
+                # processar_aba_epi engole o erro e devolve None
+                raise RuntimeError("aba EPI sem resultado")
+            concluir("epi_cat", res_epi)
     except Exception as e:
-        resultado["warnings"].append(f"EPI por categoria não aplicada: {e}")
+        falhou("epi_cat", "EPI por categoria não aplicada", e)
 
     # 5) APN-1
     try:
-        desc = plano.get("descricao", "") or ""
-        carac = plano.get("caracteristicas", "") or ""
-        resultado["apn1"] = preencher_apn1(driver, timeout, desc, carac)
+        if "apn1" in planejadas and "apn1" not in pular:
+            desc = plano.get("descricao", "") or ""
+            carac = plano.get("caracteristicas", "") or ""
+            concluir("apn1", preencher_apn1(driver, timeout, desc, carac, plano=plano, diff=diff))
     except Exception as e:
-        resultado["warnings"].append(f"APN-1 não aplicada: {e}")
+        falhou("apn1", "APN-1 não aplicada", e)
 
     return resultado
 
 
+_CHAVES_ABAS = ("qpt", "analise_ambiental", "epi_radios", "epi_cat", "apn1")
+
+
+def abas_planejadas(plano: Dict[str, Any]) -> List[str]:
+    """Abas que aplicar_plano preenche para este plano (as sem itens no plano ficam de fora)."""
+    tem = {
+        "qpt": plano.get("qpt") or plano.get("questionario_pt"),
+        "analise_ambiental": True,
+        "epi_radios": plano.get("epi_radios") or plano.get("epi_adicional"),
+        "epi_cat": plano.get("epis_cat") or plano.get("epi_categoria"),
+        "apn1": True,
+    }
+    return [chave for chave in _CHAVES_ABAS if tem[chave]]
+
+
+def houve_alteracao(resultado: Dict[str, Any], planejadas: Optional[List[str]] = None) -> bool:
+    """
+    False só se nenhuma aba clicou em nada (todas com alteradas == 0 ou não
+    executadas) e não houve aviso: aí o Confirmar do rodapé é dispensável.
+    planejadas: abas do plano (abas_planejadas); uma delas sem resultado (None:
+    a rotina engoliu um erro) conta como alteração, para não pular o Confirmar.
+    Aba retomada ({"retomada": True}) também conta: foi alterada numa execução
+    anterior que não chegou a confirmar a etapa (senão nem seria reaberta).
+    """
+    if resultado.get("warnings"):
+        return True
+    for chave in _CHAVES_ABAS:
+        res = resultado.get(chave)
+        if res is None and planejadas is not None and chave in planejadas:
+            return True
+        if isinstance(res, dict) and res.get("retomada"):
+            return True
+        if res is None or (isinstance(res, dict) and res.get("alteradas") == 0):
+            continue
+        return True
+    return False
+
+
 def imprimir_plano(plano: Dict[str, Any]) -> None:
     print("\n====== PLANO DE TRABALHO A QUENTE GERADO ======")
     print(f"regras.yaml: {plano.get('regras_path','')}")
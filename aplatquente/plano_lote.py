@@ -0,0 +1,171 @@
+# aplatquente/plano_lote.py
+from __future__ import annotations
+
+# =============================================================================
+# Geração de planos em lote, sem navegador
+# - Entrada: CSV ou JSONL com etapa, descrição, características e,
+#   opcionalmente, os textos das perguntas da APN-1
+# - Saída: um plano por linha (JSONL), em streaming
+# - Uso: python -m aplatquente.aplatquente plan etapas.csv --saida planos.jsonl
+# =============================================================================
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from aplatquente.plano import carregar_regras, itens_apn1_de_textos, montar_plano
+
+
+# Nomes de coluna/campo aceitos (normalizados sem acento, minúsculos)
+_CAMPOS = {
+    "etapa": ("etapa", "numero", "numero_etapa", "valor"),
+    "descricao": ("descricao", "descricao_etapa"),
+    "caracteristicas": ("caracteristicas", "caracteristicas_trabalho"),
+    "apn1": ("apn1", "apn1_perguntas", "perguntas_apn1"),
+}
+
+
+def _chave(nome: str) -> str:
+    n = unicodedata.normalize("NFKD", nome or "")
+    n = "".join(ch for ch in n if not unicodedata.combining(ch))
+    return n.strip().lower().replace(" ", "_")
+
+
+def _campo(reg: Dict[str, Any], campo: str) -> Any:
+    normalizado = {_chave(k): v for k, v in reg.items()}
+    for nome in _CAMPOS[campo]:
+        if nome in normalizado and normalizado[nome] not in (None, ""):
+            return normalizado[nome]
+    return None
+
+
+def _perguntas_apn1(valor: Any) -> List[Any]:
+    """Lista JSON, ou texto com uma pergunta por linha / separadas por '|'."""
+    if not valor:
+        return []
+    if isinstance(valor, list):
+        return valor
+    texto = str(valor).strip()
+    if texto.startswith("["):
+        try:
+            lista = json.loads(texto)
+            if isinstance(lista, list):
+                return lista
+        except ValueError:
+            pass
+    sep = "\n" if "\n" in texto else "|"
+    return [p.strip() for p in texto.split(sep) if p.strip()]
+
+
+def ler_registros(caminho: str) -> Iterator[Dict[str, Any]]:
+    """Lê etapas de .csv (delimitador detectado) ou .jsonl; '-' lê JSONL do stdin."""
+    if caminho == "-":
+        for linha in sys.stdin:
+            if linha.strip():
+                yield json.loads(linha)
+        return
+
+    ext = os.path.splitext(caminho)[1].lower()
+    with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+        if ext in (".jsonl", ".ndjson", ".json"):
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+            return
+
+        amostra = f.read(4096)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        for row in csv.DictReader(f, dialect=dialeto):
+            yield row
+
+
+# Regras carregadas uma vez por processo do pool (initializer)
+_REGRAS: Optional[Dict[str, Any]] = None
+
+
+def _init_processo(regras_path: Optional[str]) -> None:
+    global _REGRAS
+    _REGRAS = carregar_regras(regras_path)
+
+
+def planejar_registro(reg: Dict[str, Any]) -> Dict[str, Any]:
+    """Gera o plano de um registro; erros viram {"etapa", "erro"} (o lote não para)."""
+    etapa = str(_campo(reg, "etapa") or "").strip()
+    try:
+        regras = _REGRAS if _REGRAS is not None else carregar_regras()
+        itens = itens_apn1_de_textos(_perguntas_apn1(_campo(reg, "apn1")))
+        # logs do plano ([WARN] APN-1 não reconhecida etc.) não podem sujar o JSONL do stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            plano = montar_plano(
+                str(_campo(reg, "descricao") or ""),
+                str(_campo(reg, "caracteristicas") or ""),
+                itens,
+                regras,
+            )
+        return {"etapa": etapa, "plano": plano}
+    except Exception as e:
+        return {"etapa": etapa, "erro": f"{type(e).__name__}: {e}"}
+
+
+def gerar_planos(
+    registros: Iterator[Dict[str, Any]],
+    processos: int = 1,
+    regras_path: Optional[str] = None,
+    chunksize: int = 64,
+) -> Iterator[Dict[str, Any]]:
+    """Gera planos na ordem de entrada; com processos > 1 usa um pool de processos."""
+    if processos <= 1:
+        _init_processo(regras_path)
+        for reg in registros:
+            yield planejar_registro(reg)
+        return
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_init_processo, initargs=(regras_path,)) as pool:
+        yield from pool.map(planejar_registro, registros, chunksize=chunksize)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="aplatquente plan",
+        description="Gera planos de Trabalho a Quente a partir de etapas exportadas (sem navegador)",
+    )
+    parser.add_argument("entrada", help="Arquivo .csv ou .jsonl com etapa, descricao, caracteristicas [, apn1] ('-' = JSONL no stdin)")
+    parser.add_argument("--saida", "-o", default="-", help="Arquivo JSONL de saída ('-' = stdout)")
+    parser.add_argument("--processos", "-p", type=int, default=os.cpu_count() or 1, help="Processos em paralelo")
+    parser.add_argument("--chunksize", type=int, default=64, help="Registros por lote enviado a cada processo")
+    parser.add_argument("--regras", help="Caminho alternativo do regras.yaml")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    total = erros = 0
+    try:
+        for res in gerar_planos(ler_registros(args.entrada), args.processos, args.regras, args.chunksize):
+            saida.write(json.dumps(res, ensure_ascii=False) + "\n")
+            total += 1
+            if "erro" in res:
+                erros += 1
+                print(f"[WARN] Etapa {res.get('etapa') or '?'}: {res['erro']}", file=sys.stderr)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    print(f"[INFO] Planos gerados: {total} (erros: {erros})", file=sys.stderr)
+    return 0 if erros == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,8 @@
 # aplatquente/preenchimento.py
 from __future__ import annotations
 
-import time
 import unicodedata
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
@@ -12,6 +11,7 @@ from selenium.webdriver.support.wait import WebDriverWait
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 
 from aplatquente.infra import (
+    aguardar_app_estavel,
     click_like_legacy,
     confirmar_etapa,
     ensure_no_messagebox,
@@ -22,8 +22,10 @@ from aplatquente.plano import (
     carregar_regras,
     coletar_apn1_itens,
     decidir_respostas_apn1,
+    fingerprint_apn1_dom,
     montar_contexto,
 )
+from aplatquente.rastreio import rastreado
 
 
 import re
@@ -102,26 +104,15 @@ def _index_rows_by_ordem(driver) -> Dict[str, WebElement]:
     Indexa rows com radio e uma 'ordem' (001..).
     Funciona tanto em div#questao_* quanto em tr.
     """
-    # tenta divs do padrão questao_*
-    rows: List[WebElement] = []
-    try:
-        rows = driver.find_elements(By.XPATH, "//div[starts-with(@id,'questao_') and .//input[@type='radio']]")
-    except Exception:
-        rows = []
-
-    # fallback tabela
-    if not rows:
-        try:
-            rows = driver.find_elements(By.XPATH, "//tr[.//input[@type='radio']]")
-        except Exception:
-            rows = []
+    # divs do padrão questao_*, depois tabela (mesma ordem do caminho em lote)
+    rows = _linhas_por_xpaths(driver, ROW_XPATHS_QUESTAO)
 
     out: Dict[str, WebElement] = {}
     for row in rows:
         try:
             ordem_el = row.find_elements(By.XPATH, ".//*[contains(@class,'ordem')]")
             txt = (ordem_el[0].text if ordem_el else (row.text or ""))
-            m = re.search(r"\b(\d{3})\b", txt)
+            m = re.search(RE_ORDEM_LINHA, txt)
             if m:
                 out[m.group(1)] = row
         except Exception:
@@ -217,6 +208,194 @@ def _mark_row_radio_generic(driver, row: WebElement, resposta: str) -> bool:
 
 
 
+# =============================================================================
+# Aplicação em lote (um único execute_script por aba)
+# =============================================================================
+
+# XPaths de linhas (fallback em ordem) e regex da ordem: os MESMOS no script em
+# lote e no caminho linha a linha, para os dois acharem as mesmas linhas
+ROW_XPATHS_QUESTAO: List[str] = [
+    "//div[starts-with(@id,'questao_') and .//input[@type='radio']]",
+    "//tr[.//input[@type='radio']]",
+]
+
+ROW_XPATHS_ANALISE_AMBIENTAL: List[str] = [
+    "//tr[.//input[@type='radio']]",
+    "//div[starts-with(@id,'questao_') and .//input[@type='radio']]",
+    "//*[.//input[@type='radio'] and (self::div or self::tr)][1]",
+]
+
+# Ordem "001".."999" como token (ASCII, igual em Python e no JS do navegador)
+RE_ORDEM_LINHA = r"(?<![0-9A-Za-z_])([0-9]{3})(?![0-9A-Za-z_])"
+
+
+def _linhas_por_xpaths(driver, xpaths: List[str]) -> List[WebElement]:
+    """Linhas do primeiro XPath (em ordem) que encontra alguma."""
+    for xp in xpaths:
+        try:
+            rows = driver.find_elements(By.XPATH, xp)
+        except Exception:
+            continue
+        if rows:
+            return rows
+    return []
+
+
+# Recebe: [0] XPaths de linhas (fallback em ordem), [1] lista {ordem, resp, hint},
+# [2] resposta para todas as linhas (Análise Ambiental) ou null, [3] RE_ORDEM_LINHA.
+# Marca via LABEL (mesma preferência de _mark_row_radio_generic) e dispara
+# input/change quando precisa forçar o checked.
+_JS_APLICAR_RADIOS = r"""
+const xps = arguments[0] || [];
+const plano = arguments[1] || [];
+const todas = arguments[2];
+const reOrdem = new RegExp(arguments[3]);
+
+const norm = (s) => (s || '').normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+  .toUpperCase().replace(/\s+/g, ' ').trim();
+const respNorm = (v) => {
+  const n = norm(v);
+  if (['SIM', 'S', 'YES', 'Y', 'TRUE', '1'].includes(n)) return 'SIM';
+  if (['NAO', 'N', 'NO', 'FALSE', '0'].includes(n)) return 'NAO';
+  if (['NA', 'N/A', 'N A', 'NAO APLICAVEL', 'NAO SE APLICA'].includes(n)) return 'NA';
+  return n;
+};
+
+let rows = [];
+for (const xp of xps) {
+  const snap = document.evaluate(xp, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < snap.snapshotLength; i++) rows.push(snap.snapshotItem(i));
+  if (rows.length) break;
+}
+
+const porOrdem = {};
+for (const row of rows) {
+  const el = row.querySelector('[class*="ordem"]');
+  const m = ((el ? el.textContent : row.textContent) || '').match(reOrdem);
+  if (m) porOrdem[m[1]] = row;
+}
+
+const marcar = (row, desired) => {
+  const target = Array.from(row.querySelectorAll('label')).find((lb) => respNorm(lb.textContent) === desired);
+  if (!target) return [false, 'label'];
+  const fid = (target.getAttribute('for') || '').trim();
+  const inp = fid ? document.getElementById(fid) : null;
+  if (inp && inp.checked) return [true, 'ja_marcado'];
+
+  target.click();
+  if (!inp) return [true, 'clicado'];
+  if (!inp.checked) inp.click();
+  if (!inp.checked) {
+    inp.checked = true;
+    inp.dispatchEvent(new Event('input', {bubbles: true}));
+    inp.dispatchEvent(new Event('change', {bubbles: true}));
+  }
+  return [inp.checked === true, inp.checked ? 'clicado' : 'nao_marcou'];
+};
+
+const itens = [];
+if (todas !== null && todas !== undefined) {
+  const desired = respNorm(todas);
+  rows.forEach((row, i) => {
+    const [ok, motivo] = marcar(row, desired);
+    itens.push({ordem: String(i + 1).padStart(3, '0'), ok, motivo});
+  });
+} else {
+  for (const p of plano) {
+    let row = porOrdem[p.ordem];
+    const hint = norm(p.hint);
+    if (!row && hint) {
+      row = rows.find((r) => {
+        const q = r.querySelector('[class*="pergunta"]');
+        return norm(q ? q.textContent : r.textContent).includes(hint);
+      });
+    }
+    if (!row) { itens.push({ordem: p.ordem, ok: false, motivo: 'linha'}); continue; }
+    const [ok, motivo] = marcar(row, respNorm(p.resp));
+    itens.push({ordem: p.ordem, ok, motivo});
+  }
+}
+return itens;
+"""
+
+
+def _plano_radios_por_ordem(plano: Dict[str, str]) -> Dict[str, tuple[str, str, str]]:
+    """
+    Normaliza o plano para ordem -> (resp, hint, origem), com prioridade para ordem explícita "001".
+    """
+    plano_por_ordem: Dict[str, tuple[str, str, str]] = {}
+    for k, v in (plano or {}).items():
+        ordem, is_explicit, hint = _parse_key_to_ordem(k)
+        if not ordem:
+            continue
+        if is_explicit or ordem not in plano_por_ordem:
+            plano_por_ordem[ordem] = (v, hint, k)
+    return plano_por_ordem
+
+
+def aplicar_radios_em_lote(
+    driver,
+    row_xpaths: List[str],
+    plano_por_ordem: Optional[Dict[str, tuple[str, str, str]]] = None,
+    resposta_todas: Optional[str] = None,
+    tag: str = "LOTE",
+) -> Optional[Dict[str, int]]:
+    """
+    Aplica o plano inteiro da aba em um único execute_script.
+    - plano_por_ordem: ordem -> (resp, hint, origem)
+    - resposta_todas: marca todas as linhas com essa resposta (ignora plano_por_ordem)
+    O script lê o estado da linha antes: só clica onde a marcação difere do plano.
+    Retorna {"total","ok","fail","alteradas"} ou None se o script falhar ou não achar
+    nenhuma linha (o chamador faz linha a linha).
+    """
+    plano_js = [
+        {"ordem": ordem, "resp": resp, "hint": hint}
+        for ordem, (resp, hint, _origem) in sorted((plano_por_ordem or {}).items())
+    ]
+
+    try:
+        itens = driver.execute_script(_JS_APLICAR_RADIOS, row_xpaths, plano_js, resposta_todas, RE_ORDEM_LINHA)
+    except Exception as e:
+        print(f"[DEBUG][{tag}] Aplicação em lote falhou, seguindo linha a linha: {e}")
+        return None
+
+    if not isinstance(itens, list):
+        return None
+
+    # nenhuma linha na aba (ainda não renderizou?): não é sucesso, o chamador segue linha a linha
+    if not itens or all(it.get("motivo") == "linha" for it in itens):
+        print(f"[DEBUG][{tag}] Nenhuma linha encontrada pelo script em lote, seguindo linha a linha.")
+        return None
+
+    origens = {ordem: origem for ordem, (_resp, _hint, origem) in (plano_por_ordem or {}).items()}
+    ok = fail = alteradas = 0
+    for it in itens:
+        # clicado / nao_marcou: houve clique (form sujo); ja_marcado / label / linha: nada mudou
+        if it.get("motivo") in ("clicado", "nao_marcou"):
+            alteradas += 1
+        ordem = str(it.get("ordem", "?"))
+        if it.get("ok"):
+            ok += 1
+            print(f"[INFO][{tag}] ordem {ordem} (origem='{origens.get(ordem, '')}') -> ok ({it.get('motivo', '')})")
+        else:
+            fail += 1
+            print(f"[WARN][{tag}] Falhou marcar ordem {ordem} (origem='{origens.get(ordem, '')}'): {it.get('motivo', '')}")
+
+    return {"total": len(itens), "ok": ok, "fail": fail, "alteradas": alteradas}
+
+
+def _confirmar_aba(driver, timeout: float, res: Dict[str, Any], diff: bool, tag: str) -> None:
+    """
+    Confirmar da aba. Com diff, dispensa quando nada foi clicado (alteradas == 0);
+    resultado sem "alteradas" (caminho linha a linha) sempre confirma.
+    """
+    if diff and res.get("alteradas") == 0:
+        print(f"[INFO][{tag}] Aba já conforme o plano; Confirmar dispensado.")
+        return
+    aguardar_app_estavel(driver)
+    confirmar_etapa(driver, timeout)
+
+
 def _mark_apn1_radio(driver, row: WebElement, resp: str) -> bool:
     desired = _resp_norm(resp)
 
@@ -299,34 +478,32 @@ def _mark_apn1_radio(driver, row: WebElement, resp: str) -> bool:
 # Questionário PT
 # =============================================================================
 
-def preencher_questionario_pt(driver, plano_qpt: Dict[str, str], timeout: float) -> Dict[str, int]:
+@rastreado()
+def preencher_questionario_pt(
+    driver,
+    plano_qpt: Dict[str, str],
+    timeout: float,
+    em_lote: bool = True,
+    diff: bool = False,
+) -> Dict[str, int]:
     print("[STEP] Questionário PT...")
     goto_tab(driver, "Questionário PT", timeout)
     ensure_no_messagebox(driver, 2)
 
+    # normaliza o plano para ordem -> (resp, hint, origem) com prioridade para ordem explícita "001"
+    plano_por_ordem = _plano_radios_por_ordem(plano_qpt)
+
+    if em_lote:
+        res = aplicar_radios_em_lote(driver, ROW_XPATHS_QUESTAO, plano_por_ordem, tag="QPT")
+        if res is not None:
+            _confirmar_aba(driver, timeout, res, diff, "QPT")
+            return res
+
     # indexa rows por ordem
     rows_by_ordem = _index_rows_by_ordem(driver)
 
     # lista de rows para fallback por hint
-    rows_list: List[WebElement] = []
-    try:
-        rows_list = driver.find_elements(By.XPATH, "//div[starts-with(@id,'questao_') and .//input[@type='radio']]")
-    except Exception:
-        rows_list = []
-    if not rows_list:
-        try:
-            rows_list = driver.find_elements(By.XPATH, "//tr[.//input[@type='radio']]")
-        except Exception:
-            rows_list = []
-
-    # normaliza o plano para ordem -> (resp, hint, origem) com prioridade para ordem explícita "001"
-    plano_por_ordem: Dict[str, tuple[str, str, str]] = {}
-    for k, v in (plano_qpt or {}).items():
-        ordem, is_explicit, hint = _parse_key_to_ordem(k)
-        if not ordem:
-            continue
-        if is_explicit or ordem not in plano_por_ordem:
-            plano_por_ordem[ordem] = (v, hint, k)
+    rows_list = _linhas_por_xpaths(driver, ROW_XPATHS_QUESTAO)
 
     total = len(plano_por_ordem)
     ok = fail = 0
@@ -364,7 +541,7 @@ def preencher_questionario_pt(driver, plano_qpt: Dict[str, str], timeout: float)
             except Exception:
                 fail += 1
 
-    time.sleep(0.2)
+    aguardar_app_estavel(driver)
     confirmar_etapa(driver, timeout)
     return {"total": total, "ok": ok, "fail": fail}
 
@@ -373,7 +550,14 @@ def preencher_questionario_pt(driver, plano_qpt: Dict[str, str], timeout: float)
 # =============================================================================
 # EPI adicional (radios na aba EPI)
 # =============================================================================
-def preencher_epi_adicional(driver, plano_epi: Dict[str, str], timeout: float) -> Dict[str, int]:
+@rastreado()
+def preencher_epi_adicional(
+    driver,
+    plano_epi: Dict[str, str],
+    timeout: float,
+    em_lote: bool = True,
+    diff: bool = False,
+) -> Dict[str, int]:
     """
     Preenche os rádios de EPI adicional necessários na aba EPI.
     Aceita chaves:
@@ -385,33 +569,24 @@ def preencher_epi_adicional(driver, plano_epi: Dict[str, str], timeout: float) -
     goto_tab(driver, "EPI", timeout)
     ensure_no_messagebox(driver, 2)
 
-    # indexa rows por ordem (001..)
-    rows_by_ordem = _index_rows_by_ordem(driver)
-
-    # lista para fallback por hint
-    rows_list: List[WebElement] = []
-    try:
-        rows_list = driver.find_elements(By.XPATH, "//div[starts-with(@id,'questao_') and .//input[@type='radio']]")
-    except Exception:
-        rows_list = []
-    if not rows_list:
-        try:
-            rows_list = driver.find_elements(By.XPATH, "//tr[.//input[@type='radio']]")
-        except Exception:
-            rows_list = []
-
     # normaliza plano para ordem -> (resp, hint, origem), prioridade para ordem explícita
-    plano_por_ordem: Dict[str, tuple[str, str, str]] = {}
-    for k, v in (plano_epi or {}).items():
-        ordem, is_explicit, hint = _parse_key_to_ordem(k)
-        if not ordem:
-            continue
-        if is_explicit or ordem not in plano_por_ordem:
-            plano_por_ordem[ordem] = (v, hint, k)
+    plano_por_ordem = _plano_radios_por_ordem(plano_epi)
 
     if not plano_por_ordem:
         return {"total": 0, "ok": 0, "fail": 0}
 
+    if em_lote:
+        res = aplicar_radios_em_lote(driver, ROW_XPATHS_QUESTAO, plano_por_ordem, tag="EPI_RADIO")
+        if res is not None:
+            _confirmar_aba(driver, timeout, res, diff, "EPI_RADIO")
+            return res
+
+    # indexa rows por ordem (001..)
+    rows_by_ordem = _index_rows_by_ordem(driver)
+
+    # lista para fallback por hint
+    rows_list = _linhas_por_xpaths(driver, ROW_XPATHS_QUESTAO)
+
     total = len(plano_por_ordem)
     ok = fail = 0
 
@@ -456,7 +631,7 @@ def preencher_epi_adicional(driver, plano_epi: Dict[str, str], timeout: float) -
             fail += 1
             print(f"[WARN][EPI_RADIO] Falhou marcar ordem {ordem} (exception)")
 
-    time.sleep(0.2)
+    aguardar_app_estavel(driver)
     confirmar_etapa(driver, timeout)
     return {"total": total, "ok": ok, "fail": fail}
 
@@ -467,7 +642,14 @@ def preencher_epi_adicional(driver, plano_epi: Dict[str, str], timeout: float) -
 # Análise Ambiental (padrão: marcar "Não" em tudo)
 # =============================================================================
 
-def preencher_analise_ambiental(driver, timeout: float, resposta_padrao: str = "Não") -> Dict[str, int]:
+@rastreado()
+def preencher_analise_ambiental(
+    driver,
+    timeout: float,
+    resposta_padrao: str = "Não",
+    em_lote: bool = True,
+    diff: bool = False,
+) -> Dict[str, int]:
     """
     Marca todas as perguntas da Análise Ambiental como resposta_padrao (default: Não).
     """
@@ -477,21 +659,17 @@ def preencher_analise_ambiental(driver, timeout: float, resposta_padrao: str = "
 
     desired = _resp_norm(resposta_padrao)
 
-    # candidatos de "rows" com radios
-    row_xps = [
-        "//tr[.//input[@type='radio']]",
-        "//div[starts-with(@id,'questao_') and .//input[@type='radio']]",
-        "//*[.//input[@type='radio'] and (self::div or self::tr)][1]",
-    ]
+    if em_lote:
+        res = aplicar_radios_em_lote(
+            driver, ROW_XPATHS_ANALISE_AMBIENTAL, resposta_todas=desired, tag="AMB"
+        )
+        if res is not None:
+            print(f"[INFO] Análise Ambiental: total={res['total']} ok={res['ok']} fail={res['fail']} (padrao={resposta_padrao})")
+            _confirmar_aba(driver, timeout, res, diff, "AMB")
+            return res
 
-    rows: List[WebElement] = []
-    for xp in row_xps:
-        try:
-            rows = driver.find_elements(By.XPATH, xp)
-            if rows:
-                break
-        except Exception:
-            continue
+    # candidatos de "rows" com radios (os mesmos do caminho em lote)
+    rows = _linhas_por_xpaths(driver, ROW_XPATHS_ANALISE_AMBIENTAL)
 
     total = ok = fail = 0
     for row in rows:
@@ -505,7 +683,7 @@ def preencher_analise_ambiental(driver, timeout: float, resposta_padrao: str = "
             fail += 1
 
     print(f"[INFO] Análise Ambiental: total={total} ok={ok} fail={fail} (padrao={resposta_padrao})")
-    time.sleep(0.3)
+    aguardar_app_estavel(driver)
     confirmar_etapa(driver, timeout)
     return {"total": total, "ok": ok, "fail": fail}
 
@@ -516,10 +694,62 @@ def preencher_analise_ambiental(driver, timeout: float, resposta_padrao: str = "
 # você pode manter o seu e deixar só este wrapper.
 # =============================================================================
 
-def preencher_apn1(driver, timeout: float, descricao: str, caracteristicas: str):
+def _aplicar_apn1_diff(
+    driver, timeout: float, plano_por_ordem: Dict[str, str], itens: Optional[List[Dict[str, Any]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Lê a seleção atual de todas as linhas (snapshot) e só clica nas que diferem do plano.
+    itens: coleta já feita nesta aba (evita um segundo snapshot).
+    None se faltar ordem/id de linha (o chamador segue linha a linha).
+    """
+    if itens is None:
+        itens = coletar_apn1_itens(driver, timeout)
+    if not itens or any(not (it.get("ordem") or "").strip() or not it.get("row_id") for it in itens):
+        return None
+
+    total = ok = fail = alteradas = 0
+    for it in itens:
+        ordem = it["ordem"].strip()
+        resp = plano_por_ordem.get(ordem, "Não")
+        total += 1
+        if _resp_norm(it.get("selecionado_atual") or "") == _resp_norm(resp):
+            ok += 1
+            continue
+
+        alteradas += 1
+        try:
+            ensure_no_messagebox(driver, 0.5)
+            row = driver.find_element(By.XPATH, f"//app-apn1-da-etapa//div[@id='{it['row_id']}']")
+            if _mark_apn1_radio(driver, row, resp):
+                ok += 1
+            else:
+                fail += 1
+            print(f"[INFO] APN-1 {ordem} -> {resp} (era {it.get('selecionado_atual') or '-'})")
+        except Exception as e:
+            fail += 1
+            print(f"[WARN] APN-1 {ordem}: falhou marcar {resp}: {e}")
+
+    print(f"[INFO] APN-1: {alteradas} de {total} linha(s) diferiam do plano.")
+    return {"total": total, "ok": ok, "fail": fail, "alteradas": alteradas}
+
+
+@rastreado()
+def preencher_apn1(
+    driver,
+    timeout: float,
+    descricao: str,
+    caracteristicas: str,
+    plano: Optional[Dict] = None,
+    diff: bool = False,
+):
     """
     Wrapper: se você já tem o APN1Processor robusto no seu preenchimento.py,
     mantenha-o. Se ainda não tiver, implemente aqui.
+
+    plano: plano de gerar_plano_trabalho_quente. Se o fingerprint das questões no
+    DOM bater com o do plano, usa apn1_por_ordem direto (sem recoletar/redecidir).
+    diff: só clica nas linhas cuja seleção atual difere do plano; sem diferença,
+    não confirma a aba.
     """
     print("[STEP] APN-1...")
     goto_tab(driver, "APN-1", timeout)
@@ -534,23 +764,43 @@ def preencher_apn1(driver, timeout: float, descricao: str, caracteristicas: str)
         confirmar_etapa(driver, timeout)
         return {"total": 0, "ok": 0, "fail": 0, "plano": {}}
 
-    try:
-        regras = carregar_regras()
-    except Exception as e:
-        print(f"[WARN] Falha ao carregar regras.yaml: {e}")
-        regras = {}
-
-    ctx = montar_contexto(descricao or "", caracteristicas or "")
-    apn1_regras = regras.get("apn1_regras", {}) if isinstance(regras, dict) else {}
+    plano_por_ordem: Optional[Dict[str, str]] = None
+    itens: Optional[List[Dict[str, Any]]] = None
 
-    itens = coletar_apn1_itens(driver, timeout)
-    itens = decidir_respostas_apn1(ctx, itens, apn1_regras)
+    fp_plano = (plano or {}).get("apn1_fingerprint")
+    if fp_plano and (plano or {}).get("apn1_por_ordem"):
+        fp_dom = fingerprint_apn1_dom(driver)
+        if fp_dom == fp_plano:
+            plano_por_ordem = dict(plano["apn1_por_ordem"])  # type: ignore[index]
+            print(f"[INFO] APN-1: reaproveitando plano (fingerprint {fp_dom}).")
+        else:
+            print(f"[INFO] APN-1: questões mudaram desde o plano ({fp_plano} -> {fp_dom}); recoletando.")
 
-    plano_por_ordem = {
-        (it.get("ordem") or "").strip(): it.get("resposta_planejada", "Não")
-        for it in itens
-        if (it.get("ordem") or "").strip()
-    }
+    if plano_por_ordem is None:
+        try:
+            regras = carregar_regras()
+        except Exception as e:
+            print(f"[WARN] Falha ao carregar regras.yaml: {e}")
+            regras = {}
+
+        ctx = montar_contexto(descricao or "", caracteristicas or "")
+        apn1_regras = regras.get("apn1_regras", {}) if isinstance(regras, dict) else {}
+
+        itens = coletar_apn1_itens(driver, timeout)
+        itens = decidir_respostas_apn1(ctx, itens, apn1_regras, regras.get("apn1_respostas") if isinstance(regras, dict) else None)
+
+        plano_por_ordem = {
+            (it.get("ordem") or "").strip(): it.get("resposta_planejada", "Não")
+            for it in itens
+            if (it.get("ordem") or "").strip()
+        }
+
+    if diff:
+        res = _aplicar_apn1_diff(driver, timeout, plano_por_ordem, itens)
+        if res is not None:
+            _confirmar_aba(driver, timeout, res, diff, "APN-1")
+            res["plano"] = plano_por_ordem
+            return res
 
     rows = driver.find_elements(By.XPATH, "//div[starts-with(@id,'questao_') and .//input[@type='radio']]")
     if not rows:
@@ -581,6 +831,6 @@ def preencher_apn1(driver, timeout: float, descricao: str, caracteristicas: str)
         except StaleElementReferenceException:
             fail += 1
 
-    time.sleep(0.3)
+    aguardar_app_estavel(driver)
     confirmar_etapa(driver, timeout)
     return {"total": total, "ok": ok, "fail": fail, "plano": plano_por_ordem}
@@ -0,0 +1,282 @@
+# aplatquente/rastreio.py
+from __future__ import annotations
+
+# =============================================================================
+# Rastreio de tempos por passo (spans)
+# - span("nome", **args) / @rastreado(): mede um trecho e guarda o evento
+# - exportar_chrome_trace(): formato trace-event (chrome://tracing, Perfetto)
+# - imprimir_tabela_tempos(): p50/p95 por passo no fim da execução
+# - contar_comandos(driver): round trips WebDriver por comando e por função
+# Desligado por padrão: sem ativar() o custo é só um if por chamada.
+# =============================================================================
+
+import functools
+import inspect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_ATIVO = False
+_LOCK = threading.Lock()
+_EVENTOS: List[Dict[str, Any]] = []
+_THREADS: Dict[int, str] = {}
+_T0_NS = time.perf_counter_ns()
+
+
+def ativar() -> None:
+    """Liga a coleta de spans (zera o que houver)."""
+    global _ATIVO, _T0_NS
+    with _LOCK:
+        _EVENTOS.clear()
+        _THREADS.clear()
+        _T0_NS = time.perf_counter_ns()
+        _ATIVO = True
+
+
+def ativo() -> bool:
+    return _ATIVO
+
+
+def _registrar(nome: str, inicio_ns: int, fim_ns: int, args: Dict[str, Any]) -> None:
+    th = threading.current_thread()
+    with _LOCK:
+        _THREADS.setdefault(th.ident or 0, th.name)
+        _EVENTOS.append({
+            "name": nome,
+            "ts": (inicio_ns - _T0_NS) / 1000.0,
+            "dur": (fim_ns - inicio_ns) / 1000.0,
+            "tid": th.ident or 0,
+            "args": args,
+        })
+
+
+@contextmanager
+def span(nome: str, **args: Any) -> Iterator[None]:
+    """Mede o bloco como um span; exceções são marcadas em args["erro"] e propagadas."""
+    if not _ATIVO:
+        yield
+        return
+
+    inicio = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException as e:
+        args["erro"] = type(e).__name__
+        raise
+    finally:
+        _registrar(nome, inicio, time.perf_counter_ns(), args)
+
+
+def rastreado(nome: Optional[str] = None, arg: Optional[str] = None) -> Callable:
+    """
+    Decorator: cada chamada vira um span com o nome da função (ou `nome`).
+    arg: nome de um parâmetro cujo valor vai para os args do span (ex.: a aba).
+    """
+    def deco(fn: Callable) -> Callable:
+        rotulo = nome or fn.__name__
+        assinatura = inspect.signature(fn) if arg else None
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _ATIVO:
+                return fn(*a, **kw)
+            extra: Dict[str, Any] = {}
+            if assinatura is not None:
+                try:
+                    extra[arg] = str(assinatura.bind_partial(*a, **kw).arguments.get(arg, ""))
+                except TypeError:
+                    pass
+            with span(rotulo, **extra):
+                return fn(*a, **kw)
+
+        return wrapper
+
+    return deco
+
+
+def eventos() -> List[Dict[str, Any]]:
+    with _LOCK:
+        return list(_EVENTOS)
+
+
+def exportar_chrome_trace(caminho: str) -> int:
+    """Grava os spans em JSON trace-event (ph "X" + nomes das threads). Retorna o nº de spans."""
+    pid = os.getpid()
+    with _LOCK:
+        evs = list(_EVENTOS)
+        threads = dict(_THREADS)
+
+    trace: List[Dict[str, Any]] = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nome}}
+        for tid, nome in threads.items()
+    ]
+    for ev in evs:
+        trace.append({
+            "name": ev["name"],
+            "cat": "aplat",
+            "ph": "X",
+            "ts": round(ev["ts"], 1),
+            "dur": round(ev["dur"], 1),
+            "pid": pid,
+            "tid": ev["tid"],
+            "args": ev["args"],
+        })
+
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(evs)
+
+
+def _percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por posto mais próximo (lista já ordenada, não vazia)."""
+    k = max(0, math.ceil(p * len(ordenados)) - 1)
+    return ordenados[k]
+
+
+def resumo_por_passo() -> List[Dict[str, Any]]:
+    """[{passo, n, total_s, p50_s, p95_s, max_s}] ordenado pelo tempo total (desc)."""
+    por_nome: Dict[str, List[float]] = {}
+    for ev in eventos():
+        por_nome.setdefault(ev["name"], []).append(ev["dur"] / 1e6)
+
+    linhas = []
+    for nome, durs in por_nome.items():
+        durs.sort()
+        linhas.append({
+            "passo": nome,
+            "n": len(durs),
+            "total_s": sum(durs),
+            "p50_s": _percentil(durs, 0.50),
+            "p95_s": _percentil(durs, 0.95),
+            "max_s": durs[-1],
+        })
+    linhas.sort(key=lambda r: r["total_s"], reverse=True)
+    return linhas
+
+
+def imprimir_tabela_tempos() -> None:
+    linhas = resumo_por_passo()
+    if not linhas:
+        return
+    larg = max(len("passo"), *(len(r["passo"]) for r in linhas))
+    print("\n====== TEMPOS POR PASSO (s) ======")
+    print(f"  {'passo':<{larg}} {'n':>5} {'total':>9} {'p50':>8} {'p95':>8} {'max':>8}")
+    for r in linhas:
+        print(
+            f"  {r['passo']:<{larg}} {r['n']:>5} {r['total_s']:>9.2f} "
+            f"{r['p50_s']:>8.3f} {r['p95_s']:>8.3f} {r['max_s']:>8.3f}"
+        )
+    print("==================================\n")
+
+
+# =============================================================================
+# Contagem de comandos WebDriver por tipo e por local de chamada
+# - contar_comandos(driver): embrulha driver.execute (todo comando, inclusive
+#   os de WebElement, passa por ele) e acumula n/tempo por comando e por função
+# - o "local" é a função mais interna de infra/plano/preenchimento/epi na pilha
+# =============================================================================
+
+_MODULOS_LOCAL = frozenset({
+    "aplatquente.infra",
+    "aplatquente.plano",
+    "aplatquente.preenchimento",
+    "aplatquente.epi",
+})
+
+
+def _local_chamada() -> str:
+    f = sys._getframe(2)
+    while f is not None:
+        mod = f.f_globals.get("__name__", "")
+        if mod in _MODULOS_LOCAL:
+            return f"{mod.rsplit('.', 1)[-1]}.{f.f_code.co_name}"
+        f = f.f_back
+    return "outros"
+
+
+class ContadorComandos:
+    """
+    Acumula (local, comando) -> [n, segundos] de um driver, no total e por thread
+    (com --abas várias threads dividem o mesmo driver: cada uma mede só os seus).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.dados: Dict[tuple, List[float]] = {}
+        self._por_thread: Dict[int, Dict[tuple, List[float]]] = {}
+
+    def registrar(self, local: str, comando: str, dur_s: float) -> None:
+        with self._lock:
+            for tabela in (self.dados, self._por_thread.setdefault(threading.get_ident(), {})):
+                acc = tabela.setdefault((local, comando), [0, 0.0])
+                acc[0] += 1
+                acc[1] += dur_s
+
+    def marco(self, desta_thread: bool = False) -> Dict[tuple, List[float]]:
+        """Cópia do estado atual (para medir um trecho com desde()); desta_thread: só os desta thread."""
+        with self._lock:
+            fonte = self._por_thread.get(threading.get_ident(), {}) if desta_thread else self.dados
+            return {k: list(v) for k, v in fonte.items()}
+
+    def desde(self, marco: Dict[tuple, List[float]], desta_thread: bool = False) -> Dict[tuple, List[float]]:
+        atual = self.marco(desta_thread)
+        out = {}
+        for k, (n, t) in atual.items():
+            n0, t0 = marco.get(k, (0, 0.0))
+            if n - n0:
+                out[k] = [n - n0, t - t0]
+        return out
+
+
+def contar_comandos(driver) -> ContadorComandos:
+    """Liga a contagem neste driver (idempotente) e devolve o contador."""
+    contador = getattr(driver, "_aplat_comandos", None)
+    if contador is not None:
+        return contador
+
+    contador = ContadorComandos()
+    execute_original = driver.execute
+
+    def execute(driver_command, params=None):
+        inicio = time.perf_counter()
+        try:
+            return execute_original(driver_command, params)
+        finally:
+            contador.registrar(_local_chamada(), str(driver_command), time.perf_counter() - inicio)
+
+    driver.execute = execute
+    driver._aplat_comandos = contador
+    return contador
+
+
+def contador_do_driver(driver) -> Optional[ContadorComandos]:
+    return getattr(driver, "_aplat_comandos", None)
+
+
+def imprimir_relatorio_comandos(dados: Dict[tuple, List[float]], titulo: str, top: int = 12) -> None:
+    """Totais por comando e as funções que mais fazem round trips."""
+    if not dados:
+        return
+    por_cmd: Dict[str, List[float]] = {}
+    por_local: Dict[str, List[float]] = {}
+    for (local, cmd), (n, t) in dados.items():
+        for chave, tabela in ((cmd, por_cmd), (local, por_local)):
+            acc = tabela.setdefault(chave, [0, 0.0])
+            acc[0] += n
+            acc[1] += t
+
+    total_n = sum(v[0] for v in por_cmd.values())
+    total_t = sum(v[1] for v in por_cmd.values())
+    print(f"\n------ COMANDOS WEBDRIVER: {titulo} ({int(total_n)} cmds, {total_t:.2f}s) ------")
+    for rotulo, tabela in (("comando", por_cmd), ("local", por_local)):
+        linhas = sorted(tabela.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        larg = max(len(rotulo), *(len(k) for k, _ in linhas))
+        print(f"  {rotulo:<{larg}} {'n':>6} {'total s':>9} {'ms/cmd':>8}")
+        for k, (n, t) in linhas:
+            print(f"  {k:<{larg}} {int(n):>6} {t:>9.2f} {1000 * t / n:>8.1f}")
+    print("-" * 60)
@@ -0,0 +1,217 @@
+# aplatquente/sessao.py
+from __future__ import annotations
+
+# =============================================================================
+# Sessão autenticada persistida (cookies + localStorage + sessionStorage)
+# - Gravada criptografada (Fernet); a chave fica no keyring do usuário
+# - Na próxima execução restaura e vai direto para a tela principal
+# - Sessão expirada/ilegível => retorna False e o fluxo normal de login segue
+# =============================================================================
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from aplatquente.infra import Driver, _wait_main_screen, wait_for_document_ready
+
+
+SESSAO_PATH_PADRAO = os.path.join(os.path.expanduser("~"), ".aplatquente", "sessao.bin")
+
+# Sessões mais velhas que isso nem são tentadas (o SSO já terá expirado)
+SESSAO_MAX_IDADE_S = 12 * 3600
+
+_JS_LER_STORAGE = r"""
+const dump = (st) => {
+  const out = {};
+  try { for (let i = 0; i < st.length; i++) { const k = st.key(i); out[k] = st.getItem(k); } } catch (e) {}
+  return out;
+};
+return {origin: location.origin, local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_JS_GRAVAR_STORAGE = r"""
+const dados = arguments[0] || {};
+const put = (st, obj) => { try { for (const [k, v] of Object.entries(obj || {})) st.setItem(k, v); } catch (e) {} };
+put(window.localStorage, dados.local);
+put(window.sessionStorage, dados.session);
+return true;
+"""
+
+
+def _fernet(keyring_service: str, user: Optional[str]):
+    """
+    Retorna um Fernet com a chave guardada no keyring (cria na primeira vez).
+    Sem cryptography/keyring a persistência fica desativada (nunca grava em texto puro).
+    """
+    try:
+        import keyring
+        from cryptography.fernet import Fernet  # type: ignore
+    except Exception as e:
+        print(f"[WARN] Sessão persistida indisponível (requer cryptography e keyring): {e}")
+        return None
+
+    service = f"{keyring_service}.sessao"
+    conta = user or "sessao"
+    try:
+        chave = keyring.get_password(service, conta)
+        if not chave:
+            chave = Fernet.generate_key().decode("ascii")
+            keyring.set_password(service, conta, chave)
+        return Fernet(chave.encode("ascii"))
+    except Exception as e:
+        print(f"[WARN] Não foi possível obter a chave da sessão no keyring: {e}")
+        return None
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def salvar_sessao(
+    driver: Driver,
+    caminho: str = SESSAO_PATH_PADRAO,
+    keyring_service: str = "aplat.petrobras",
+    user: Optional[str] = None,
+) -> bool:
+    """Grava cookies + storages da página atual (chamar com a tela principal carregada)."""
+    f = _fernet(keyring_service, user)
+    if f is None:
+        return False
+
+    try:
+        storage = driver.execute_script(_JS_LER_STORAGE) or {}
+        payload: Dict[str, Any] = {
+            "salvo_em": time.time(),
+            "origin": storage.get("origin") or _origin(driver.current_url),
+            "cookies": driver.get_cookies(),
+            "local": storage.get("local") or {},
+            "session": storage.get("session") or {},
+        }
+    except Exception as e:
+        print(f"[WARN] Falha ao ler a sessão do navegador: {e}")
+        return False
+
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"  # workers podem salvar juntos
+        with open(tmp, "wb") as fh:
+            fh.write(f.encrypt(json.dumps(payload).encode("utf-8")))
+        try:
+            os.chmod(tmp, 0o600)
+        except Exception:
+            pass
+        os.replace(tmp, caminho)
+    except Exception as e:
+        print(f"[WARN] Falha ao gravar sessão em {caminho}: {e}")
+        return False
+
+    print(f"[INFO] Sessão salva ({len(payload['cookies'])} cookies) em: {caminho}")
+    return True
+
+
+def _carregar_sessao(caminho: str, keyring_service: str, user: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(caminho):
+        return None
+
+    f = _fernet(keyring_service, user)
+    if f is None:
+        return None
+
+    try:
+        with open(caminho, "rb") as fh:
+            payload = json.loads(f.decrypt(fh.read()).decode("utf-8"))
+    except Exception as e:
+        print(f"[WARN] Sessão salva ilegível (chave diferente ou arquivo corrompido): {e}")
+        return None
+
+    if not isinstance(payload, dict):
+        return None
+
+    idade = time.time() - float(payload.get("salvo_em") or 0)
+    if idade > SESSAO_MAX_IDADE_S:
+        print(f"[INFO] Sessão salva expirada ({idade / 3600:.1f} h). Ignorando.")
+        return None
+
+    return payload
+
+
+def restaurar_sessao(
+    driver: Driver,
+    url: str,
+    timeout: float,
+    caminho: str = SESSAO_PATH_PADRAO,
+    keyring_service: str = "aplat.petrobras",
+    user: Optional[str] = None,
+) -> bool:
+    """
+    Restaura cookies/storages salvos e abre a URL direto na tela principal.
+    Retorna False se não houver sessão válida; nesse caso a página da URL já
+    está carregada e o login normal (keyring/manual) pode seguir.
+    """
+    payload = _carregar_sessao(caminho, keyring_service, user)
+    if not payload:
+        return False
+
+    origin = payload.get("origin") or _origin(url)
+    print(f"[LOGIN] Restaurando sessão salva para {origin}...")
+
+    try:
+        # Recurso estático do mesmo domínio: permite setar cookies/storage
+        # sem que o app (e o redirecionamento do SSO) rode antes.
+        driver.get(f"{origin}/favicon.ico")
+
+        for c in payload.get("cookies") or []:
+            cookie = {k: v for k, v in c.items() if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")}
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                # cookie de outro domínio/atributo não aceito: segue com os demais
+                continue
+
+        driver.execute_script(_JS_GRAVAR_STORAGE, {"local": payload.get("local"), "session": payload.get("session")})
+
+        driver.get(url)
+        try:
+            wait_for_document_ready(driver, timeout)
+        except Exception:
+            pass
+    except Exception as e:
+        print(f"[WARN] Falha ao restaurar sessão: {e}")
+        return False
+
+    if _wait_main_screen(driver, min(timeout, 10.0)):
+        print("[LOGIN] Sessão restaurada; tela principal detectada.")
+        return True
+
+    print("[LOGIN] Sessão salva não é mais válida. Seguindo com o login normal.")
+    return False
+
+
+def ler_storage(driver: Driver) -> Dict[str, Any]:
+    """localStorage + sessionStorage da aba atual (para replicar o login em outra aba)."""
+    try:
+        return driver.execute_script(_JS_LER_STORAGE) or {}
+    except Exception as e:
+        print(f"[WARN] Falha ao ler o storage da aba: {e}")
+        return {}
+
+
+def preparar_aba_logada(driver: Driver, url: str, timeout: float, storage: Dict[str, Any]) -> bool:
+    """
+    Numa aba nova (já selecionada), replica o storage da aba logada e abre a URL.
+    Cookies são do navegador inteiro, mas o sessionStorage não passa para abas
+    abertas pelo WebDriver. Retorna True se a tela principal apareceu.
+    """
+    try:
+        driver.get(f"{storage.get('origin') or _origin(url)}/favicon.ico")
+        driver.execute_script(_JS_GRAVAR_STORAGE, {"local": storage.get("local"), "session": storage.get("session")})
+        driver.get(url)
+        wait_for_document_ready(driver, timeout)
+    except Exception as e:
+        print(f"[WARN] Falha ao preparar a aba: {e}")
+        return False
+    return _wait_main_screen(driver, min(timeout, 10.0))
@@ -0,0 +1,86 @@
+# tests/test_paralelo.py
+# --workers/--abas: quem varre (--sweep) sempre libera a fila, e as abas extras
+# abertas por AbasCompartilhadas são fechadas no fim (navegador do --attach).
+import contextlib
+import io
+import threading
+
+from selenium.webdriver.remote.command import Command
+
+from aplatquente import abas as abas_mod
+from aplatquente import aplatquente as app
+from aplatquente.abas import AbasCompartilhadas
+
+
+class _DriverFalso:
+    def __init__(self, n=1):
+        self.n = n
+        self.current_window_handle = "principal"
+        self.comandos = []
+        self._novas = 0
+
+    def execute(self, comando, params=None):
+        self.comandos.append((comando, dict(params or {})))
+        if comando == Command.NEW_WINDOW:
+            self._novas += 1
+            return {"value": {"handle": f"aba{self._novas}"}}
+        return {"value": None}
+
+
+class _AbasQueFunciona:
+    trocas = 0
+
+    def __init__(self, driver):
+        if driver.n == 1:
+            raise RuntimeError("janela indisponível")
+
+    def abrir(self, quantidade, url, timeout, prefixo=""):
+        return ["principal"]
+
+    def vincular(self, handle):
+        pass
+
+    def fechar(self):
+        pass
+
+
+def test_worker_que_varre_libera_a_fila_se_as_abas_falham(monkeypatch):
+    n_driver = iter(range(1, 10))
+    monkeypatch.setattr(app, "_abrir_sessao", lambda args, prefixo="": _DriverFalso(next(n_driver)))
+    monkeypatch.setattr(app, "AbasCompartilhadas", _AbasQueFunciona)
+    monkeypatch.setattr(app, "_nova_pesquisa", lambda driver, data_ui, args: None)
+    monkeypatch.setattr(app, "encerrar_driver", lambda driver: None)
+    args = app.parse_args(["--data", "2026-01-03", "--sweep", "--workers", "2", "--abas", "2"])
+
+    resultados = []
+
+    def rodar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados.extend(app.processar_em_paralelo(args, "03/01/2026", [], 2, varrer=True))
+
+    t = threading.Thread(target=rodar, daemon=True)
+    t.start()
+    t.join(timeout=10)
+    assert not t.is_alive(), "workers ficaram esperando uma varredura que caiu"
+    assert resultados == []
+
+
+def test_fechar_fecha_as_abas_extras_e_volta_para_a_principal(monkeypatch):
+    monkeypatch.setattr(abas_mod, "ler_storage", lambda driver: {})
+    monkeypatch.setattr(abas_mod, "preparar_aba_logada", lambda driver, url, timeout, storage: True)
+    monkeypatch.setattr(abas_mod, "instalar_observador_messagebox", lambda driver: None)
+    monkeypatch.setattr(abas_mod, "instalar_rastreador_rede", lambda driver: None)
+    driver = _DriverFalso()
+    abas = AbasCompartilhadas(driver)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert abas.abrir(2, "http://aplat", 1.0) == ["principal", "aba1", "aba2"]
+
+    driver.comandos.clear()
+    abas.fechar()
+    assert driver.comandos == [
+        (Command.SWITCH_TO_WINDOW, {"handle": "aba1"}),
+        (Command.CLOSE, {}),
+        (Command.SWITCH_TO_WINDOW, {"handle": "aba2"}),
+        (Command.CLOSE, {}),
+        (Command.SWITCH_TO_WINDOW, {"handle": "principal"}),
+    ]
@@ -0,0 +1,89 @@
+# tests/test_plano.py
+# Equivalência do detector de flags (pré-filtro por literal) com o re.search
+# por padrão que ele substituiu.
+import random
+import re
+
+import pytest
+
+from aplatquente import plano
+
+_VOCAB_EXTRA = [
+    "SERVICO", "DE", "NA", "LINHA", "AREA", "CLASSIFICADA", "PROXIMO", "A", "COM", "E",
+    "NR 35", "NR35", "NO BREAK", "NOBREAK", "MACARICO", "MAÇARICO", "DIOXIDO", "DIÓXIDO",
+    "PAINEIS ELETRICOS", "PAINÉIS ELÉTRICOS", "TRAT. MEC", "TRATMEC", "ESPACOS CONFINADAS",
+    "INDISPONIBILIDADE DO SISTEMA DE COMBATE A INCÊNDIO", "PROTEGIDAS POR CO2", "H2SO4",
+    "ELETRICISTA", "CORTEX", "XCORTE", "-", ",", ".", "/",
+]
+
+
+def _por_padrao(padroes, texto):
+    return {nome for nome, pat in padroes if re.search(pat, texto)}
+
+
+def _vocabulario(padroes):
+    palavras = list(_VOCAB_EXTRA)
+    for _nome, pat in padroes:
+        for pedaco in re.split(r"[|()\[\]?*+{}]|\\[bs]", pat):
+            pedaco = pedaco.replace("\\.", ".").strip()
+            if pedaco:
+                palavras.append(pedaco)
+    return palavras
+
+
+def _corpus(padroes, n=3000, semente=20261016):
+    rnd = random.Random(semente)
+    palavras = _vocabulario(padroes)
+    for _ in range(n):
+        partes = [rnd.choice(palavras) for _ in range(rnd.randint(1, 12))]
+        sep = rnd.choice([" ", "", ", "])
+        yield sep.join(partes)
+
+
+@pytest.mark.parametrize(
+    "padroes,detector",
+    [(plano._CTX_PATTERNS, plano._CTX_DETECTOR), (plano._APN1_PATTERNS, plano._APN1_DETECTOR)],
+    ids=["contexto", "apn1"],
+)
+def test_detector_equivale_ao_re_search_por_padrao(padroes, detector):
+    for texto in _corpus(padroes):
+        assert plano._detectar(detector, texto) == _por_padrao(padroes, texto), texto
+
+
+def test_detector_texto_normalizado_real():
+    texto = plano.normalizar_texto(
+        "Soldagem e corte com maçarico em linha pressurizada, próximo a painel elétrico; "
+        "trabalho em altura (NR-35) sobre o mar, presença de H2S."
+    )
+    esperado = _por_padrao(plano._CTX_PATTERNS, texto)
+    assert plano._detectar(plano._CTX_DETECTOR, texto) == esperado
+    assert {"tem_chama", "tem_altura", "tem_sobre_o_mar", "tem_h2s", "tem_pressurizado"} <= esperado
+
+
+def test_montar_contexto_flags_iguais_ao_re_search():
+    ctx = plano.montar_contexto("Esmerilhadeira e lixadeira no interior de tanque", "Espaço confinado")
+    texto = ctx["texto_full"]
+    for nome, pat in plano._CTX_PATTERNS:
+        assert ctx[nome] == bool(re.search(pat, texto)), nome
+    assert ctx["hazard_olhos"]
+
+
+@pytest.mark.parametrize(
+    "pat,literais",
+    [
+        (r"\b(MA[ÇC]ARICO|SOLD(A|AGEM))\b", ["ARICO", "SOLD"]),
+        (r"NO-?BREAK|CORRENTE CONTINUA CRITIC", ["BREAK", "CORRENTE CONTINUA CRITIC"]),
+        (r"(ALTERACAO|ALTERAÇÃO).*(CONDICOES)|PARADA", ["ALTERACAO", "ALTERAÇÃO", "PARADA"]),
+        (r"ESPACOS? CONFINAD[OA]S?", [" CONFINAD"]),
+        (r"(X)?Y|Z", ["Y", "Z"]),
+        (r"(X)?|Z", None),
+        (r"(?i)ABC", None),
+    ],
+)
+def test_literais_obrigatorios(pat, literais):
+    assert plano._literais(pat) == literais
+
+
+def test_identificar_chave_apn1_respeita_a_ordem():
+    pergunta = plano.normalizar_texto("Haverá corte em área com presença de H2S?")
+    assert plano._identificar_chave_apn1(pergunta) == "risco_h2s"
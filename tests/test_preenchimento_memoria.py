@@ -0,0 +1,141 @@
+# tests/test_preenchimento_memoria.py
+# Resultados e round trips WebDriver de cada caminho de preenchimento no
+# DriverMemoria (os mesmos números do `mock micro`). Os execute_script são
+# emulados em Python: o JS injetado em si só roda no `mock bench` (navegador real).
+import contextlib
+import io
+
+import pytest
+
+from aplatquente import epi, mock_aplat
+from aplatquente.infra import goto_tab, ler_tipo_trabalho
+from aplatquente.plano import coletar_apn1_itens
+from aplatquente.preenchimento import (
+    ROW_XPATHS_ANALISE_AMBIENTAL,
+    ROW_XPATHS_QUESTAO,
+    _index_rows_by_ordem,
+    _mark_apn1_radio,
+    _mark_row_radio_generic,
+    aplicar_radios_em_lote,
+    preencher_analise_ambiental,
+    preencher_epi_adicional,
+    preencher_questionario_pt,
+)
+
+T = 5.0
+
+
+@pytest.fixture(scope="module")
+def fixtures():
+    return mock_aplat.carregar_fixtures()
+
+
+@pytest.fixture(scope="module")
+def etapa():
+    e = mock_aplat.gerar_etapas(mock_aplat.DATA_PADRAO, 1, frio_a_cada=0)[0]
+    e["apn1"] = "20"
+    return e
+
+
+@pytest.fixture
+def driver(fixtures, etapa):
+    epi.usar_catalogo(None)
+    d = mock_aplat.driver_memoria_etapa(fixtures, etapa)
+    yield d
+    d.quit()
+
+
+def _quieto(fn, *args, **kw):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kw)
+
+
+def _plano_qpt(fixtures):
+    return {q["ordem"]: q["opcoes"][0] for q in fixtures["qpt"]}
+
+
+def _plano_epi_radios(fixtures):
+    return {q["ordem"]: "Não" for q in fixtures["epi_radios"]}
+
+
+def _epis(fixtures):
+    return {cat: itens[:3] for cat, itens in fixtures["epi"]["catalogo"].items()}
+
+
+def test_tipo_trabalho_um_script(driver):
+    assert _quieto(ler_tipo_trabalho, driver) == "Trabalho a Quente"
+    assert driver.total_comandos() == 1
+
+
+@pytest.mark.parametrize("em_lote,cmds", [(True, 25), (False, 198)])
+def test_qpt(driver, fixtures, em_lote, cmds):
+    res = _quieto(preencher_questionario_pt, driver, _plano_qpt(fixtures), T, em_lote=em_lote)
+    assert (res["total"], res["ok"], res["fail"]) == (14, 14, 0)
+    assert driver.total_comandos() == cmds
+
+
+@pytest.mark.parametrize("em_lote,cmds", [(True, 25), (False, 104)])
+def test_epi_adicional(driver, fixtures, em_lote, cmds):
+    res = _quieto(preencher_epi_adicional, driver, _plano_epi_radios(fixtures), T, em_lote=em_lote)
+    assert (res["total"], res["ok"], res["fail"]) == (6, 6, 0)
+    assert driver.total_comandos() == cmds
+
+
+@pytest.mark.parametrize("em_lote,cmds", [(True, 25), (False, 76)])
+def test_analise_ambiental(driver, em_lote, cmds):
+    res = _quieto(preencher_analise_ambiental, driver, T, em_lote=em_lote)
+    assert (res["total"], res["ok"], res["fail"]) == (5, 5, 0)
+    assert driver.total_comandos() == cmds
+
+
+def test_qpt_mark_row_radio_generic(driver, fixtures):
+    plano = _plano_qpt(fixtures)
+    _quieto(goto_tab, driver, "Questionário PT", T)
+    rows = _quieto(_index_rows_by_ordem, driver)
+    ok = sum(_quieto(_mark_row_radio_generic, driver, r, plano[o]) for o, r in rows.items())
+    assert (len(rows), ok) == (14, 14)
+    assert driver.total_comandos() == 170
+
+
+def test_epi_por_categoria_modal(driver, fixtures):
+    res = _quieto(epi.aplicar_epi_por_categoria, driver, _epis(fixtures), T)
+    assert res == {"total": 12, "ok": 12, "fail": 0, "alteradas": 12}
+    assert driver.total_comandos() == 86
+
+
+@pytest.mark.parametrize("snapshot,cmds", [(True, 12), (False, 272)])
+def test_apn1_coleta(driver, snapshot, cmds):
+    _quieto(goto_tab, driver, "APN-1", T)
+    assert len(_quieto(coletar_apn1_itens, driver, T, snapshot=snapshot)) == 20
+    assert driver.total_comandos() == cmds
+
+
+def test_apn1_mark_radio(driver):
+    _quieto(goto_tab, driver, "APN-1", T)
+    rows = _quieto(_index_rows_by_ordem, driver)
+    ok = sum(_quieto(_mark_apn1_radio, driver, r, "Não") for r in rows.values())
+    assert (len(rows), ok) == (20, 20)
+    assert driver.total_comandos() == 452
+
+
+def test_diff_segunda_passada_nao_clica_nem_confirma(driver, fixtures):
+    plano = _plano_qpt(fixtures)
+    _quieto(preencher_questionario_pt, driver, plano, T, em_lote=True, diff=True)
+    gravacoes = len(driver.memoria.gravacoes)
+    res = _quieto(preencher_questionario_pt, driver, plano, T, em_lote=True, diff=True)
+    assert (res["ok"], res["alteradas"]) == (14, 0)
+    assert len(driver.memoria.gravacoes) == gravacoes
+
+
+@pytest.mark.parametrize("xpaths,kw", [
+    (ROW_XPATHS_QUESTAO, {"plano_por_ordem": {"001": ("Sim", "", "001")}}),
+    (ROW_XPATHS_ANALISE_AMBIENTAL, {"resposta_todas": "NAO"}),
+])
+def test_lote_sem_linhas_devolve_none(xpaths, kw):
+    from aplatquente.driver_memoria import DriverMemoria
+
+    d = DriverMemoria()
+    try:
+        assert _quieto(aplicar_radios_em_lote, d, xpaths, **kw) is None
+    finally:
+        d.quit()
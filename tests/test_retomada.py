@@ -0,0 +1,59 @@
+# tests/test_retomada.py
+# --resume --diff: etapa com todas as abas no diário mas sem 'confirmada' ok=1
+# (o Confirmar do rodapé falhou ou a execução caiu antes) ainda clica o rodapé.
+import contextlib
+import io
+
+import pytest
+
+from aplatquente import aplatquente as app
+from aplatquente.diario import Diario
+from aplatquente.plano import abas_planejadas, houve_alteracao
+
+DATA = "03/01/2026"
+ETAPA = "123456"
+PLANO = {
+    "qpt": {"001": "Sim"},
+    "epi_radios": {"001": "Não"},
+    "epis_cat": {"Proteção Respiratória": ["Máscara"]},
+}
+
+
+class _PesquisaFalsa:
+    def tipo_no_grid(self, etapa):
+        return "Trabalho a Quente"
+
+    def abrir_etapa(self, etapa, detail_wait=0.0):
+        pass
+
+
+@pytest.fixture
+def rodape(monkeypatch):
+    cliques = []
+    monkeypatch.setattr(app, "clicar_botao_confirmar_rodape", lambda driver, timeout: cliques.append(timeout))
+    monkeypatch.setattr(app, "fechar_modal_etapa", lambda driver, timeout: None)
+    return cliques
+
+
+def test_houve_alteracao_com_abas_retomadas():
+    resultado = {chave: {"retomada": True} for chave in abas_planejadas(PLANO)}
+    resultado["warnings"] = []
+    assert houve_alteracao(resultado, abas_planejadas(PLANO))
+
+
+def test_resume_diff_com_todas_as_abas_no_diario_clica_o_rodape(tmp_path, rodape):
+    diario = Diario(str(tmp_path / "diario.sqlite"))
+    diario.registrar(DATA, ETAPA, "aberta")
+    diario.registrar(DATA, ETAPA, "planejada", detalhe=PLANO)
+    for aba in abas_planejadas(PLANO):
+        diario.registrar_aba(DATA, ETAPA, aba, {"total": 1, "ok": 1, "fail": 0, "alteradas": 1})
+    diario.registrar(DATA, ETAPA, "erro", ok=False, detalhe="confirmar: timeout")
+    assert diario.etapa_concluida(DATA, ETAPA) is None
+
+    args = app.parse_args(["--data", "2026-01-03", "--valor", ETAPA, "--resume", "--diff"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = app._processar_etapa(None, ETAPA, DATA, args, _PesquisaFalsa(), True, diario)
+
+    assert res["status"] == "ok"
+    assert len(rodape) == 1
+    assert diario.etapa_concluida(DATA, ETAPA) == "confirmada"